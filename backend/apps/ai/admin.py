@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, AIKnowledgeBase
+from .models import Conversation, Message, AIKnowledgeBase, TTSCacheEntry, BackgroundJob
 
 
 class MessageInline(admin.TabularInline):
@@ -14,7 +14,7 @@ class ConversationAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'conversation_type', 'status', 'child', 'message_count', 'created_at']
     list_filter = ['conversation_type', 'status', 'created_at']
     search_fields = ['user__email', 'user__first_name']
-    readonly_fields = ['id', 'created_at', 'updated_at', 'completed_at']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'completed_at', 'summarized_until']
     inlines = [MessageInline]
 
     def message_count(self, obj):
@@ -27,7 +27,7 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ['id', 'conversation', 'role', 'content_preview', 'is_complaint', 'created_at']
     list_filter = ['role', 'is_complaint', 'created_at']
     search_fields = ['content', 'conversation__user__email']
-    readonly_fields = ['id', 'created_at']
+    readonly_fields = ['id', 'token_count', 'created_at']
 
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
@@ -40,3 +40,19 @@ class AIKnowledgeBaseAdmin(admin.ModelAdmin):
     list_filter = ['stage_type']
     search_fields = ['theme', 'baby_development', 'mother_changes']
     ordering = ['stage_type', 'week']
+
+
+@admin.register(TTSCacheEntry)
+class TTSCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['key', 'voice', 'model', 'size_bytes', 'hit_count', 'last_used_at']
+    list_filter = ['voice', 'model']
+    search_fields = ['text', 'key']
+    readonly_fields = ['key', 'audio_path', 'size_bytes', 'hit_count', 'created_at', 'last_used_at']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'priority', 'attempts', 'dedup_key', 'created_at', 'finished_at']
+    list_filter = ['task', 'status']
+    search_fields = ['dedup_key', 'last_error']
+    readonly_fields = ['attempts', 'created_at', 'started_at', 'finished_at', 'last_error']
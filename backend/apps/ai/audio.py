@@ -0,0 +1,93 @@
+"""
+Voice uploads, kept in memory from request to transcription.
+
+An upload is read once. Whisper gets those bytes with a proper filename and
+MIME type, and storing them is left to a background job (see tasks.py).
+Uploads above AI_AUDIO_TRANSCODE_BYTES (WAV, long m4a...) are piped through
+ffmpeg to mono 16 kHz Opus when ffmpeg is installed; both the Whisper upload
+and the stored copy shrink. Without ffmpeg, or if it fails, the original is kept.
+"""
+import logging
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    '.webm': 'audio/webm',
+    '.ogg': 'audio/ogg',
+    '.oga': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.mp3': 'audio/mpeg',
+    '.mpga': 'audio/mpeg',
+    '.mpeg': 'audio/mpeg',
+    '.m4a': 'audio/mp4',
+    '.mp4': 'audio/mp4',
+    '.wav': 'audio/wav',
+    '.flac': 'audio/flac',
+}
+EXTENSIONS = {
+    'audio/webm': '.webm', 'video/webm': '.webm', 'audio/ogg': '.ogg', 'audio/opus': '.ogg',
+    'audio/mpeg': '.mp3', 'audio/mp3': '.mp3', 'audio/mp4': '.m4a', 'audio/x-m4a': '.m4a',
+    'audio/aac': '.m4a', 'audio/wav': '.wav', 'audio/x-wav': '.wav', 'audio/wave': '.wav',
+    'audio/flac': '.flac',
+}
+DEFAULT_EXTENSION = '.webm'
+
+
+def read_upload(audio_file):
+    """
+    (bytes, filename, content_type) for an uploaded file. The filename always
+    carries an extension Whisper accepts; browsers often send 'blob'.
+    """
+    audio_file.seek(0)
+    data = audio_file.read()
+
+    filename = os.path.basename(getattr(audio_file, 'name', '') or '') or 'audio'
+    content_type = (getattr(audio_file, 'content_type', '') or '').split(';')[0].strip().lower()
+    base, extension = os.path.splitext(filename)
+    extension = extension.lower()
+    if extension not in MIME_TYPES:
+        extension = EXTENSIONS.get(content_type, DEFAULT_EXTENSION)
+        filename = f"{base or 'audio'}{extension}"
+    return data, filename, MIME_TYPES[extension]
+
+
+def compact(data, filename, content_type):
+    """Transcode large audio to Opus in memory; returns (bytes, filename, content_type)."""
+    if len(data) <= settings.AI_AUDIO_TRANSCODE_BYTES:
+        return data, filename, content_type
+    ffmpeg = shutil.which(settings.AI_AUDIO_FFMPEG)
+    if not ffmpeg:
+        return data, filename, content_type
+
+    try:
+        result = subprocess.run(
+            [
+                ffmpeg, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+                '-vn', '-ac', '1', '-ar', '16000',
+                '-c:a', 'libopus', '-b:a', settings.AI_AUDIO_OPUS_BITRATE, '-application', 'voip',
+                '-f', 'ogg', 'pipe:1',
+            ],
+            input=data,
+            capture_output=True,
+            timeout=settings.AI_AUDIO_TRANSCODE_TIMEOUT_SECONDS,
+            check=True,
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        # e.g. an m4a with its index at the end cannot be read from a pipe
+        logger.warning(f"Audio transcode failed, keeping original {filename}: {e}")
+        return data, filename, content_type
+
+    if not result.stdout or len(result.stdout) >= len(data):
+        return data, filename, content_type
+    logger.info(f"Transcoded {filename} to Opus: {len(data)} -> {len(result.stdout)} bytes")
+    return result.stdout, f"{os.path.splitext(filename)[0]}.ogg", 'audio/ogg'
+
+
+def prepare_upload(audio_file):
+    """Read an upload and compact it if large: (bytes, filename, content_type)."""
+    return compact(*read_upload(audio_file))
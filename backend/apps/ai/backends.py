@@ -0,0 +1,278 @@
+"""
+Speech and language backends behind AIService.
+
+Remote:
+- OpenAI Whisper and TTS for speech
+- Together AI (Llama 3.3 70B) and OpenAI (gpt-4o-mini) for replies and extraction
+
+Local, for offline or low-cost operation:
+- faster-whisper on CPU for speech-to-text (pip install faster-whisper)
+- any OpenAI-compatible chat server for the LLM, e.g. llama.cpp's llama-server
+  or Ollama running a small quantized model (AI_LOCAL_LLM_URL)
+- Piper for text-to-speech, encoded to MP3 with ffmpeg
+
+The LLM is chosen per route (a conversation type, 'sms', 'extraction' or
+'summary'), see AI_LLM_ROUTES. Local dependencies are loaded on first use.
+"""
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .services import RETRY_STATUSES, CircuitBreaker, _backoff_delay
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKENDS = ['together', 'openai', 'local']
+STT_BACKENDS = ['openai', 'local']
+TTS_BACKENDS = ['openai', 'local']
+
+
+class ChatBackend:
+    """
+    An OpenAI-compatible /chat/completions endpoint over a pooled session.
+    Connection errors, timeouts and 429/5xx answers are retried with
+    jittered backoff; the breaker trips if they keep failing.
+    """
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: Optional[str] = None,
+                 timeout=None, json_mode: bool = True):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout or (settings.AI_CONNECT_TIMEOUT, settings.AI_READ_TIMEOUT)
+        # Whether the server understands response_format={"type": "json_object"}
+        self.json_mode = json_mode
+        self.session = requests.Session()
+        self.session.mount(self.base_url.split('://')[0] + '://', HTTPAdapter(pool_maxsize=settings.AI_POOL_SIZE))
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        self.breaker = CircuitBreaker(name, settings.AI_BREAKER_THRESHOLD, settings.AI_BREAKER_RESET_SECONDS)
+
+    def _post(self, payload: Dict, stream: bool = False) -> requests.Response:
+        self.breaker.before_call()
+        for attempt in range(settings.AI_MAX_RETRIES + 1):
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/chat/completions",
+                    json={"model": self.model, **payload},
+                    timeout=self.timeout,
+                    stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                error = requests.HTTPError(f"{self.name} API error: {response.status_code} - {response.text[:200]}")
+                response.close()
+
+            if attempt < settings.AI_MAX_RETRIES:
+                time.sleep(_backoff_delay(attempt))
+
+        self.breaker.record_failure()
+        raise error
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500,
+                 json_output: bool = False) -> str:
+        """Full reply text for a chat."""
+        payload = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        if json_output and self.json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        try:
+            response = self._post(payload)
+        except requests.RequestException as e:
+            raise Exception(f"LLM generation failed: {str(e)}")
+
+        if response.status_code != 200:
+            raise Exception(f"{self.name} API error: {response.status_code} - {response.text}")
+        try:
+            return response.json()['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError) as e:
+            raise Exception(f"Invalid response from {self.name}: {str(e)}")
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 500) -> Iterator[str]:
+        """Reply text deltas as they arrive."""
+        try:
+            response = self._post({
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True,
+            }, stream=True)
+        except requests.RequestException as e:
+            raise Exception(f"LLM generation failed: {str(e)}")
+
+        with response:
+            if response.status_code != 200:
+                raise Exception(f"{self.name} API error: {response.status_code} - {response.text}")
+
+            # Server-sent events: one "data: {json}" line per chunk, ending with "data: [DONE]"
+            for line in response.iter_lines():
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                try:
+                    chunk = json.loads(data)
+                    delta = chunk['choices'][0].get('delta', {}).get('content')
+                except (ValueError, KeyError, IndexError) as e:
+                    raise Exception(f"Invalid response from {self.name}: {str(e)}")
+                if delta:
+                    yield delta
+
+
+class OpenAISpeech:
+    """OpenAI Whisper and TTS. The SDK keeps a pooled client and retries 429/5xx itself."""
+
+    def __init__(self, api_key: str):
+        from openai import OpenAI, Timeout
+
+        self.client = OpenAI(
+            api_key=api_key,
+            timeout=Timeout(settings.AI_READ_TIMEOUT, connect=settings.AI_CONNECT_TIMEOUT),
+            max_retries=settings.AI_MAX_RETRIES,
+        )
+        self.breaker = CircuitBreaker('OpenAI', settings.AI_BREAKER_THRESHOLD, settings.AI_BREAKER_RESET_SECONDS)
+        self.whisper_model = "whisper-1"
+        self.model = "tts-1"
+        self.voice = "nova"  # Warm, friendly female voice
+
+    def transcribe(self, audio: bytes, filename: str, content_type: str) -> str:
+        # bytes (not a stream) so SDK retries resend the same audio
+        response = self.breaker.call(
+            self.client.audio.transcriptions.create,
+            model=self.whisper_model,
+            file=(filename, audio, content_type),
+            language="en"
+        )
+        return response.text
+
+    def text_to_speech(self, text: str) -> bytes:
+        response = self.breaker.call(
+            self.client.audio.speech.create,
+            model=self.model,
+            voice=self.voice,
+            input=text
+        )
+        return response.content
+
+
+class LocalWhisper:
+    """faster-whisper on CPU. The model is loaded once, on the first transcription."""
+
+    def __init__(self, model_size: str, compute_type: str = 'int8', threads: int = 0):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.threads = threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from faster_whisper import WhisperModel
+
+                    self._model = WhisperModel(
+                        self.model_size, device='cpu', compute_type=self.compute_type, cpu_threads=self.threads
+                    )
+        return self._model
+
+    def transcribe(self, audio: bytes, filename: str = '', content_type: str = '') -> str:
+        # Decoded from memory (PyAV), so any container Whisper accepts works here too
+        segments, _ = self._load().transcribe(io.BytesIO(audio), language='en', beam_size=1, vad_filter=True)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+
+class PiperTTS:
+    """Piper voices on CPU, encoded to MP3 so stored audio matches the OpenAI backend."""
+
+    def __init__(self, model_path: str, binary: str = 'piper', ffmpeg: str = 'ffmpeg'):
+        if not model_path:
+            raise ValueError("AI_PIPER_MODEL is not set")
+        self.model_path = model_path
+        self.binary = binary
+        self.ffmpeg = ffmpeg
+        self.model = 'piper'
+        self.voice = os.path.splitext(os.path.basename(model_path))[0]
+        self.sample_rate = 22050
+        try:
+            with open(f"{model_path}.json") as f:
+                self.sample_rate = json.load(f)['audio']['sample_rate']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def text_to_speech(self, text: str) -> bytes:
+        timeout = settings.AI_TTS_TIMEOUT_SECONDS
+        pcm = subprocess.run(
+            [shutil.which(self.binary) or self.binary, '--model', self.model_path, '--output-raw'],
+            input=text.encode('utf-8'), capture_output=True, timeout=timeout, check=True,
+        ).stdout
+        return subprocess.run(
+            [shutil.which(self.ffmpeg) or self.ffmpeg, '-hide_banner', '-loglevel', 'error',
+             '-f', 's16le', '-ar', str(self.sample_rate), '-ac', '1', '-i', 'pipe:0',
+             '-c:a', 'libmp3lame', '-b:a', '48k', '-f', 'mp3', 'pipe:1'],
+            input=pcm, capture_output=True, timeout=timeout, check=True,
+        ).stdout
+
+
+def _require_key(name):
+    key = os.getenv(name)
+    if not key:
+        raise ValueError(f"{name} environment variable not set")
+    return key
+
+
+def build_llm(name: str) -> ChatBackend:
+    if name == 'together':
+        return ChatBackend('Together AI', "https://api.together.xyz/v1",
+                           "meta-llama/Llama-3.3-70B-Instruct-Turbo", _require_key('TOGETHER_API_KEY'),
+                           json_mode=False)
+    if name == 'openai':
+        return ChatBackend('OpenAI', "https://api.openai.com/v1", settings.AI_OPENAI_CHAT_MODEL,
+                           _require_key('OPENAI_API_KEY'))
+    if name == 'local':
+        # Small models on CPU are slow to first token; give them the longer local timeout
+        return ChatBackend('Local LLM', settings.AI_LOCAL_LLM_URL, settings.AI_LOCAL_LLM_MODEL,
+                           os.getenv('AI_LOCAL_LLM_API_KEY'),
+                           timeout=(settings.AI_CONNECT_TIMEOUT, settings.AI_LOCAL_LLM_TIMEOUT),
+                           json_mode=settings.AI_LOCAL_LLM_JSON_MODE)
+    raise ValueError(f"Unknown LLM backend '{name}' (choose from {', '.join(LLM_BACKENDS)})")
+
+
+def build_stt(name: str, openai_speech: Optional[OpenAISpeech] = None):
+    if name == 'openai':
+        return openai_speech or OpenAISpeech(_require_key('OPENAI_API_KEY'))
+    if name == 'local':
+        return LocalWhisper(settings.AI_LOCAL_WHISPER_MODEL, settings.AI_LOCAL_WHISPER_COMPUTE_TYPE,
+                            settings.AI_LOCAL_WHISPER_THREADS)
+    raise ValueError(f"Unknown speech-to-text backend '{name}' (choose from {', '.join(STT_BACKENDS)})")
+
+
+def build_tts(name: str, openai_speech: Optional[OpenAISpeech] = None):
+    if name == 'openai':
+        return openai_speech or OpenAISpeech(_require_key('OPENAI_API_KEY'))
+    if name == 'local':
+        return PiperTTS(settings.AI_PIPER_MODEL, settings.AI_PIPER_BINARY, settings.AI_AUDIO_FFMPEG)
+    raise ValueError(f"Unknown text-to-speech backend '{name}' (choose from {', '.join(TTS_BACKENDS)})")
+
+
+def build_speech(stt_name: str, tts_name: str):
+    """(speech-to-text backend, text-to-speech backend); one OpenAI client serves both."""
+    openai_speech = None
+    if 'openai' in (stt_name, tts_name):
+        openai_speech = OpenAISpeech(_require_key('OPENAI_API_KEY'))
+    return build_stt(stt_name, openai_speech), build_tts(tts_name, openai_speech)
@@ -0,0 +1,94 @@
+"""
+Token-budgeted prompt context for conversations.
+
+Every Message stores an approximate token count. Older messages are folded
+into Conversation.summary a few turns at a time, so a prompt is the summary
+followed by as many recent messages as fit in AI_CONTEXT_TOKEN_BUDGET.
+Prompt size stays flat however long a conversation runs.
+
+Folding takes a model call: pending_summary() picks the messages on the
+request thread, the summarization can run on a worker, and apply_summary()
+saves the result back on the request thread.
+"""
+from django.conf import settings
+
+from .models import Message
+
+# Tokens of per-message chat formatting on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text or '') + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+def _unsummarized(conversation):
+    messages = Message.objects.filter(conversation=conversation)
+    if conversation.summarized_until:
+        messages = messages.filter(created_at__gt=conversation.summarized_until)
+    return messages
+
+
+def build_context(conversation, budget=None):
+    """
+    Messages for the next prompt: the rolling summary (as a system message)
+    and then the newest messages that fit in the token budget, oldest first.
+    The newest message is always included.
+    """
+    budget = settings.AI_CONTEXT_TOKEN_BUDGET if budget is None else budget
+    summary = conversation.summary
+    if summary:
+        budget -= estimate_tokens(summary)
+
+    recent = []
+    used = 0
+    for role, content, tokens in (
+        _unsummarized(conversation).order_by('-created_at')
+        .values_list('role', 'content', 'token_count')[:settings.AI_CONTEXT_MAX_MESSAGES]
+    ):
+        tokens = tokens or estimate_tokens(content)
+        if recent and used + tokens > budget:
+            break
+        recent.append({'role': role, 'content': content})
+        used += tokens
+    recent.reverse()
+
+    if summary:
+        return [{'role': 'system', 'content': f"Summary of the conversation so far: {summary}"}] + recent
+    return recent
+
+
+def context_text(messages):
+    """Flatten built context into one string, e.g. for structured extraction."""
+    return '\n'.join(
+        message['content'] if message['role'] == 'system' else f"{message['role'].upper()}: {message['content']}"
+        for message in messages
+    )
+
+
+def pending_summary(conversation):
+    """
+    Messages to fold into the summary, oldest first, or None when it is not
+    time yet. Folding happens once AI_SUMMARY_EVERY_MESSAGES messages have
+    built up beyond the AI_SUMMARY_KEEP_MESSAGES newest ones.
+    """
+    keep = settings.AI_SUMMARY_KEEP_MESSAGES
+    every = settings.AI_SUMMARY_EVERY_MESSAGES
+    unsummarized = _unsummarized(conversation)
+    foldable = unsummarized.count() - keep
+    if foldable < every:
+        return None
+    # A long backlog (e.g. from before summaries existed) is caught up a chunk at a time
+    return list(
+        unsummarized.order_by('created_at').values('role', 'content', 'created_at')[:min(foldable, every * 2)]
+    )
+
+
+def apply_summary(conversation, summary, messages):
+    """Save a new summary that covers everything up to the last of messages."""
+    if not summary or not messages:
+        return
+    conversation.summary = summary
+    conversation.summarized_until = messages[-1]['created_at']
+    conversation.save(update_fields=['summary', 'summarized_until', 'updated_at'])
@@ -0,0 +1,202 @@
+"""
+Incremental structured-data extraction for the onboarding, add_child and
+birth flows.
+
+Each user turn is merged into Conversation.parsed_data as it arrives. Fields
+with an obvious shape (blood type, genotype, phone, weeks, weight...) are read
+locally; the model is only asked for fields that are still missing, and only
+sees the latest question and answer. Locally read CONFIRM_FIELDS are checked
+by the model too and dropped if it does not find them. The client is told
+which fields remain.
+"""
+import re
+
+from django.db import transaction
+
+from .services import DATA_SCHEMAS
+
+EXTRACTION_TYPES = ['onboarding', 'add_child', 'birth']
+
+# add_child covers both a pregnancy and a baby already born
+ADD_CHILD_SCHEMA = {
+    "status": "string - 'pregnant' if she is expecting, 'born' if the baby has arrived",
+    **{k: v for k, v in DATA_SCHEMAS['add_child_pregnant'].items() if k != 'status'},
+    **{k: v for k, v in DATA_SCHEMAS['add_child_born'].items() if k != 'status'},
+}
+
+BLOOD_TYPE = re.compile(r"\b(ab|a|b|o)\s*(\+|-|pos(?:itive)?\b|neg(?:ative)?\b|plus\b|minus\b)", re.IGNORECASE)
+# Case-sensitive: "as" and "ss" are words; lowercase only counts after "genotype"
+GENOTYPE = re.compile(r"\b(AA|AS|SS|AC|SC)\b")
+GENOTYPE_CUE = re.compile(r"\bgenotype\W*(?:is\s+|=\s*)?(aa|as|ss|ac|sc)\b", re.IGNORECASE)
+PHONE = re.compile(r"(?:\+?234|0)[789][01]\d{8}\b")
+WEEKS = re.compile(r"\b(\d{1,2})\s*weeks?\b", re.IGNORECASE)
+# Only with age context; "I'm 20 weeks" is not an age
+AGE = re.compile(
+    r"\baged?\s*:?\s*(\d{2})\b(?!\s*(?:weeks?|wks?|months?))|\b(\d{2})\s*(?:years?|yrs?|y/o)\b|\b(\d{2})\s+old\b",
+    re.IGNORECASE,
+)
+WEIGHT_KG = re.compile(r"\b(\d(?:\.\d{1,2})?)\s*(?:kg|kilos?|kilograms?)\b", re.IGNORECASE)
+GENDER = re.compile(r"\b(boy|girl|male|female)\b", re.IGNORECASE)
+DELIVERY = re.compile(r"\b(c-?section|caesarean|cesarean|natural|vaginal|assisted|vacuum|forceps)\b", re.IGNORECASE)
+
+GENDERS = {'boy': 'male', 'male': 'male', 'girl': 'female', 'female': 'female'}
+DELIVERY_TYPES = {'csection': 'c-section', 'caesarean': 'c-section', 'cesarean': 'c-section',
+                  'natural': 'natural', 'vaginal': 'natural',
+                  'assisted': 'assisted', 'vacuum': 'assisted', 'forceps': 'assisted'}
+
+# Fields extract_locally() can fill; anything else needs the model
+LOCAL_FIELDS = {'blood_type', 'genotype', 'emergency_contact_phone', 'weeks_at_registration',
+                'age', 'birth_weight_kg', 'gender', 'delivery_type'}
+
+# Locally read fields the model double-checks; a misread one would corrupt the mother's profile
+CONFIRM_FIELDS = {'blood_type', 'genotype', 'age'}
+
+# Replies that carry no data whatever was asked
+ACKNOWLEDGEMENTS = {'ok', 'okay', 'yes', 'yeah', 'no', 'nope', 'sure', 'thanks', 'thank you', 'alright', 'hmm',
+                    'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'}
+
+
+def schema_for(conversation_type):
+    if conversation_type == 'add_child':
+        return ADD_CHILD_SCHEMA
+    if conversation_type == 'birth':
+        return DATA_SCHEMAS['birth_record']
+    return DATA_SCHEMAS.get(conversation_type, {})
+
+
+def _filled(value):
+    return value not in (None, '', [], {})
+
+
+def required_fields(conversation_type, data):
+    """Fields a flow cannot finish without (the ones whose schema is not 'or null')."""
+    if conversation_type == 'add_child':
+        schema = DATA_SCHEMAS['add_child_born' if data.get('status') == 'born' else 'add_child_pregnant']
+    else:
+        schema = schema_for(conversation_type)
+    return [
+        field for field, description in schema.items()
+        if field != 'status' and 'or null' not in description and not description.startswith('array')
+    ]
+
+
+def missing_fields(conversation_type, data):
+    """Schema fields not filled in yet, for the client to show or ask about."""
+    fields = schema_for(conversation_type)
+    if conversation_type == 'add_child' and data.get('status'):
+        keep = DATA_SCHEMAS['add_child_born' if data['status'] == 'born' else 'add_child_pregnant']
+        fields = {k: v for k, v in fields.items() if k in keep}
+    return [field for field in fields if not _filled(data.get(field))]
+
+
+def is_ready(conversation_type, data):
+    """Enough is known to finish the flow: every required field and at least two in all."""
+    return (
+        all(_filled(data.get(field)) for field in required_fields(conversation_type, data))
+        and len([v for v in data.values() if _filled(v)]) >= 2
+    )
+
+
+def extract_locally(conversation_type, text, wanted):
+    """Fields from wanted that can be read straight off the message."""
+    found = {}
+    # Short replies are answers to the question just asked; longer ones must say what they are about
+    short = len(text.split()) <= 4
+    if 'blood_type' in wanted and (short or re.search(r"blood|group|type", text, re.IGNORECASE)):
+        match = BLOOD_TYPE.search(text)
+        if match:
+            sign = '+' if match.group(2).lower()[0] in '+pl' else '-'
+            found['blood_type'] = match.group(1).upper() + sign
+    if 'genotype' in wanted:
+        match = GENOTYPE.search(text) or GENOTYPE_CUE.search(text)
+        if match:
+            found['genotype'] = match.group(1).upper()
+    if 'emergency_contact_phone' in wanted:
+        match = PHONE.search(text.replace(' ', ''))
+        if match:
+            found['emergency_contact_phone'] = match.group(0)
+    if 'weeks_at_registration' in wanted:
+        match = WEEKS.search(text)
+        if match and 1 <= int(match.group(1)) <= 42:
+            found['weeks_at_registration'] = int(match.group(1))
+            found.setdefault('status', 'pregnant')
+    if 'age' in wanted:
+        match = AGE.search(text)
+        age = int(next(group for group in match.groups() if group)) if match else None
+        if age and 13 <= age <= 60:
+            found['age'] = age
+    if 'birth_weight_kg' in wanted:
+        match = WEIGHT_KG.search(text)
+        if match:
+            found['birth_weight_kg'] = float(match.group(1))
+    if 'gender' in wanted:
+        match = GENDER.search(text)
+        if match:
+            found['gender'] = GENDERS[match.group(1).lower()]
+    if 'delivery_type' in wanted:
+        match = DELIVERY.search(text)
+        if match:
+            found['delivery_type'] = DELIVERY_TYPES[match.group(1).lower().replace('-', '')]
+    return {k: v for k, v in found.items() if k in wanted or k == 'status'}
+
+
+def needs_model(text, missing, found_locally=None):
+    """Whether a model call could still fill something from this message."""
+    if text.strip().lower().rstrip('.!') in ACKNOWLEDGEMENTS:
+        return False
+    if found_locally and set(found_locally) & CONFIRM_FIELDS:
+        return True
+    if found_locally and len(text.split()) <= 3:
+        # A short answer that was already read locally has nothing more in it
+        return False
+    if not found_locally:
+        # Nothing had a shape we could read ("I'm twenty-eight"); the model may still find it
+        return bool(missing)
+    return bool(set(missing) - LOCAL_FIELDS)
+
+
+def extract_with_model(ai_service, conversation_type, text, missing, question=''):
+    """Ask the model for just the missing fields, from the latest exchange only."""
+    schema = schema_for(conversation_type)
+    exchange = f"ASSISTANT: {question}\nUSER: {text}" if question else text
+    return ai_service.parse_structured_data(
+        exchange,
+        {field: schema[field] for field in missing},
+        f"Extract only what the user says in this {conversation_type} exchange"
+    )
+
+
+def merge(data, extracted, schema):
+    """New non-empty values for schema fields win; nothing filled is ever cleared."""
+    merged = dict(data)
+    for field, value in (extracted or {}).items():
+        if field in schema and _filled(value):
+            if isinstance(value, list) and isinstance(merged.get(field), list):
+                value = list(dict.fromkeys(merged[field] + value))
+            merged[field] = value
+    return merged
+
+
+def merge_into_conversation(conversation, extracted, confirm=None):
+    """
+    Merge extracted fields into conversation.parsed_data. The row is locked
+    so a background extraction and the request thread never drop each
+    other's fields. confirm maps locally read fields the model was asked
+    to check to their values; one the model's answer leaves out is removed
+    unless it has changed since.
+    """
+    if not extracted and not confirm:
+        return
+    from .models import Conversation
+
+    with transaction.atomic():
+        locked = Conversation.objects.select_for_update().get(id=conversation.id)
+        merged = merge(locked.parsed_data or {}, extracted, schema_for(locked.conversation_type))
+        # No answer (failure, timeout, unparsable reply) is not a denial
+        for field, value in (confirm or {}).items() if extracted else ():
+            if not _filled(extracted.get(field)) and merged.get(field) == value:
+                del merged[field]
+        if merged != locked.parsed_data:
+            locked.parsed_data = merged
+            locked.save(update_fields=['parsed_data', 'updated_at'])
+    conversation.parsed_data = merged
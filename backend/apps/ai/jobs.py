@@ -0,0 +1,165 @@
+"""
+Lightweight DB-backed job queue for AI side work.
+Views enqueue jobs and return right away; the run_ai_jobs worker claims
+them by priority (critical reports first) and retries failures with backoff.
+A dedup key keeps at most one queued or running job per piece of work.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CRITICAL = 0
+PRIORITY_URGENT = 10
+PRIORITY_HIGH = 30
+PRIORITY_DEFAULT = 50
+PRIORITY_LOW = 80
+
+# Report priority by urgency level
+URGENCY_PRIORITY = {
+    'critical': PRIORITY_CRITICAL,
+    'urgent': PRIORITY_URGENT,
+    'moderate': PRIORITY_DEFAULT,
+    'normal': PRIORITY_DEFAULT,
+}
+
+ACTIVE_STATUSES = ['QUEUED', 'RUNNING']
+
+# task name -> handler(payload, blob); filled in by tasks.py
+HANDLERS = {}
+
+
+def handler(task):
+    """Register a function as the handler for a task name."""
+    def register(func):
+        HANDLERS[task] = func
+        return func
+    return register
+
+
+def enqueue(task, payload=None, priority=PRIORITY_DEFAULT, dedup_key=None, blob=None, max_attempts=3):
+    """
+    Queue a job and return it. With a dedup_key, an already active job with
+    the same key is returned instead (moved up if this one is more urgent).
+    """
+    if dedup_key:
+        existing = BackgroundJob.objects.filter(dedup_key=dedup_key, status__in=ACTIVE_STATUSES).first()
+        if existing:
+            if priority < existing.priority:
+                BackgroundJob.objects.filter(id=existing.id, status='QUEUED').update(priority=priority)
+            return existing
+
+    try:
+        with transaction.atomic():
+            job = BackgroundJob.objects.create(
+                task=task,
+                payload=payload or {},
+                blob=blob,
+                priority=priority,
+                dedup_key=dedup_key,
+                max_attempts=max_attempts,
+            )
+    except IntegrityError:
+        # Another request queued the same work a moment ago
+        return BackgroundJob.objects.filter(dedup_key=dedup_key, status__in=ACTIVE_STATUSES).first()
+
+    if settings.AI_JOBS_EAGER:
+        transaction.on_commit(lambda: JobWorker().run_job(job, claimed=False))
+    return job
+
+
+class JobWorker:
+    """Claims due jobs in priority order and runs their handlers."""
+
+    def __init__(self, batch_size=10, stale_seconds=None, backoff_seconds=None, tasks=None):
+        self.batch_size = batch_size
+        self.stale_seconds = settings.AI_JOBS_STALE_SECONDS if stale_seconds is None else stale_seconds
+        self.backoff_seconds = settings.AI_JOBS_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.tasks = tasks
+        # Importing registers the handlers
+        from . import tasks as _tasks  # noqa: F401
+
+    def run_once(self):
+        """Run one batch. Returns (succeeded, failed)."""
+        self.requeue_stale()
+        succeeded = failed = 0
+        for job in self.claim():
+            if self.run_job(job):
+                succeeded += 1
+            else:
+                failed += 1
+        return succeeded, failed
+
+    def requeue_stale(self):
+        """Jobs left RUNNING by a worker that died go back on the queue."""
+        cutoff = timezone.now() - timedelta(seconds=self.stale_seconds)
+        stale = BackgroundJob.objects.filter(status='RUNNING', started_at__lt=cutoff)
+        count = stale.update(status='QUEUED', last_error='Requeued after worker timeout')
+        if count:
+            logger.warning(f"Requeued {count} stale background jobs")
+        return count
+
+    def claim(self):
+        """
+        Mark the next batch of due jobs RUNNING and return them, most urgent
+        first. skip_locked does nothing on SQLite, so the update only takes
+        jobs still QUEUED and stamps them with this claim's token; a job
+        another worker took first is not returned.
+        """
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        with transaction.atomic():
+            due = BackgroundJob.objects.filter(status='QUEUED', run_after__lte=now)
+            if self.tasks:
+                due = due.filter(task__in=self.tasks)
+            ids = list(
+                due.select_for_update(skip_locked=True).order_by('priority', 'id')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            BackgroundJob.objects.filter(id__in=ids, status='QUEUED').update(
+                status='RUNNING', started_at=now, attempts=F('attempts') + 1, claim_token=token
+            )
+        return list(BackgroundJob.objects.filter(claim_token=token, status='RUNNING').order_by('priority', 'id'))
+
+    def run_job(self, job, claimed=True):
+        """Run one job's handler and record the outcome. Returns True on success."""
+        if not claimed:
+            # Eager mode: take the job only if no worker has it yet
+            taken = BackgroundJob.objects.filter(id=job.id, status='QUEUED').update(
+                status='RUNNING', started_at=timezone.now(), attempts=F('attempts') + 1
+            )
+            if not taken:
+                return False
+            job.refresh_from_db()
+
+        try:
+            func = HANDLERS.get(job.task)
+            if func is None:
+                raise ValueError(f"No handler registered for task '{job.task}'")
+            func(job.payload, bytes(job.blob) if job.blob is not None else None)
+        except Exception as e:
+            logger.error(f"Background job {job.task} #{job.id} failed (attempt {job.attempts}): {e}")
+            job.last_error = str(e)[:2000]
+            if job.attempts >= job.max_attempts:
+                job.status = 'FAILED'
+                job.finished_at = timezone.now()
+            else:
+                job.status = 'QUEUED'
+                job.run_after = timezone.now() + timedelta(seconds=self.backoff_seconds * 2 ** (job.attempts - 1))
+            job.save(update_fields=['status', 'last_error', 'finished_at', 'run_after'])
+            return False
+
+        job.status = 'DONE'
+        job.finished_at = timezone.now()
+        # The binary payload is no longer needed once it has been handled
+        job.blob = None
+        job.save(update_fields=['status', 'finished_at', 'blob'])
+        return True
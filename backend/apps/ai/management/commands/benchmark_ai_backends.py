@@ -0,0 +1,186 @@
+"""
+Compare latency and throughput of the AI backends
+Usage: python manage.py benchmark_ai_backends --llm together,local [--stt openai,local --audio note.webm] [--tts openai,local]
+Calls are real: remote backends are billed and local ones must be running.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai.audio import MIME_TYPES
+from apps.ai.backends import build_llm, build_stt, build_tts
+from apps.ai.services import DATA_SCHEMAS
+
+SYSTEM_PROMPT = (
+    "You are Bloom, a maternal health assistant for Nigerian mothers. "
+    "Answer in two or three short, warm sentences."
+)
+
+QUESTIONS = [
+    "Is it safe to eat pepper soup while pregnant?",
+    "My feet are a bit swollen in the evening, is that normal at 30 weeks?",
+    "How much water should I drink every day?",
+    "When should I start feeling the baby move?",
+    "Can I still sleep on my back?",
+]
+
+EXTRACTION_SAMPLES = [
+    "ASSISTANT: Who should we call in an emergency?\nUSER: My husband Chidi, his number is 08031234567",
+    "ASSISTANT: Where do you live and do you have any health conditions?\nUSER: I live in Ibadan, I have asthma",
+    "ASSISTANT: Do you know your blood group and genotype?\nUSER: O positive and AS",
+]
+
+SPEECH_SAMPLES = [
+    "Hello Mama! I'm so happy you're here.",
+    "Drink plenty of water and rest with your feet up this evening.",
+    "Please go to the nearest hospital or call your doctor now.",
+]
+
+
+def _parse_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark LLM, speech-to-text and text-to-speech backends (latency percentiles and throughput)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--llm',
+            default='',
+            help='Comma-separated LLM backends to compare (together, openai, local)',
+        )
+        parser.add_argument(
+            '--stt',
+            default='',
+            help='Comma-separated speech-to-text backends (openai, local); needs --audio',
+        )
+        parser.add_argument(
+            '--tts',
+            default='',
+            help='Comma-separated text-to-speech backends (openai, local)',
+        )
+        parser.add_argument(
+            '--audio',
+            default=None,
+            help='Voice note used for the speech-to-text runs',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=10,
+            help='Calls per backend and workload (default: 10)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Calls in flight at once (default: 1)',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=1,
+            help='Untimed calls first, e.g. to load local models (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        llms = _parse_names(options['llm'])
+        stts = _parse_names(options['stt'])
+        ttss = _parse_names(options['tts'])
+        if not (llms or stts or ttss):
+            raise CommandError('Choose at least one backend with --llm, --stt or --tts')
+        if stts and not options['audio']:
+            raise CommandError('--stt needs --audio')
+
+        self.runs = options['runs']
+        self.concurrency = options['concurrency']
+        self.warmup = options['warmup']
+
+        self.stdout.write(
+            f"{'workload':<12}{'backend':<10}{'ok':>7}{'p50 s':>9}{'p95 s':>9}{'mean s':>9}{'calls/s':>9}{'chars/s':>9}"
+        )
+
+        for name in llms:
+            backend = self._build(build_llm, name)
+            if backend is None:
+                continue
+            self._run('reply', name, lambda question: backend.complete(
+                [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": question}],
+                temperature=0.7, max_tokens=150,
+            ), QUESTIONS)
+            schema = DATA_SCHEMAS['onboarding']
+            self._run('extraction', name, lambda text: backend.complete(
+                [
+                    {"role": "system", "content": "Extract structured data from text and return only valid JSON."},
+                    {"role": "user", "content": f"Schema: {schema}\n\nText:\n{text}"},
+                ],
+                temperature=0.1, max_tokens=300, json_output=True,
+            ), EXTRACTION_SAMPLES)
+
+        if stts:
+            path = options['audio']
+            with open(path, 'rb') as f:
+                audio = f.read()
+            filename = path.rsplit('/', 1)[-1]
+            extension = '.' + filename.rsplit('.', 1)[-1].lower() if '.' in filename else '.webm'
+            content_type = MIME_TYPES.get(extension, 'audio/webm')
+            for name in stts:
+                backend = self._build(build_stt, name)
+                if backend is not None:
+                    self._run('stt', name, lambda data: backend.transcribe(data, filename, content_type), [audio])
+
+        for name in ttss:
+            backend = self._build(build_tts, name)
+            if backend is not None:
+                self._run('tts', name, backend.text_to_speech, SPEECH_SAMPLES)
+
+    def _build(self, builder, name):
+        try:
+            return builder(name)
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'{name}: {e}'))
+            return None
+
+    def _run(self, workload, name, call, inputs):
+        for item in inputs[:self.warmup]:
+            try:
+                call(item)
+            except Exception as e:
+                self.stderr.write(self.style.WARNING(f'{workload}/{name} warmup failed: {e}'))
+
+        def timed(item):
+            start = time.perf_counter()
+            result = call(item)
+            return time.perf_counter() - start, len(result) if isinstance(result, (str, bytes)) else 0
+
+        latencies, output_chars, errors = [], 0, []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(timed, inputs[i % len(inputs)]) for i in range(self.runs)]
+            for future in futures:
+                try:
+                    latency, size = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append(latency)
+                output_chars += size
+        wall = time.perf_counter() - started
+
+        if not latencies:
+            self.stdout.write(f"{workload:<12}{name:<10}{0:>4}/{self.runs:<2}  all calls failed: {errors[0]}")
+            return
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+        # chars/s only means something for text output
+        rate = f"{output_chars / sum(latencies):>9.0f}" if workload != 'tts' else f"{'-':>9}"
+        self.stdout.write(
+            f"{workload:<12}{name:<10}{len(latencies):>4}/{self.runs:<2}"
+            f"{statistics.median(latencies):>9.2f}{p95:>9.2f}{statistics.mean(latencies):>9.2f}"
+            f"{len(latencies) / wall:>9.2f}{rate}"
+        )
+        if errors:
+            self.stderr.write(self.style.WARNING(f'{workload}/{name}: {len(errors)} failed, e.g. {errors[0]}'))
@@ -0,0 +1,56 @@
+"""
+Run queued AI background jobs (health reports, passport logging, audio, extraction, summaries)
+Usage: python manage.py run_ai_jobs [--once]
+Several workers can run side by side; jobs are claimed with SKIP LOCKED.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.ai.jobs import JobWorker
+
+
+class Command(BaseCommand):
+    help = 'Run the AI job worker: claims queued jobs by priority, runs them and retries failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process one batch and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep between idle rounds (default: 1)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Maximum jobs claimed per round (default: 10)',
+        )
+        parser.add_argument(
+            '--task',
+            action='append',
+            dest='tasks',
+            default=None,
+            help='Only run jobs of this task (repeatable; default: all)',
+        )
+
+    def handle(self, *args, **options):
+        worker = JobWorker(batch_size=options['batch_size'], tasks=options['tasks'])
+
+        while True:
+            try:
+                succeeded, failed = worker.run_once()
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Job round failed: {e}'))
+                succeeded = failed = 0
+
+            if succeeded or failed:
+                self.stdout.write(f'Ran {succeeded} jobs, {failed} failed')
+
+            if options['once']:
+                break
+            if not (succeeded or failed):
+                time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_allow_null_json_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TTSCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='sha256 of model, voice and normalized text', max_length=64, unique=True)),
+                ('text', models.TextField()),
+                ('voice', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=50)),
+                ('audio_path', models.CharField(max_length=255)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'TTS cache entry',
+                'verbose_name_plural': 'TTS cache entries',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0003_tts_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='summarized_until',
+            field=models.DateTimeField(blank=True, help_text='created_at of the newest message covered by the summary', null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='token_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
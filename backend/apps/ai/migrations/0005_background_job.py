@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(choices=[('health_report', 'Health report from a reply'), ('triage_report', 'Health report from triage'), ('passport_event', 'Log report to Life Passport'), ('save_audio', 'Save uploaded audio'), ('extract_turn', 'Extract data from a turn'), ('summarize', 'Fold conversation summary')], max_length=30)),
+                ('payload', models.JSONField(default=dict)),
+                ('blob', models.BinaryField(blank=True, help_text='Binary payload, e.g. uploaded audio', null=True)),
+                ('priority', models.PositiveSmallIntegerField(default=50)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=10)),
+                ('dedup_key', models.CharField(blank=True, max_length=150, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['priority', 'id'],
+                'indexes': [models.Index(fields=['status', 'priority', 'run_after'], name='ai_backgrou_status_395b19_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['QUEUED', 'RUNNING'])), fields=('dedup_key',), name='unique_active_job_dedup_key')],
+            },
+        ),
+    ]
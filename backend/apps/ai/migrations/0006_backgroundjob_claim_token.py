@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_background_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
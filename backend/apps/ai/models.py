@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Conversation(models.Model):
@@ -42,6 +43,13 @@ class Conversation(models.Model):
     # Parsed data extracted from conversation
     parsed_data = models.JSONField(default=dict, blank=True)
 
+    # Rolling summary of older messages, folded in a few turns at a time
+    summary = models.TextField(blank=True, default='')
+    summarized_until = models.DateTimeField(
+        null=True, blank=True,
+        help_text='created_at of the newest message covered by the summary'
+    )
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -103,11 +111,19 @@ class Message(models.Model):
     detected_symptoms = models.JSONField(default=list, blank=True, null=True)
     is_complaint = models.BooleanField(default=False)
 
+    # Approximate prompt tokens, for budgeting context
+    token_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
 
+    def save(self, *args, **kwargs):
+        from .context import estimate_tokens
+        self.token_count = estimate_tokens(self.content)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         preview = self.content[:50] + '...' if len(self.content) > 50 else self.content
         return f"{self.role}: {preview}"
@@ -152,3 +168,94 @@ class AIKnowledgeBase(models.Model):
 
     def __str__(self):
         return f"{self.get_stage_type_display()} Week {self.week}: {self.theme}"
+
+
+class TTSCacheEntry(models.Model):
+    """
+    Synthesized speech stored once per (text, voice, model).
+    Greetings and fallback replies repeat constantly, so they are voiced once
+    and every later message points at the same file.
+    """
+
+    key = models.CharField(max_length=64, unique=True, help_text="sha256 of model, voice and normalized text")
+    text = models.TextField()
+    voice = models.CharField(max_length=50)
+    model = models.CharField(max_length=50)
+
+    audio_path = models.CharField(max_length=255)
+    size_bytes = models.PositiveIntegerField(default=0)
+
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = 'TTS cache entry'
+        verbose_name_plural = 'TTS cache entries'
+
+    def __str__(self):
+        preview = self.text[:50] + '...' if len(self.text) > 50 else self.text
+        return f"{self.voice}/{self.model}: {preview}"
+
+
+class BackgroundJob(models.Model):
+    """
+    Work that does not have to finish before a reply is sent: health reports,
+    passport logging, audio persistence, data extraction and summaries.
+    Views enqueue jobs and return; the run_ai_jobs worker runs them by
+    priority (lowest first), retrying failures with backoff.
+    """
+    TASK_CHOICES = [
+        ('health_report', 'Health report from a reply'),
+        ('triage_report', 'Health report from triage'),
+        ('passport_event', 'Log report to Life Passport'),
+        ('save_audio', 'Save uploaded audio'),
+        ('extract_turn', 'Extract data from a turn'),
+        ('summarize', 'Fold conversation summary'),
+    ]
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=30, choices=TASK_CHOICES)
+    payload = models.JSONField(default=dict)
+    blob = models.BinaryField(null=True, blank=True, help_text="Binary payload, e.g. uploaded audio")
+
+    # 0 runs first; critical reports are queued at 0
+    priority = models.PositiveSmallIntegerField(default=50)
+    status = models.CharField(max_length=10, default='QUEUED', choices=STATUS_CHOICES)
+
+    # Only one queued or running job per key
+    dedup_key = models.CharField(max_length=150, null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Set by the worker that claimed the job, so workers only run the jobs they moved to RUNNING
+    claim_token = models.CharField(max_length=32, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['priority', 'id']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_after']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=['QUEUED', 'RUNNING']),
+                name='unique_active_job_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} - {self.status}"
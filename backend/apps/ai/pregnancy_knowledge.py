@@ -1,4 +1,5 @@
 # Week-by-week pregnancy knowledge for AI context
+import re
 
 PREGNANCY_WEEKS = {
     1: {
@@ -298,18 +299,61 @@ PREGNANCY_WEEKS = {
 }
 
 
-def get_week_knowledge(week):
-    """Get knowledge for specific week, or closest available."""
-    if week in PREGNANCY_WEEKS:
-        return PREGNANCY_WEEKS[week]
+class PhraseMatcher:
+    """
+    Case-insensitive phrase matching with the same rule as a bidirectional
+    substring test: a symptom matches when it contains a phrase or is
+    contained in one. Phrases are lowercased and compiled once.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = sorted({p.lower() for p in phrases}, key=len, reverse=True)
+        # Symptom inside a phrase: one substring search over all phrases
+        self._joined = '\0'.join(self.phrases)
+        # Phrase inside a symptom: one regex alternation
+        self._pattern = re.compile('|'.join(map(re.escape, self.phrases))) if self.phrases else None
+
+    def matches(self, symptom):
+        if not self.phrases:
+            return False
+        symptom_lower = symptom.lower()
+        return symptom_lower in self._joined or bool(self._pattern.search(symptom_lower))
+
+    def find(self, text):
+        """Phrases that appear in text."""
+        if not self._pattern:
+            return []
+        return list(dict.fromkeys(self._pattern.findall(text.lower())))
+
+    def finditer(self, text):
+        """Match objects for the phrases in already lowercased text, so callers can check context."""
+        return self._pattern.finditer(text) if self._pattern else iter(())
+
+
+# Dense index built at import: WEEK_KNOWLEDGE[w] for every week 1-42, weeks
+# without their own entry taking the closest one (the earlier on a tie)
+_DEFINED_WEEKS = sorted(PREGNANCY_WEEKS)
+WEEK_KNOWLEDGE = [None] + [
+    PREGNANCY_WEEKS[min(_DEFINED_WEEKS, key=lambda x: abs(x - week))]
+    for week in range(1, 43)
+]
+NORMAL_MATCHERS = [None] + [
+    PhraseMatcher(k['common_symptoms'] + k['normal_experiences']) for k in WEEK_KNOWLEDGE[1:]
+]
+DANGER_MATCHERS = [None] + [PhraseMatcher(k['danger_signs']) for k in WEEK_KNOWLEDGE[1:]]
+# Danger signs from every week, for when the week is not known
+ANY_WEEK_DANGER_MATCHER = PhraseMatcher(
+    [sign for k in PREGNANCY_WEEKS.values() for sign in k['danger_signs']]
+)
 
-    # Clamp to valid range
-    week = max(1, min(42, week))
 
-    # Find closest week
-    available = sorted(PREGNANCY_WEEKS.keys())
-    closest = min(available, key=lambda x: abs(x - week))
-    return PREGNANCY_WEEKS[closest]
+def _week_index(week):
+    return max(1, min(42, int(week)))
+
+
+def get_week_knowledge(week):
+    """Get knowledge for specific week, or closest available."""
+    return WEEK_KNOWLEDGE[_week_index(week)]
 
 
 def get_trimester(week):
@@ -323,29 +367,25 @@ def get_trimester(week):
 
 def is_symptom_normal(symptom, week):
     """Check if a symptom is normal for the given week."""
-    knowledge = get_week_knowledge(week)
-    symptom_lower = symptom.lower()
-
-    # Check in common symptoms
-    for s in knowledge['common_symptoms']:
-        if symptom_lower in s.lower() or s.lower() in symptom_lower:
-            return True
-
-    # Check in normal experiences
-    for e in knowledge['normal_experiences']:
-        if symptom_lower in e.lower() or e.lower() in symptom_lower:
-            return True
-
-    return False
+    return NORMAL_MATCHERS[_week_index(week)].matches(symptom)
 
 
 def is_danger_sign(symptom, week):
-    """Check if a symptom is a danger sign for the given week."""
-    knowledge = get_week_knowledge(week)
-    symptom_lower = symptom.lower()
+    """Check if a symptom is a danger sign for the given week (any week if None)."""
+    if week is None:
+        return ANY_WEEK_DANGER_MATCHER.matches(symptom)
+    return DANGER_MATCHERS[_week_index(week)].matches(symptom)
 
-    for d in knowledge['danger_signs']:
-        if symptom_lower in d.lower() or d.lower() in symptom_lower:
-            return True
 
-    return False
+def classify_symptoms(symptoms, week):
+    """
+    Classify many symptoms for one week in a single pass.
+    Returns 'danger', 'normal' or 'unknown' for each symptom, in order;
+    a symptom matching both lists counts as a danger sign.
+    """
+    index = _week_index(week)
+    danger, normal = DANGER_MATCHERS[index], NORMAL_MATCHERS[index]
+    return [
+        'danger' if danger.matches(symptom) else 'normal' if normal.matches(symptom) else 'unknown'
+        for symptom in symptoms
+    ]
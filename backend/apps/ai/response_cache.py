@@ -0,0 +1,234 @@
+"""
+Shared cache for LLM replies to common questions.
+
+Replies are scoped by (conversation type, stage bucket) and keyed by the
+normalized question, so mothers at the same point in pregnancy who ask the
+same thing share one answer. Near-duplicate wording is matched with MinHash
+signatures over word shingles, indexed by LSH bands, and accepted when the
+estimated Jaccard similarity reaches AI_RESPONSE_CACHE_SIMILARITY.
+
+Only types listed in AI_RESPONSE_CACHE_TTLS are cached, each with its own TTL.
+A reply meant for the cache is generated from the question and the stage
+alone (shared_context()), never from one mother's history or profile.
+Questions that mention a danger sign always go to the model.
+Entries live in the Django cache, so they are shared across workers when a
+shared backend (Redis, Memcached) is configured.
+"""
+import hashlib
+import logging
+import random
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .pregnancy_knowledge import PREGNANCY_WEEKS, is_danger_sign
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_BUCKET_SIZE = 8
+_PRIME = (1 << 61) - 1
+
+_rng = random.Random(1303)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'am', 'be', 'it', 'its', 'i', 'im', 'my', 'me',
+    'to', 'of', 'in', 'on', 'at', 'for', 'and', 'or', 'do', 'does', 'can', 'could',
+    'should', 'would', 'will', 'this', 'that', 'please', 'pls', 'so', 'about', 'with',
+})
+
+# Generic words in danger-sign phrases that are not worrying on their own
+_GENERIC_DANGER_WORDS = frozenset({
+    'severe', 'heavy', 'signs', 'decreased', 'decrease', 'regular', 'painful', 'high',
+    'less', 'than', 'hours', 'week', 'weeks', 'before', 'every', 'felt', 'that', 'won',
+    'away', 'with', 'from', 'face', 'hands', 'water', 'breaking', 'abdominal', 'back',
+    'fetal', 'any', 'min', 'changes', 'problems', 'kicks', 'down', 'keep', 'unable', 'sudden',
+})
+
+# Personal names swapped out of stored replies, and what fills them when none is known
+PLACEHOLDERS = {'mother_name': 'Mama', 'child_name': 'your baby'}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(text):
+    """Lowercase, strip punctuation, filler words and plural endings."""
+    words = _WORD_RE.findall(text.lower().replace("'", ''))
+    return ' '.join(
+        w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss') else w
+        for w in words if w not in STOP_WORDS
+    )
+
+
+def _danger_keywords():
+    words = set()
+    for knowledge in PREGNANCY_WEEKS.values():
+        for sign in knowledge['danger_signs']:
+            words.update(w for w in _WORD_RE.findall(sign.lower()) if len(w) > 3)
+    return frozenset(words - _GENERIC_DANGER_WORDS)
+
+
+DANGER_KEYWORDS = _danger_keywords()
+
+
+def mentions_danger_sign(question, week=None):
+    """
+    True when the question touches a danger sign: a full phrase from
+    is_danger_sign (for the given week, or any week when unknown) or one of
+    the key words those phrases are built from.
+    """
+    if is_danger_sign(question, week or None):
+        return True
+    text = question.lower()
+    return any(keyword in text for keyword in DANGER_KEYWORDS)
+
+
+def stage_bucket(stage_type=None, week=None):
+    """Cache scope for a stage: pregnancy weeks and baby months are grouped."""
+    if stage_type == 'pregnancy' and week:
+        size = settings.AI_RESPONSE_CACHE_WEEK_BUCKET
+        return f"w{(int(week) - 1) // size * size + 1}"
+    if stage_type == 'baby' and week is not None:
+        return f"m{int(week)}"
+    return 'any'
+
+
+def shared_context(context):
+    """Prompt context for a reply other mothers may be served: the stage, with placeholder names."""
+    return {**{k: v for k, v in context.items() if k not in PLACEHOLDERS}, **PLACEHOLDERS}
+
+
+def _shingles(normalized):
+    words = normalized.split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(normalized):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in _shingles(normalized)
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class ResponseCache:
+    """Reply lookups and writes; hit and miss counts are kept per process."""
+
+    hits = 0
+    near_hits = 0
+    misses = 0
+    bypassed = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def ttl(conversation_type):
+        return settings.AI_RESPONSE_CACHE_TTLS.get(conversation_type, 0)
+
+    @classmethod
+    def cacheable(cls, conversation_type, question, week=None):
+        """Whether this question may be answered from, and stored in, the cache."""
+        if not cls.ttl(conversation_type):
+            return False
+        normalized = normalize_question(question)
+        if not normalized or len(normalized.split()) < settings.AI_RESPONSE_CACHE_MIN_WORDS:
+            # Short follow-ups ("is that normal?") depend on the conversation so far
+            return False
+        if mentions_danger_sign(question, week):
+            with cls._lock:
+                cls.bypassed += 1
+            return False
+        return True
+
+    @staticmethod
+    def _entry_key(scope, normalized):
+        return f"ai:reply:{scope}:e:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _band_keys(scope, signature):
+        return [
+            f"ai:reply:{scope}:b{band}:{hashlib.sha1(repr(signature[band * ROWS:(band + 1) * ROWS]).encode()).hexdigest()[:16]}"
+            for band in range(BANDS)
+        ]
+
+    @classmethod
+    def get(cls, conversation_type, bucket, question, names=None):
+        """Cached reply for this question (or a near duplicate), or None."""
+        scope = f"{conversation_type}:{bucket}"
+        normalized = normalize_question(question)
+
+        entry = cache.get(cls._entry_key(scope, normalized))
+        exact = entry is not None
+        if not exact:
+            signature = minhash(normalized)
+            candidates = set()
+            for bucket_ids in cache.get_many(cls._band_keys(scope, signature)).values():
+                candidates.update(bucket_ids)
+            best = 0
+            if candidates:
+                for candidate in cache.get_many(list(candidates)).values():
+                    score = _similarity(signature, candidate['signature'])
+                    if score > best:
+                        best, entry = score, candidate
+            if best < settings.AI_RESPONSE_CACHE_SIMILARITY:
+                entry = None
+
+        with cls._lock:
+            if entry is None:
+                cls.misses += 1
+            elif exact:
+                cls.hits += 1
+            else:
+                cls.near_hits += 1
+        if entry is None:
+            return None
+
+        reply = entry['reply']
+        for placeholder, default in PLACEHOLDERS.items():
+            reply = reply.replace('{%s}' % placeholder, (names or {}).get(placeholder) or default)
+        return reply
+
+    @classmethod
+    def set(cls, conversation_type, bucket, question, reply, names=None):
+        """
+        Store a reply. Personal names in it are swapped for placeholders so
+        the answer can be reused for other mothers.
+        """
+        ttl = cls.ttl(conversation_type)
+        if not ttl or not reply:
+            return
+        for placeholder in PLACEHOLDERS:
+            name = (names or {}).get(placeholder)
+            if name:
+                reply = re.sub(rf"\b{re.escape(name)}\b", '{%s}' % placeholder, reply)
+
+        scope = f"{conversation_type}:{bucket}"
+        normalized = normalize_question(question)
+        signature = minhash(normalized)
+        entry_key = cls._entry_key(scope, normalized)
+        cache.set(entry_key, {'question': normalized, 'reply': reply, 'signature': signature}, ttl)
+
+        band_keys = cls._band_keys(scope, signature)
+        buckets = cache.get_many(band_keys)
+        updates = {}
+        for band_key in band_keys:
+            ids = [i for i in buckets.get(band_key, []) if i != entry_key]
+            updates[band_key] = (ids + [entry_key])[-MAX_BUCKET_SIZE:]
+        cache.set_many(updates, ttl)
+
+    @classmethod
+    def stats(cls):
+        return {
+            'hits': cls.hits,
+            'near_hits': cls.near_hits,
+            'misses': cls.misses,
+            'bypassed': cls.bypassed,
+        }
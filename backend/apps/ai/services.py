@@ -1,73 +1,205 @@
 import os
+import re
 import json
-import tempfile
+import time
+import random
+import logging
+import threading
 import requests
-from typing import Optional, Dict, List, Any
-from openai import OpenAI
+from typing import Optional, Dict, List, Any, Iterator
+from django.conf import settings
+from django.db import transaction
+from openai import APIConnectionError, APIStatusError
+
+logger = logging.getLogger(__name__)
+
+# Upstream answers worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ProviderUnavailable(Exception):
+    """Raised without calling out while a provider's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails calls to a provider fast after repeated transient failures.
+
+    After `threshold` consecutive failures the breaker opens and every call
+    raises ProviderUnavailable. Once `reset_timeout` seconds have passed a
+    single trial call is let through; success closes the breaker again.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+        raise ProviderUnavailable(f"{self.name} is unavailable, retrying in up to {self.reset_timeout:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def call(self, func, *args, **kwargs):
+        """Run func under the breaker. Only transient upstream errors count as failures."""
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if _is_transient(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (APIConnectionError, requests.ConnectionError, requests.Timeout)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRY_STATUSES
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(settings.AI_RETRY_MAX_DELAY, settings.AI_RETRY_BASE_DELAY * 2 ** attempt))
 
 
 class AIService:
     """
     Service for handling AI interactions.
-    - OpenAI Whisper for Speech-to-Text
-    - Meta Llama 3.3 70B Turbo via Together AI for LLM responses
-    - OpenAI TTS for Text-to-Speech
+    - Speech-to-Text: OpenAI Whisper, or faster-whisper locally
+    - LLM: Meta Llama 3.3 70B Turbo via Together AI, OpenAI, or a local
+      OpenAI-compatible server, chosen per route (see AI_LLM_ROUTES)
+    - Text-to-Speech: OpenAI TTS, or Piper locally
+
+    Use AIService.get_instance(): one instance per process keeps its
+    keep-alive connections to every provider warm across requests.
+    AIService.get_instance(routes=('sms',)) only builds what those routes use.
     """
 
-    def __init__(self):
-        # OpenAI client for Whisper and TTS
-        openai_api_key = os.getenv('OPENAI_API_KEY')
-        if not openai_api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        self.openai_client = OpenAI(api_key=openai_api_key)
+    _instances = {}
+    _instance_lock = threading.Lock()
 
-        # Together AI for Llama 3.3
-        self.together_api_key = os.getenv('TOGETHER_API_KEY')
-        if not self.together_api_key:
-            raise ValueError("TOGETHER_API_KEY environment variable not set")
-        self.together_base_url = "https://api.together.xyz/v1"
+    @classmethod
+    def get_instance(cls, routes: Optional[tuple] = None) -> 'AIService':
+        """
+        Process-wide AIService, built on first use and shared by all threads.
+        With routes, an instance with only the LLM backends those routes (and
+        the fallback) use and no speech backends, so it needs no other keys.
+        """
+        key = tuple(routes) if routes else None
+        instance = cls._instances.get(key)
+        if instance is None:
+            with cls._instance_lock:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = cls._instances[key] = cls(key)
+        return instance
+
+    def __init__(self, routes: Optional[tuple] = None):
+        from .backends import build_llm, build_speech
+
+        # Every LLM backend a route (or the fallback) can reach is built up front,
+        # so a missing API key fails here as before
+        if routes:
+            names = {self.llm_name(route) for route in routes}
+        else:
+            names = {settings.AI_LLM_BACKEND, *settings.AI_LLM_ROUTES.values()}
+        if settings.AI_LLM_FALLBACK:
+            names.add(settings.AI_LLM_FALLBACK)
+        self.llm_backends = {name: build_llm(name) for name in names}
+
+        if routes:
+            self.stt = self.tts = None
+            self.chat_model = self.llm(routes[0]).model
+            self.tts_model = self.tts_voice = None
+            return
+
+        self.stt, self.tts = build_speech(settings.AI_STT_BACKEND, settings.AI_TTS_BACKEND)
 
         # Default model configurations
-        self.whisper_model = "whisper-1"
-        self.chat_model = "meta-llama/Llama-3.3-70B-Instruct-Turbo"  # Llama 3.3 70B Turbo
-        self.tts_model = "tts-1"
-        self.tts_voice = "nova"  # Warm, friendly female voice
+        self.chat_model = self.llm().model
+        self.tts_model = self.tts.model
+        self.tts_voice = self.tts.voice
+
+    def llm_name(self, route: Optional[str] = None) -> str:
+        """Backend name for a route (conversation type, 'sms', 'extraction', 'summary')."""
+        return settings.AI_LLM_ROUTES.get(route, settings.AI_LLM_BACKEND)
+
+    def llm(self, route: Optional[str] = None):
+        return self.llm_backends[self.llm_name(route)]
+
+    def _llm_chain(self, route: Optional[str]):
+        """The routed backend, then the fallback backend if one is set and different."""
+        primary = self.llm_name(route)
+        chain = [self.llm_backends[primary]]
+        if settings.AI_LLM_FALLBACK and settings.AI_LLM_FALLBACK != primary:
+            chain.append(self.llm_backends[settings.AI_LLM_FALLBACK])
+        return chain
+
+    def _complete(self, route: Optional[str], messages: List[Dict[str, str]], **kwargs) -> str:
+        chain = self._llm_chain(route)
+        for position, backend in enumerate(chain):
+            try:
+                return backend.complete(messages, **kwargs)
+            except Exception as e:
+                if position == len(chain) - 1:
+                    raise
+                logger.warning(f"{backend.name} failed, trying fallback: {e}")
 
-    def transcribe(self, audio_file) -> str:
+    def transcribe(self, audio, filename: str = 'audio.webm', content_type: Optional[str] = None) -> str:
         """
-        Transcribe audio to text using OpenAI Whisper.
+        Transcribe audio to text with the speech-to-text backend.
 
         Args:
-            audio_file: File-like object or path to audio file
+            audio: Audio bytes (see audio.prepare_upload) or a file-like object
+            filename: Name with an extension Whisper accepts
+            content_type: MIME type (guessed from filename if not given)
 
         Returns:
             Transcribed text
         """
-        try:
-            # Get file extension from name or default to webm
-            filename = getattr(audio_file, 'name', 'audio.webm')
-            extension = os.path.splitext(filename)[1] or '.webm'
+        from .audio import MIME_TYPES, read_upload
 
-            # Save to temp file - OpenAI needs a proper file with extension
-            with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp_file:
-                # Read and write the audio data
-                audio_file.seek(0)
-                tmp_file.write(audio_file.read())
-                tmp_path = tmp_file.name
-
-            try:
-                # Open the temp file and send to OpenAI
-                with open(tmp_path, 'rb') as f:
-                    response = self.openai_client.audio.transcriptions.create(
-                        model=self.whisper_model,
-                        file=f,
-                        language="en"
-                    )
-                return response.text
-            finally:
-                # Clean up temp file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+        try:
+            if not isinstance(audio, bytes):
+                audio, filename, content_type = read_upload(audio)
+            content_type = content_type or MIME_TYPES.get(os.path.splitext(filename)[1].lower(), 'audio/webm')
+            return self.stt.transcribe(audio, filename, content_type)
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
 
@@ -76,51 +208,105 @@ class AIService:
         messages: List[Dict[str, str]],
         system_prompt: str,
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        route: Optional[str] = None
     ) -> str:
         """
-        Generate a response using Meta Llama 3.3 70B Turbo via Together AI.
+        Generate a response with the LLM backend for a route.
 
         Args:
             messages: List of message dicts with 'role' and 'content'
             system_prompt: The system prompt for context
             temperature: Response creativity (0-1)
             max_tokens: Maximum response length
+            route: Conversation type (or 'sms', 'summary') used to pick the backend
 
         Returns:
             Generated response text
         """
-        try:
-            full_messages = [{"role": "system", "content": system_prompt}]
-            full_messages.extend(messages)
-
-            response = requests.post(
-                f"{self.together_base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.together_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.chat_model,
-                    "messages": full_messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                }
-            )
+        full_messages = [{"role": "system", "content": system_prompt}]
+        full_messages.extend(messages)
+        return self._complete(route, full_messages, temperature=temperature, max_tokens=max_tokens)
 
-            if response.status_code != 200:
-                raise Exception(f"Together AI API error: {response.status_code} - {response.text}")
+    def generate_response_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        route: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream a response, yielding text deltas as they arrive.
+        The fallback backend is only tried if nothing was streamed yet.
 
-            result = response.json()
-            return result['choices'][0]['message']['content']
-        except requests.RequestException as e:
-            raise Exception(f"LLM generation failed: {str(e)}")
-        except (KeyError, IndexError) as e:
-            raise Exception(f"Invalid response from Together AI: {str(e)}")
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            system_prompt: The system prompt for context
+            temperature: Response creativity (0-1)
+            max_tokens: Maximum response length
+            route: Conversation type used to pick the backend
+
+        Yields:
+            Pieces of the generated response text
+        """
+        full_messages = [{"role": "system", "content": system_prompt}]
+        full_messages.extend(messages)
+
+        chain = self._llm_chain(route)
+        for position, backend in enumerate(chain):
+            started = False
+            try:
+                for delta in backend.stream(full_messages, temperature=temperature, max_tokens=max_tokens):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started or position == len(chain) - 1:
+                    raise
+                logger.warning(f"{backend.name} failed, trying fallback: {e}")
+
+    def summarize_conversation(
+        self,
+        previous_summary: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 200
+    ) -> str:
+        """
+        Fold older messages into a conversation's rolling summary.
+
+        Args:
+            previous_summary: The summary so far (may be empty)
+            messages: Messages to add, oldest first, with 'role' and 'content'
+            max_tokens: Maximum summary length
+
+        Returns:
+            The updated summary
+        """
+        transcript = '\n'.join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+        prompt = f"""Update the running summary of a conversation between a mother and Bloom, her maternal health assistant.
+
+Current summary:
+{previous_summary or '(none yet)'}
+
+New messages:
+{transcript}
+
+Write the updated summary in a few short sentences. Keep every fact the mother gave
+(names, dates, numbers, blood type, symptoms, concerns) and any advice already given.
+Return only the summary."""
+
+        return self.generate_response(
+            messages=[{"role": "user", "content": prompt}],
+            system_prompt="You summarize conversations accurately and concisely.",
+            temperature=0.2,
+            max_tokens=max_tokens,
+            route='summary'
+        ).strip()
 
     def text_to_speech(self, text: str) -> bytes:
         """
-        Convert text to speech using OpenAI TTS.
+        Convert text to speech with the text-to-speech backend.
 
         Args:
             text: Text to convert to speech
@@ -129,12 +315,7 @@ class AIService:
             Audio bytes (MP3 format)
         """
         try:
-            response = self.openai_client.audio.speech.create(
-                model=self.tts_model,
-                voice=self.tts_voice,
-                input=text
-            )
-            return response.content
+            return self.tts.text_to_speech(text)
         except Exception as e:
             raise Exception(f"Text-to-speech failed: {str(e)}")
 
@@ -142,7 +323,8 @@ class AIService:
         self,
         text: str,
         data_schema: Dict[str, Any],
-        context: str = ""
+        context: str = "",
+        route: str = 'extraction'
     ) -> Dict[str, Any]:
         """
         Extract structured data from natural language text.
@@ -151,6 +333,7 @@ class AIService:
             text: The text to parse
             data_schema: Expected schema with field descriptions
             context: Additional context about what we're looking for
+            route: Route used to pick the LLM backend
 
         Returns:
             Extracted data as a dictionary
@@ -174,28 +357,16 @@ Important:
 """
 
         try:
-            response = requests.post(
-                f"{self.together_base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.together_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.chat_model,
-                    "messages": [
-                        {"role": "system", "content": "You are a data extraction assistant. Extract structured data from text and return only valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,  # Low temperature for accurate extraction
-                    "max_tokens": 500,
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Together AI API error: {response.status_code}")
-
-            result = response.json()
-            result_text = result['choices'][0]['message']['content'].strip()
+            result_text = self._complete(
+                route,
+                [
+                    {"role": "system", "content": "You are a data extraction assistant. Extract structured data from text and return only valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,  # Low temperature for accurate extraction
+                max_tokens=500,
+                json_output=True,
+            ).strip()
 
             # Clean up the response if it has markdown code blocks
             if result_text.startswith("```"):
@@ -211,6 +382,48 @@ Important:
             raise Exception(f"Data parsing failed: {str(e)}")
 
 
+class SentenceBuffer:
+    """
+    Collects streamed LLM text and hands back complete sentences for TTS.
+
+    Text from a ```json triage block onwards is never spoken.
+    """
+
+    SENTENCE_END = re.compile(r'[.!?]+["\')]*\s+')
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self.buffer = ''
+        self.muted = False
+
+    def feed(self, text: str) -> List[str]:
+        """Add a delta and return any sentences it completed."""
+        if self.muted:
+            return []
+        self.buffer += text
+
+        fence = self.buffer.find('```')
+        if fence != -1:
+            self.muted = True
+            speakable, self.buffer = self.buffer[:fence], ''
+            return [speakable.strip()] if speakable.strip() else []
+
+        sentences = []
+        start = 0
+        for match in self.SENTENCE_END.finditer(self.buffer):
+            # Very short fragments ("Oh!") are joined to the next sentence
+            if match.end() - start >= self.min_chars:
+                sentences.append(self.buffer[start:match.end()].strip())
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream has ended."""
+        remainder, self.buffer = self.buffer.strip(), ''
+        return [remainder] if remainder and not self.muted else []
+
+
 from .pregnancy_knowledge import get_week_knowledge, get_trimester, is_symptom_normal, is_danger_sign
 
 
@@ -491,8 +704,6 @@ def get_data_schema(conversation_type: str, is_pregnant: bool = True) -> Dict[st
 
 # ============ HEALTH REPORT CREATION FOR DOCTOR PORTAL ============
 
-import re
-
 
 def create_health_report_from_ai(user, child, conversation_type, full_transcript, ai_final_response):
     """
@@ -500,7 +711,7 @@ def create_health_report_from_ai(user, child, conversation_type, full_transcript
     Parses AI response for triage data and creates HealthReport.
     """
     from apps.health.models import HealthReport
-    from apps.passport.models import PassportEvent
+    from . import jobs
 
     # Try to extract JSON from AI response
     analysis = extract_ai_analysis(ai_final_response)
@@ -524,20 +735,12 @@ def create_health_report_from_ai(user, child, conversation_type, full_transcript
         conversation_transcript=full_transcript,
     )
 
-    # Log to Life Passport
-    try:
-        PassportEvent.objects.create(
-            child=child,
-            event_type='health_report',
-            title=f"Health Report: {analysis.get('ai_summary', 'Check-in')[:50]}",
-            data={
-                'report_id': str(report.id),
-                'urgency': report.urgency_level,
-                'symptoms': report.symptoms,
-            }
-        )
-    except Exception as e:
-        print(f"Failed to log passport event: {e}")
+    # Log to Life Passport once the report is committed
+    transaction.on_commit(lambda: jobs.enqueue(
+        'passport_event', {'report_id': str(report.id), 'source': 'ai'},
+        priority=jobs.URGENCY_PRIORITY.get(report.urgency_level, jobs.PRIORITY_DEFAULT),
+        dedup_key=f"passport:{report.id}",
+    ))
 
     return report
 
@@ -0,0 +1,134 @@
+"""
+Handlers for background jobs (see jobs.py).
+Each handler takes (payload, blob) and may run more than once: it either
+checks whether its work is already done or does it in one transaction.
+"""
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import extraction
+from .context import apply_summary, pending_summary
+from .jobs import handler
+from .models import Conversation, Message
+from .services import AIService, create_health_report_from_ai
+from .triage import create_health_report_from_triage
+
+logger = logging.getLogger(__name__)
+
+
+@handler('health_report')
+def health_report(payload, blob=None):
+    """HealthReport from the model's analysis of a reply, with the recent transcript."""
+    conversation = Conversation.objects.select_related('user', 'child').get(id=payload['conversation_id'])
+    recent_messages = conversation.get_messages_for_context(limit=6)
+    transcript = '\n'.join(f"{m['role'].upper()}: {m['content']}" for m in recent_messages)
+    with transaction.atomic():
+        report = create_health_report_from_ai(
+            user=conversation.user,
+            child=conversation.child,
+            conversation_type=conversation.conversation_type,
+            full_transcript=transcript,
+            ai_final_response=payload['response_text'],
+        )
+    logger.info(f"Health report created: {report.id} with urgency {report.urgency_level}")
+
+
+@handler('triage_report')
+def triage_report(payload, blob=None):
+    """HealthReport from a rule-based triage result."""
+    from apps.children.models import Child
+    from apps.health.models import HealthReport
+
+    child = Child.objects.select_related('user').get(id=payload['child_id'])
+    if payload.get('once_per_day') and HealthReport.objects.filter(
+        child=child, report_type='checkin', created_at__date=timezone.localdate()
+    ).exists():
+        return
+    with transaction.atomic():
+        report = create_health_report_from_triage(
+            child.user, child, payload['result'], payload['conversation_type'],
+            transcript=payload.get('transcript', ''),
+        )
+    logger.info(f"Triage report created: {report.id} with urgency {report.urgency_level}")
+
+
+@handler('passport_event')
+def passport_event(payload, blob=None):
+    """Life Passport entry for a HealthReport, logged once per report."""
+    from apps.health.models import HealthReport
+    from apps.passport.models import PassportEvent
+
+    report = HealthReport.objects.select_related('child').get(id=payload['report_id'])
+    if PassportEvent.objects.filter(source_type='HealthReport', source_id=report.id).exists():
+        return
+    pregnant = report.child.status == 'pregnant'
+    PassportEvent.objects.create(
+        child=report.child,
+        event_type='symptom_reported',
+        title=f"Health Report: {report.ai_summary[:50]}",
+        stage_type='pregnancy' if pregnant else 'baby',
+        stage_week=report.pregnancy_week if pregnant else None,
+        data={
+            'report_id': str(report.id),
+            'urgency': report.urgency_level,
+            'symptoms': report.symptoms,
+            'source': payload.get('source', 'ai'),
+        },
+        is_concern=report.urgency_level != 'normal',
+        severity={'critical': 'severe', 'urgent': 'moderate', 'moderate': 'mild'}.get(report.urgency_level, ''),
+        source_type='HealthReport',
+        source_id=report.id,
+        event_date=timezone.localdate(report.created_at),
+    )
+
+
+@handler('save_audio')
+def save_audio(payload, blob=None):
+    """Point a Message at its stored voice recording."""
+    message = Message.objects.filter(id=payload['message_id']).only('id', 'audio_input_url').first()
+    if message is None or message.audio_input_url:
+        return
+    audio_path = payload.get('audio_path')
+    if not audio_path:
+        # Jobs queued before uploads were stored up front carry the audio themselves
+        if not blob:
+            raise ValueError('save_audio job has no audio')
+        audio_path = default_storage.save(payload['filename'], ContentFile(blob))
+    audio_input_url = default_storage.url(audio_path) if hasattr(default_storage, 'url') else f"/media/{audio_path}"
+    Message.objects.filter(id=message.id).update(audio_input_url=audio_input_url)
+
+
+@handler('extract_turn')
+def extract_turn(payload, blob=None):
+    """Model extraction of the fields still missing after a user turn."""
+    conversation = Conversation.objects.get(id=payload['conversation_id'])
+    if conversation.status == 'completed':
+        return
+    missing = extraction.missing_fields(conversation.conversation_type, conversation.parsed_data or {})
+    # Locally read values the model should check ("same as before" is not genotype AS)
+    confirm = payload.get('confirm') or {}
+    if not confirm and not extraction.needs_model(payload['text'], missing):
+        return
+    extracted = extraction.extract_with_model(
+        AIService.get_instance(), conversation.conversation_type,
+        payload['text'], missing + [field for field in confirm if field not in missing], payload.get('question', ''),
+    )
+    extraction.merge_into_conversation(conversation, extracted, confirm)
+
+
+@handler('summarize')
+def summarize(payload, blob=None):
+    """Fold the oldest unsummarized messages into the rolling summary."""
+    conversation = Conversation.objects.get(id=payload['conversation_id'])
+    to_summarize = pending_summary(conversation)
+    if not to_summarize:
+        return
+    summary = AIService.get_instance().summarize_conversation(
+        conversation.summary, to_summarize, settings.AI_SUMMARY_MAX_TOKENS
+    )
+    apply_summary(conversation, summary, to_summarize)
@@ -1,3 +1,66 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from apps.ai.extraction import extract_locally, needs_model
+from apps.ai.triage import triage
 
-# Create your tests here.
+
+class TriageTextRuleTests(SimpleTestCase):
+    """Tests for the rule-based pre-screen"""
+
+    def test_temperature_is_high_fever(self):
+        for text in ['My temperature is 38.5C', 'I have 39 °C since morning', 'it reads 40 degrees',
+                     'fever of 39', '38.7 celsius']:
+            result = triage(text, week=30)
+            self.assertEqual(result['urgency_level'], 'critical', text)
+            self.assertIn('High fever', result['reasons'], text)
+
+    def test_week_or_age_is_not_a_fever(self):
+        for text in ['week 40 can I still travel?', 'I am 39 could I have the baby soon',
+                     'at 38 weeks can I eat pepper soup', 'my mum is 41 cause she had me late']:
+            result = triage(text, week=39)
+            self.assertNotIn('High fever', result['reasons'], text)
+            self.assertNotEqual(result['urgency_level'], 'critical', text)
+
+    def test_fainting(self):
+        for text in ['I felt faint at the market', 'I fainted this morning', 'I keep fainting']:
+            self.assertIn('Seizure or fainting', triage(text, week=20)['reasons'], text)
+
+    def test_negated_signs_are_ignored(self):
+        for text in ['No heavy bleeding, just tired', 'no severe pain today, just back ache',
+                     'I am not bleeding at all', 'I feel fine, no spotting', 'never fainted, only a bit dizzy',
+                     'I have been lying down, not moving much']:
+            result = triage(text, week=30)
+            self.assertEqual(result['urgency_level'], 'normal', text)
+
+    def test_affirmed_sign_after_negated_one(self):
+        result = triage('no pain, but I am bleeding heavily', week=30)
+        self.assertEqual(result['urgency_level'], 'critical')
+        self.assertIn('Heavy bleeding', result['reasons'])
+
+    def test_baby_not_moving(self):
+        for text in ['the baby is not moving since morning', "baby hasn't been moving", 'no fetal movement today']:
+            self.assertIn('No fetal movement', triage(text, week=30)['reasons'], text)
+
+    def test_mild_signs_are_not_critical(self):
+        result = triage('mild headache today and my feet are swollen a little', week=30)
+        self.assertEqual(result['urgency_level'], 'urgent')
+        result = triage('bad headache and my vision is blurry', week=30)
+        self.assertEqual(result['urgency_level'], 'critical')
+
+
+class LocalExtractionTests(SimpleTestCase):
+    """Tests for fields read off onboarding replies without the model"""
+
+    def test_weeks_are_not_an_age(self):
+        found = extract_locally('onboarding', "I'm 20 weeks pregnant", ['age', 'weeks_at_registration'])
+        self.assertNotIn('age', found)
+        self.assertEqual(found['weeks_at_registration'], 20)
+        self.assertEqual(extract_locally('onboarding', 'I am 28 years old', ['age']), {'age': 28})
+
+    def test_genotype_needs_capitals_or_a_cue(self):
+        self.assertEqual(extract_locally('onboarding', 'same as before', ['genotype']), {})
+        self.assertEqual(extract_locally('onboarding', 'AS', ['genotype']), {'genotype': 'AS'})
+        self.assertEqual(extract_locally('onboarding', 'my genotype is ss', ['genotype']), {'genotype': 'SS'})
+
+    def test_medical_fields_are_confirmed_by_the_model(self):
+        self.assertTrue(needs_model('AS', ['age'], {'genotype': 'AS'}))
+        self.assertFalse(needs_model('0803 123 4567', ['age'], {'emergency_contact_phone': '08031234567'}))
@@ -0,0 +1,268 @@
+"""
+Rule-based triage that runs before the model is called.
+
+Urgency is scored from what the mother says (danger signs for her week and
+the always-escalate list the model is given in HEALTH_TRIAGE_INSTRUCTIONS),
+her latest DailyHealthLog vitals and recent KickCount sessions. Scoring is
+plain Python over precompiled patterns; load_signals() runs the two small
+queries it needs. A phrase negated earlier in its clause ("no heavy
+bleeding", "not bleeding") is ignored, and a critical sign qualified as mild
+("mild headache", "swollen a little") is only urgent. The model's own JSON analysis still runs afterwards; this
+only makes sure critical cases never wait on it.
+"""
+import re
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import jobs
+from .pregnancy_knowledge import DANGER_MATCHERS, NORMAL_MATCHERS, classify_symptoms
+
+URGENCY_ORDER = ['normal', 'moderate', 'urgent', 'critical']
+
+# Conversation types whose messages are pre-screened
+TRIAGE_TYPES = ['chat', 'health_complaint', 'health_checkin']
+
+# (pattern, label, urgency); checked against the lowercased message, skipping negated matches
+TEXT_RULES = [
+    (re.compile(r"heavy bleeding|bleeding (a lot|heavily)|soak(ed|ing) (a |my |through )?pads?|blood clots?"),
+     'Heavy bleeding', 'critical'),
+    (re.compile(r"severe (abdominal |stomach |belly |tummy )?(pain|cramps?)"), 'Severe abdominal pain', 'critical'),
+    (re.compile(r"\b(seizures?|convuls\w*|faint(ed|ing)?|unconscious|passed out)\b"),
+     'Seizure or fainting', 'critical'),
+    (re.compile(r"can'?t breathe|cannot breathe|difficulty breathing|short(ness)? of breath"),
+     'Difficulty breathing', 'critical'),
+    # A bare 38-41 is often a pregnancy week or an age; only a temperature counts
+    (re.compile(r"high fever|fever of (38|39|40|41)|\b(3[89]|4[01])(\.\d)?\s*(°\s*c?|c\b|celsius|degrees)"),
+     'High fever', 'critical'),
+    (re.compile(r"\bbleed\w*|\bspotting\b"), 'Bleeding', 'urgent'),
+    (re.compile(r"(can'?t|cannot|unable to) keep (anything|food|fluids?|water) down|vomit\w* (everything|all day)"),
+     'Persistent vomiting', 'urgent'),
+    (re.compile(r"(pain|burn\w*) when (i )?(pee|urinat\w*)|painful urination"), 'Painful urination', 'urgent'),
+    (re.compile(r"(smelly|green|yellow|unusual|foul) discharge"), 'Unusual discharge', 'urgent'),
+    (re.compile(r"(severe|sudden) swelling|swollen (face|hands)|swelling (in|of) (my )?(face|hands)"),
+     'Sudden or facial swelling', 'urgent'),
+    (re.compile(r"\b(depress\w*|hopeless|want to die|hurt myself|anxious|anxiety|panic)\b"),
+     'Mental health concern', 'moderate'),
+    (re.compile(r"\bfor (\d+|a few|several|many) (days|weeks)\b|\bwon'?t go away\b|\bkeeps? coming back\b"),
+     'Persistent symptoms', 'moderate'),
+]
+
+HEADACHE = re.compile(r"headache|head (is )?(pain|ache|hurt)")
+PREECLAMPSIA_COMPANIONS = re.compile(r"vision|blurr\w*|seeing (spots|stars)|swollen|swelling|flashing")
+WATER_BROKE = re.compile(r"water (broke|has broken|break\w*)|leaking (fluid|water)|fluid leak\w*")
+# "Not moving" only counts when it is about the baby, not the mother lying still
+NO_MOVEMENT = re.compile(
+    r"baby (is |has )?(not|isn'?t|hasn'?t) (been )?moving|no (fetal |baby )?movements?|(not|haven'?t|havent|didn'?t) (felt|feel\w*) (the )?baby"
+    r"|stopped (moving|kicking)|no kicks?"
+)
+LESS_MOVEMENT = re.compile(r"(less|reduced|decreased|fewer|not much) (fetal |baby )?(movements?|kicks?|moving)")
+
+# A negation up to two words before a phrase in the same clause: "no heavy bleeding", "not bleeding"
+NEGATION = re.compile(r"\b(no|not|without|never)\b(\s+[\w'-]+){0,2}\s*$")
+MILD = re.compile(r"\b(mild(ly)?|slight(ly)?|a (little|bit))\b")
+CLAUSE_BREAK = re.compile(r"[.,;:!?…]|\bbut\b")
+
+# Kick counting: fewer than this many kicks in KICK_WINDOW_MINUTES is a danger sign
+KICK_TARGET = 10
+KICK_WINDOW_MINUTES = 120
+
+ADVICE = {
+    'critical': "Go to the nearest hospital or call your doctor now.",
+    'urgent': "See a doctor within the next 24 hours.",
+    'moderate': "Keep an eye on this and mention it at your next antenatal visit.",
+    'normal': "",
+}
+
+
+def _clause(text, match):
+    """Clause text before and after a match, up to the nearest punctuation or 'but'."""
+    start = max((m.end() for m in CLAUSE_BREAK.finditer(text, 0, match.start())), default=0)
+    end = next((m.start() for m in CLAUSE_BREAK.finditer(text, match.end())), len(text))
+    return text[start:match.start()], text[match.end():end]
+
+
+def _affirmed(matches, text):
+    """The first match not negated within its clause, or None."""
+    for match in matches:
+        if not NEGATION.search(_clause(text, match)[0]):
+            return match
+    return None
+
+
+def _find(pattern, text):
+    return _affirmed(pattern.finditer(text), text)
+
+
+def _is_mild(match, text):
+    return any(MILD.search(part) for part in _clause(text, match))
+
+
+def load_signals(child, today=None):
+    """Latest vitals and recent kick sessions for a child, as plain values."""
+    from apps.health.models import DailyHealthLog, KickCount
+
+    today = today or timezone.localdate()
+    logs = list(
+        DailyHealthLog.objects.filter(child=child, date__gte=today - timedelta(days=8))
+        .only('date', 'weight_kg', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'baby_movement', 'symptoms')
+        .order_by('-date')
+    )
+    signals = {
+        'systolic': None,
+        'diastolic': None,
+        'weight_change_kg': None,
+        'baby_movement': None,
+        'symptoms': [],
+        'kick_sessions': [],
+    }
+
+    latest = logs[0] if logs and logs[0].date >= today - timedelta(days=1) else None
+    if latest:
+        signals.update({
+            'systolic': latest.blood_pressure_systolic,
+            'diastolic': latest.blood_pressure_diastolic,
+            'baby_movement': latest.baby_movement or None,
+            'symptoms': list(latest.symptoms or []),
+        })
+        earlier = [log for log in logs if log.weight_kg and log.date <= latest.date - timedelta(days=5)]
+        if latest.weight_kg and earlier:
+            signals['weight_change_kg'] = float(latest.weight_kg - earlier[-1].weight_kg)
+
+    sessions = KickCount.objects.filter(child=child, end_time__isnull=False).order_by('-start_time')[:3]
+    signals['kick_sessions'] = [
+        (session.kick_count, session.duration_minutes
+         or int((session.end_time - session.start_time).total_seconds() // 60))
+        for session in sessions
+    ]
+    return signals
+
+
+def triage(text, week=None, signals=None):
+    """
+    Score urgency for a message at a pregnancy week (None after birth).
+    Returns a dict shaped like extract_ai_analysis() output, plus 'reasons'
+    and 'clearly_normal' (nothing concerning and every reported symptom is
+    expected for the week).
+    """
+    text = (text or '').lower()
+    signals = signals or {}
+    findings = []
+
+    def flag(label, level):
+        findings.append((URGENCY_ORDER.index(level), label))
+
+    for pattern, label, level in TEXT_RULES:
+        match = _find(pattern, text)
+        if match:
+            flag(label, 'urgent' if level == 'critical' and _is_mild(match, text) else level)
+
+    headache, companion = _find(HEADACHE, text), _find(PREECLAMPSIA_COMPANIONS, text)
+    if headache and companion:
+        mild = _is_mild(headache, text) or _is_mild(companion, text)
+        flag('Headache with vision changes or swelling (possible preeclampsia)', 'urgent' if mild else 'critical')
+    if week and _find(WATER_BROKE, text):
+        flag('Waters breaking before 37 weeks' if week < 37 else 'Waters breaking',
+             'critical' if week < 37 else 'urgent')
+    if week and week >= 20 and _find(NO_MOVEMENT, text):
+        flag('No fetal movement', 'critical' if week >= 24 else 'urgent')
+    elif week and week >= 20 and _find(LESS_MOVEMENT, text):
+        flag('Decreased fetal movement', 'urgent')
+
+    symptoms = list(signals.get('symptoms') or [])
+    if week:
+        for match in DANGER_MATCHERS[max(1, min(42, week))].finditer(text):
+            if _affirmed([match], text):
+                flag(match.group().capitalize(), 'urgent')
+                symptoms.append(match.group())
+        symptoms.extend(NORMAL_MATCHERS[max(1, min(42, week))].find(text))
+
+    systolic, diastolic = signals.get('systolic'), signals.get('diastolic')
+    if systolic or diastolic:
+        systolic, diastolic = systolic or 0, diastolic or 0
+        if systolic >= 160 or diastolic >= 110:
+            flag(f'Severe high blood pressure ({systolic}/{diastolic})', 'critical')
+        elif systolic >= 140 or diastolic >= 90:
+            if headache or companion:
+                flag(f'High blood pressure ({systolic}/{diastolic}) with headache or swelling', 'critical')
+            else:
+                flag(f'High blood pressure ({systolic}/{diastolic})', 'urgent')
+
+    weight_change = signals.get('weight_change_kg')
+    if week and weight_change is not None and weight_change >= 2:
+        flag(f'Rapid weight gain ({weight_change:.1f} kg in a week)', 'urgent')
+
+    movement = signals.get('baby_movement')
+    if week and week >= 20 and movement == 'not_felt':
+        flag('No fetal movement logged today', 'critical' if week >= 24 else 'urgent')
+    elif week and week >= 20 and movement == 'less_than_usual':
+        flag('Less fetal movement than usual logged today', 'urgent')
+
+    if week and week >= 28:
+        low = [
+            count < KICK_TARGET and minutes >= KICK_WINDOW_MINUTES
+            for count, minutes in signals.get('kick_sessions') or []
+        ]
+        if len(low) >= 2 and low[0] and low[1]:
+            flag(f'Fewer than {KICK_TARGET} kicks in 2 hours, twice in a row', 'critical')
+        elif low and low[0]:
+            flag(f'Fewer than {KICK_TARGET} kicks in 2 hours', 'urgent')
+
+    level = URGENCY_ORDER[max((rank for rank, _ in findings), default=0)]
+    reasons = [label for rank, label in sorted(findings, reverse=True)]
+    reasons = list(dict.fromkeys(reasons))
+    symptoms = list(dict.fromkeys(symptoms))
+
+    unexpected = week and symptoms and 'unknown' in classify_symptoms(signals.get('symptoms') or [], week)
+    return {
+        'urgency_level': level,
+        'symptoms': symptoms,
+        'reasons': reasons,
+        'clearly_normal': level == 'normal' and not unexpected,
+        'ai_summary': '; '.join(reasons[:3]) if reasons else 'No warning signs found',
+        'ai_assessment': 'Flagged by rule-based triage: ' + ', '.join(reasons) if reasons else '',
+        'ai_recommendation': ADVICE[level],
+    }
+
+
+def triage_child(child, text=''):
+    """Triage a message from the mother of this child using her latest logs."""
+    week = child.get_pregnancy_week() if child.status == 'pregnant' else None
+    return triage(text, week, load_signals(child))
+
+
+def prompt_note(result):
+    """Extra system prompt text so the reply reflects what triage found."""
+    if result['urgency_level'] not in ('critical', 'urgent'):
+        return ''
+    return (
+        f"\n\nSAFETY CHECK ({result['urgency_level'].upper()}): {', '.join(result['reasons'])}. "
+        f"Say this clearly and kindly first: {ADVICE[result['urgency_level']]}"
+    )
+
+
+def create_health_report_from_triage(user, child, result, conversation_type, transcript=''):
+    """Escalate to the doctor dashboard without waiting for the model's analysis."""
+    from apps.health.models import HealthReport
+
+    report = HealthReport.objects.create(
+        user=user,
+        child=child,
+        pregnancy_week=(child.get_pregnancy_week() or 20) if child.status == 'pregnant' else 20,
+        report_type='complaint' if conversation_type != 'health_checkin' else 'checkin',
+        urgency_level=result['urgency_level'],
+        symptoms=result['symptoms'],
+        ai_summary=result['ai_summary'],
+        ai_assessment=result['ai_assessment'],
+        ai_recommendation=result['ai_recommendation'],
+        conversation_transcript=transcript,
+    )
+
+    transaction.on_commit(lambda: jobs.enqueue(
+        'passport_event', {'report_id': str(report.id), 'source': 'triage'},
+        priority=jobs.URGENCY_PRIORITY[report.urgency_level],
+        dedup_key=f"passport:{report.id}",
+    ))
+
+    return report
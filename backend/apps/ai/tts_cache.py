@@ -0,0 +1,146 @@
+"""
+Content-addressed cache for text-to-speech audio.
+
+Audio is keyed by hash(model, voice, normalized text), written once to
+default_storage under audio/tts/, and reused by every message with the same
+text. The total size is capped by AI_TTS_CACHE_MAX_BYTES; least recently used
+entries are evicted first. An evicted entry's file is kept while any Message
+still points at it, so older messages keep playing; it simply stops counting
+towards the cache.
+
+Lookups and writes touch the database, so call them from the request thread.
+Only the synthesis itself should run on a worker pool.
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Message, TTSCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text):
+    return ' '.join(text.split())
+
+
+class TTSCache:
+    """Cache lookups and writes; hit and miss counts are kept per process."""
+
+    hits = 0
+    misses = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(text, voice, model):
+        return hashlib.sha256(f"{model}\0{voice}\0{_normalize(text)}".encode('utf-8')).hexdigest()
+
+    @classmethod
+    def lookup(cls, text, voice, model):
+        """Return the cached entry for this text, or None on a miss."""
+        entry = TTSCacheEntry.objects.filter(key=cls.key(text, voice, model)).first()
+        with cls._lock:
+            if entry:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+        if entry:
+            TTSCacheEntry.objects.filter(pk=entry.pk).update(
+                hit_count=F('hit_count') + 1,
+                last_used_at=timezone.now(),
+            )
+        return entry
+
+    @classmethod
+    def store(cls, text, voice, model, audio_bytes):
+        """Save freshly synthesized audio and return its entry."""
+        key = cls.key(text, voice, model)
+        entry = TTSCacheEntry.objects.filter(key=key).first()
+        if entry:
+            # Another request voiced the same text in the meantime
+            return entry
+
+        audio_path = default_storage.save(f"audio/tts/{key[:2]}/{key}.mp3", ContentFile(audio_bytes))
+        entry, created = TTSCacheEntry.objects.get_or_create(
+            key=key,
+            defaults={
+                'text': _normalize(text),
+                'voice': voice,
+                'model': model,
+                'audio_path': audio_path,
+                'size_bytes': len(audio_bytes),
+            }
+        )
+        if not created:
+            default_storage.delete(audio_path)
+            return entry
+
+        cls.evict()
+        return entry
+
+    @classmethod
+    def evict(cls, max_bytes=None):
+        """
+        Drop least recently used entries until the cache fits in max_bytes,
+        deleting their files unless a Message still references them.
+        """
+        max_bytes = settings.AI_TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        total = TTSCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+        if total <= max_bytes:
+            return 0
+
+        victims = []
+        for entry in TTSCacheEntry.objects.order_by('last_used_at').iterator():
+            if total <= max_bytes:
+                break
+            victims.append(entry)
+            total -= entry.size_bytes
+
+        # Files that messages still play are left in place
+        urls = {entry.id: cls.url(entry) for entry in victims}
+        referenced = set(
+            Message.objects.filter(audio_output_url__in=urls.values()).values_list('audio_output_url', flat=True)
+        )
+        for entry in victims:
+            if urls[entry.id] not in referenced:
+                default_storage.delete(entry.audio_path)
+        TTSCacheEntry.objects.filter(id__in=list(urls)).delete()
+        evicted = len(victims)
+        logger.info(f"TTS cache evicted {evicted} entries, {total} bytes remain")
+        return evicted
+
+    @staticmethod
+    def url(entry):
+        return default_storage.url(entry.audio_path) if hasattr(default_storage, 'url') else f"/media/{entry.audio_path}"
+
+    @staticmethod
+    def read(entry):
+        """Audio bytes for an entry. Touches storage only, so it is safe on a worker thread."""
+        with default_storage.open(entry.audio_path, 'rb') as f:
+            return f.read()
+
+    @classmethod
+    def stats(cls):
+        totals = TTSCacheEntry.objects.aggregate(bytes=Sum('size_bytes'), hits=Sum('hit_count'))
+        return {
+            'entries': TTSCacheEntry.objects.count(),
+            'bytes': totals['bytes'] or 0,
+            'total_hits': totals['hits'] or 0,
+            'process_hits': cls.hits,
+            'process_misses': cls.misses,
+        }
+
+    @classmethod
+    def get_audio_url(cls, ai_service, text):
+        """Cached audio URL for text, synthesizing it on a miss."""
+        entry = cls.lookup(text, ai_service.tts_voice, ai_service.tts_model)
+        if not entry:
+            audio_bytes = ai_service.text_to_speech(text)
+            entry = cls.store(text, ai_service.tts_voice, ai_service.tts_model, audio_bytes)
+        return cls.url(entry)
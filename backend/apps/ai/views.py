@@ -1,10 +1,16 @@
 import os
 import re
+import json
 import tempfile
 import base64
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta, date
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 from django.core.files.storage import default_storage
@@ -15,7 +21,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Conversation, Message
+from .models import BackgroundJob, Conversation, Message
 from .serializers import (
     ConversationSerializer,
     MessageSerializer,
@@ -26,9 +32,27 @@ from .services import (
     get_system_prompt,
     get_data_schema,
     SYSTEM_PROMPTS,
-    create_health_report_from_ai,
+    SentenceBuffer,
     extract_ai_analysis,
 )
+from .audio import prepare_upload
+from .tts_cache import TTSCache
+from .response_cache import ResponseCache, shared_context, stage_bucket
+from . import extraction
+from . import jobs
+from .context import build_context, context_text, pending_summary
+from .triage import TRIAGE_TYPES, triage_child, prompt_note
+
+# Shared, bounded pool for the network calls made after a reply is generated
+AI_CALL_POOL = ThreadPoolExecutor(max_workers=settings.AI_CALL_POOL_WORKERS, thread_name_prefix='ai-call')
+
+# Phrases in a reply that mean the assistant is wrapping up a data-collection flow
+COMPLETION_SIGNALS = [
+    'confirmed', 'all set', 'saved', 'complete', 'got everything', 'information',
+    'thank you for sharing', 'sharing all that', 'profile is set', 'set up',
+    'here for you', 'amazing job', 'doing great', 'you\'re all set',
+    'if you need', 'that\'s all', 'recorded', 'noted'
+]
 
 
 @api_view(['POST'])
@@ -66,7 +90,7 @@ def start_conversation(request):
 
     # Generate initial greeting
     try:
-        ai_service = AIService()
+        ai_service = AIService.get_instance()
 
         # Build context for prompt
         context = {
@@ -90,16 +114,12 @@ def start_conversation(request):
             messages=[],
             system_prompt=system_prompt,
             temperature=0.8,
-            max_tokens=200
+            max_tokens=200,
+            route=conversation_type
         )
 
-        # Generate audio for greeting
-        audio_bytes = ai_service.text_to_speech(greeting)
-
-        # Save audio to file
-        audio_filename = f"audio/conversations/{conversation.id}/greeting.mp3"
-        audio_path = default_storage.save(audio_filename, ContentFile(audio_bytes))
-        audio_url = default_storage.url(audio_path) if hasattr(default_storage, 'url') else f"/media/{audio_path}"
+        # Generate audio for greeting (greetings repeat, so usually a cache hit)
+        audio_url = TTSCache.get_audio_url(ai_service, greeting)
 
         # Save assistant message
         Message.objects.create(
@@ -174,126 +194,82 @@ def send_message(request):
             'message': 'This conversation has already been completed'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    audio_input_url = None
-    transcription_error = None
-
     try:
-        ai_service = AIService()
+        ai_service = AIService.get_instance()
     except Exception as e:
         # AI service not available - will use fallback responses
         ai_service = None
 
-    # If audio provided, try to transcribe it
-    if audio_file:
-        try:
-            # Save audio file first
-            audio_filename = f"audio/conversations/{conversation.id}/{Message.objects.filter(conversation=conversation).count()}_user.webm"
-            audio_path = default_storage.save(audio_filename, audio_file)
-            audio_input_url = default_storage.url(audio_path) if hasattr(default_storage, 'url') else f"/media/{audio_path}"
-
-            # Reset file pointer for transcription
-            audio_file.seek(0)
-
-            if ai_service:
-                text_message = ai_service.transcribe(audio_file)
-            else:
-                transcription_error = "Voice service temporarily unavailable. Please type your message."
-        except Exception as e:
-            transcription_error = f"Could not process audio: {str(e)}"
-
-    if not text_message and not transcription_error:
-        return Response({
-            'success': False,
-            'message': 'No message content provided'
-        }, status=status.HTTP_400_BAD_REQUEST)
-
-    # If transcription failed, return error but allow retry with text
-    if transcription_error and not text_message:
-        return Response({
-            'success': False,
-            'message': transcription_error,
-            'use_text_mode': True
-        }, status=status.HTTP_400_BAD_REQUEST)
+    text_message, audio_upload, error_response = _ingest_user_input(
+        conversation, text_message, audio_file, ai_service
+    )
+    if error_response:
+        return error_response
 
     # Save user message
     user_message = Message.objects.create(
         conversation=conversation,
         role='user',
         content=text_message,
-        audio_input_url=audio_input_url,
         parsed_data={},
     )
+    _queue_audio_save(user_message, audio_upload)
 
     # Build context
-    context = {
-        'mother_name': request.user.first_name or 'there',
-    }
+    context = _build_message_context(request.user, conversation)
 
-    if conversation.child:
-        child = conversation.child
-        stage = child.get_current_stage()
-        context.update({
-            'child_name': child.name or child.nickname or 'Baby',
-            'stage_description': f"Week {stage.get('week', 1)}" if stage['type'] == 'pregnancy' else f"{stage.get('age_months', 0)} months old",
-            'expected_symptoms': '',
-            'recent_notes': '',
-            'week': stage.get('week', 1) if stage['type'] == 'pregnancy' else stage.get('age_months', 0),
-        })
-
-    # Get conversation history
-    history = conversation.get_messages_for_context(limit=10)
+    # Rolling summary plus as many recent messages as fit the token budget
+    history = build_context(conversation)
 
     # Generate response - use AI if available, otherwise fallback
     response_text = None
     audio_output_url = None
     is_complete = False
     parsed_data = {}
+    audio_future = None
+
+    # Fold this turn into the flow's data; fields read locally are merged now,
+    # the model is asked for the rest once the reply has been generated
+    model_extraction = _extract_turn(conversation, text_message, history, ai_service)
+
+    # Rule-based pre-screen; critical cases reach the doctor before the model replies
+    screened, escalated = _pre_screen(request.user, conversation, text_message)
+
+    # Common questions at the same stage share one reply
+    use_reply_cache, cache_bucket, cache_names = _reply_cache_scope(
+        request.user, conversation, context, text_message, screened, ai_service
+    )
 
     if ai_service:
         try:
-            system_prompt = get_system_prompt(conversation.conversation_type, context)
+            if use_reply_cache:
+                response_text = ResponseCache.get(
+                    conversation.conversation_type, cache_bucket, text_message, cache_names
+                )
 
-            response_text = ai_service.generate_response(
-                messages=history,
-                system_prompt=system_prompt,
-                temperature=0.7,
-                max_tokens=300
-            )
+            if not response_text:
+                system_prompt, messages = _reply_prompt(
+                    conversation, context, history, text_message, screened, use_reply_cache
+                )
+                response_text = ai_service.generate_response(
+                    messages=messages,
+                    system_prompt=system_prompt,
+                    temperature=0.7,
+                    max_tokens=300,
+                    route=conversation.conversation_type
+                )
+                if use_reply_cache:
+                    ResponseCache.set(
+                        conversation.conversation_type, cache_bucket, text_message, response_text, cache_names
+                    )
+
+            # Voice the reply while the bookkeeping below is queued
+            cached_audio = TTSCache.lookup(response_text, ai_service.tts_voice, ai_service.tts_model)
+            if cached_audio:
+                audio_output_url = TTSCache.url(cached_audio)
+            else:
+                audio_future = AI_CALL_POOL.submit(ai_service.text_to_speech, response_text)
 
-            # Try to generate audio
-            try:
-                audio_bytes = ai_service.text_to_speech(response_text)
-                audio_filename = f"audio/conversations/{conversation.id}/{Message.objects.filter(conversation=conversation).count()}_assistant.mp3"
-                audio_path = default_storage.save(audio_filename, ContentFile(audio_bytes))
-                audio_output_url = default_storage.url(audio_path) if hasattr(default_storage, 'url') else f"/media/{audio_path}"
-            except Exception:
-                # Audio generation failed, continue without audio
-                pass
-
-            # Try to extract structured data
-            if conversation.conversation_type in ['onboarding', 'add_child', 'birth']:
-                completion_signals = [
-                    'confirmed', 'all set', 'saved', 'complete', 'got everything', 'information',
-                    'thank you for sharing', 'sharing all that', 'profile is set', 'set up',
-                    'here for you', 'amazing job', 'doing great', 'you\'re all set',
-                    'if you need', 'that\'s all', 'recorded', 'noted'
-                ]
-
-                if any(signal in response_text.lower() for signal in completion_signals):
-                    full_conversation = ' '.join([m['content'] for m in history])
-                    schema = get_data_schema(conversation.conversation_type)
-
-                    if schema:
-                        try:
-                            parsed_data = ai_service.parse_structured_data(
-                                full_conversation,
-                                schema,
-                                f"Extract data from this {conversation.conversation_type} conversation"
-                            )
-                            if parsed_data and len([v for v in parsed_data.values() if v]) >= 2:
-                                is_complete = True
-                        except Exception:
-                            pass
         except Exception as e:
             # AI generation failed, use fallback
             response_text = None
@@ -315,45 +291,30 @@ def send_message(request):
         parsed_data=parsed_data or {},
     )
 
-    # Check for health concerns in the AI response and create health report if needed
-    # This applies to chat and health-related conversations
-    health_report_created = False
-    if conversation.conversation_type in ['chat', 'health_complaint', 'health_checkin'] and conversation.child:
-        try:
-            # Check if AI response contains health analysis JSON
-            analysis = extract_ai_analysis(response_text)
-
-            # Only create report if there's actual health concern (not just normal chat)
-            if analysis.get('urgency_level') and analysis.get('urgency_level') != 'normal':
-                # Build transcript from last few messages
-                recent_messages = conversation.get_messages_for_context(limit=6)
-                transcript = '\n'.join([f"{m['role'].upper()}: {m['content']}" for m in recent_messages])
-
-                report = create_health_report_from_ai(
-                    user=request.user,
-                    child=conversation.child,
-                    conversation_type=conversation.conversation_type,
-                    full_transcript=transcript,
-                    ai_final_response=response_text
-                )
-                health_report_created = True
-                logger.info(f"Health report created: {report.id} with urgency {report.urgency_level}")
-            elif analysis.get('symptoms') and len(analysis.get('symptoms', [])) > 0:
-                # Even normal urgency but with symptoms - create a report for tracking
-                recent_messages = conversation.get_messages_for_context(limit=6)
-                transcript = '\n'.join([f"{m['role'].upper()}: {m['content']}" for m in recent_messages])
-
-                report = create_health_report_from_ai(
-                    user=request.user,
-                    child=conversation.child,
-                    conversation_type=conversation.conversation_type,
-                    full_transcript=transcript,
-                    ai_final_response=response_text
-                )
-                health_report_created = True
-                logger.info(f"Health report created for symptoms tracking: {report.id}")
-        except Exception as e:
-            logger.error(f"Failed to create health report: {e}")
+    # Fold older messages into the rolling summary every few turns
+    _queue_summary(conversation)
+
+    # Check for health concerns in the AI response and queue a health report if needed
+    health_report_created = escalated or _queue_health_report(conversation, assistant_message)
+
+    # Without audio the reply is still sent as text
+    audio_bytes = _future_result(audio_future, settings.AI_TTS_TIMEOUT_SECONDS, 'Audio generation')
+    if audio_bytes:
+        audio_output_url = TTSCache.url(
+            TTSCache.store(response_text, ai_service.tts_voice, ai_service.tts_model, audio_bytes)
+        )
+
+    # The flow is done once the reply wraps up and everything required is known
+    missing_fields = None
+    if conversation.conversation_type in extraction.EXTRACTION_TYPES and not parsed_data:
+        is_complete, parsed_data, missing_fields = _finish_extraction(
+            conversation, user_message, response_text, model_extraction, ai_service
+        )
+
+    if audio_bytes or is_complete:
+        assistant_message.audio_output_url = audio_output_url
+        assistant_message.parsed_data = parsed_data or {}
+        assistant_message.save(update_fields=['audio_output_url', 'parsed_data'])
 
     # Don't mark conversation as complete here - let user confirm first
     # Just store the parsed data in the message for retrieval later
@@ -374,11 +335,222 @@ def send_message(request):
             },
             'is_complete': is_complete,
             'parsed_data': parsed_data if is_complete else None,
+            'missing_fields': missing_fields,
             'health_report_created': health_report_created,
         }
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser, JSONParser])
+def stream_message(request):
+    """
+    Send a message and stream the reply as Server-Sent Events.
+    Each sentence is voiced while later ones are still being generated,
+    so the client can start playing audio after the first sentence.
+    The turn is handled like send_message: triage, the shared reply cache,
+    per-turn extraction and health reports.
+
+    A stream holds its worker thread until the reply is done, so gunicorn
+    runs gthread workers (see startup.sh); with plain sync workers each
+    stream would block a whole worker process.
+
+    POST /api/ai/conversation/message/stream/
+    Body: same as /api/ai/conversation/message/
+
+    Events:
+        transcript: {"text"} - the transcribed audio input
+        token: {"text"} - a piece of the reply as it is generated
+        audio: {"index", "text", "audio"} - base64 MP3 for one sentence, in order
+        done: {"user_message_id", "assistant_message_id", "content", "audio_url", "health_report_created",
+               "is_complete", "parsed_data", "missing_fields"}
+    """
+    conversation_id = request.data.get('conversation_id')
+    text_message = request.data.get('text') or request.data.get('message', '')
+    audio_file = request.FILES.get('audio')
+
+    if not conversation_id:
+        return Response({
+            'success': False,
+            'message': 'conversation_id is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    conversation = get_object_or_404(
+        Conversation,
+        id=conversation_id,
+        user=request.user
+    )
+
+    if conversation.status == 'completed':
+        return Response({
+            'success': False,
+            'message': 'This conversation has already been completed'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        ai_service = AIService.get_instance()
+    except Exception:
+        ai_service = None
+
+    text_message, audio_upload, error_response = _ingest_user_input(
+        conversation, text_message, audio_file, ai_service
+    )
+    if error_response:
+        return error_response
+
+    user_message = Message.objects.create(
+        conversation=conversation,
+        role='user',
+        content=text_message,
+        parsed_data={},
+    )
+    _queue_audio_save(user_message, audio_upload)
+
+    context = _build_message_context(request.user, conversation)
+    history = build_context(conversation)
+    user = request.user
+    model_extraction = _extract_turn(conversation, text_message, history, ai_service)
+    screened, escalated = _pre_screen(user, conversation, text_message)
+    use_reply_cache, cache_bucket, cache_names = _reply_cache_scope(
+        user, conversation, context, text_message, screened, ai_service
+    )
+
+    def events():
+        if audio_file:
+            yield _sse('transcript', {'text': text_message})
+
+        sentences = SentenceBuffer()
+        pending = deque()  # (index, sentence, cached, future) in speaking order
+        voiced = []
+        spoken = []
+        parts = []
+        executor = ThreadPoolExecutor(max_workers=settings.AI_STREAM_TTS_WORKERS)
+
+        def voice(sentence):
+            cached = TTSCache.lookup(sentence, ai_service.tts_voice, ai_service.tts_model)
+            if cached:
+                future = executor.submit(TTSCache.read, cached)
+            else:
+                future = executor.submit(ai_service.text_to_speech, sentence)
+            pending.append((len(voiced), sentence, bool(cached), future))
+            voiced.append(sentence)
+
+        def ready_audio(block=False):
+            while pending and (block or pending[0][3].done()):
+                index, sentence, cached, future = pending.popleft()
+                try:
+                    audio_bytes = future.result(timeout=settings.AI_TTS_TIMEOUT_SECONDS)
+                except Exception as e:
+                    # A sentence without audio is still shown as text
+                    logger.warning(f"TTS failed for streamed sentence {index}: {e}")
+                    continue
+                if not cached:
+                    TTSCache.store(sentence, ai_service.tts_voice, ai_service.tts_model, audio_bytes)
+                spoken.append(audio_bytes)
+                yield _sse('audio', {
+                    'index': index,
+                    'text': sentence,
+                    'audio': base64.b64encode(audio_bytes).decode('ascii'),
+                })
+
+        try:
+            if ai_service:
+                try:
+                    cached_reply = ResponseCache.get(
+                        conversation.conversation_type, cache_bucket, text_message, cache_names
+                    ) if use_reply_cache else None
+                    if cached_reply:
+                        parts.append(cached_reply)
+                        yield _sse('token', {'text': cached_reply})
+                        for sentence in sentences.feed(cached_reply):
+                            voice(sentence)
+                    else:
+                        system_prompt, messages = _reply_prompt(
+                            conversation, context, history, text_message, screened, use_reply_cache
+                        )
+                        for delta in ai_service.generate_response_stream(
+                            messages=messages,
+                            system_prompt=system_prompt,
+                            temperature=0.7,
+                            max_tokens=300,
+                            route=conversation.conversation_type
+                        ):
+                            parts.append(delta)
+                            yield _sse('token', {'text': delta})
+                            for sentence in sentences.feed(delta):
+                                voice(sentence)
+                            yield from ready_audio()
+                        if use_reply_cache:
+                            ResponseCache.set(
+                                conversation.conversation_type, cache_bucket, text_message, ''.join(parts), cache_names
+                            )
+                    for sentence in sentences.flush():
+                        voice(sentence)
+                except Exception as e:
+                    logger.error(f"Streaming reply failed: {e}")
+                    if parts:
+                        # Keep what was already sent; voice what is left of it
+                        for sentence in sentences.flush():
+                            voice(sentence)
+
+            response_text = ''.join(parts)
+            parsed_data = {}
+            if not response_text:
+                response_text = _get_fallback_response(conversation.conversation_type, text_message, context)
+                parsed_data = _parse_simple_data(conversation.conversation_type, text_message)
+                yield _sse('token', {'text': response_text})
+
+            yield from ready_audio(block=True)
+
+            # The URL goes out in the 'done' event, so the combined file is saved here
+            audio_output_url = None
+            if spoken:
+                # MP3 frames concatenate cleanly, so the whole reply is kept as one file
+                audio_filename = f"audio/conversations/{conversation.id}/{Message.objects.filter(conversation=conversation).count()}_assistant.mp3"
+                audio_path = default_storage.save(audio_filename, ContentFile(b''.join(spoken)))
+                audio_output_url = default_storage.url(audio_path) if hasattr(default_storage, 'url') else f"/media/{audio_path}"
+
+            assistant_message = Message.objects.create(
+                conversation=conversation,
+                role='assistant',
+                content=response_text,
+                audio_output_url=audio_output_url,
+                parsed_data=parsed_data or {},
+            )
+            health_report_created = escalated or _queue_health_report(conversation, assistant_message)
+
+            is_complete, missing_fields = bool(parsed_data), None
+            if conversation.conversation_type in extraction.EXTRACTION_TYPES and not parsed_data:
+                is_complete, parsed_data, missing_fields = _finish_extraction(
+                    conversation, user_message, response_text, model_extraction, ai_service
+                )
+                if is_complete:
+                    assistant_message.parsed_data = parsed_data
+                    assistant_message.save(update_fields=['parsed_data'])
+
+            yield _sse('done', {
+                'user_message_id': str(user_message.id),
+                'assistant_message_id': str(assistant_message.id),
+                'content': response_text,
+                'audio_url': audio_output_url,
+                'health_report_created': health_report_created,
+                'is_complete': is_complete,
+                'parsed_data': parsed_data if is_complete else None,
+                'missing_fields': missing_fields,
+            })
+
+            _queue_summary(conversation)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def complete_conversation(request, conversation_id):
@@ -401,22 +573,45 @@ def complete_conversation(request, conversation_id):
         })
 
     try:
-        ai_service = AIService()
+        ai_service = AIService.get_instance()
 
         # Get full conversation
-        history = conversation.get_messages_for_context(limit=50)
-        full_conversation = ' '.join([m['content'] for m in history])
+        history = build_context(conversation, settings.AI_EXTRACTION_TOKEN_BUDGET)
+        full_conversation = context_text(history)
 
         # Parse data
         schema = get_data_schema(conversation.conversation_type)
         parsed_data = {}
 
+        if conversation.conversation_type in extraction.EXTRACTION_TYPES:
+            # Data was gathered turn by turn; only ask for what is still missing
+            parsed_data = dict(conversation.parsed_data or {})
+            full_schema = extraction.schema_for(conversation.conversation_type)
+            schema = {
+                field: full_schema[field]
+                for field in extraction.missing_fields(conversation.conversation_type, parsed_data)
+            }
+
+        if schema and conversation.conversation_type == 'health_checkin' and conversation.child:
+            # A clearly normal check-in has nothing worth a model extraction
+            screened = triage_child(
+                conversation.child, ' '.join(m['content'] for m in history if m['role'] == 'user')
+            )
+            if screened['clearly_normal']:
+                schema = None
+                parsed_data = {
+                    'symptoms': screened['symptoms'],
+                    'concerns': [],
+                    'needs_followup': False,
+                }
+
         if schema:
-            parsed_data = ai_service.parse_structured_data(
+            extracted = ai_service.parse_structured_data(
                 full_conversation,
                 schema,
                 f"Extract data from this {conversation.conversation_type} conversation"
             )
+            parsed_data = extraction.merge(parsed_data, extracted, schema) if parsed_data else extracted
 
         conversation.mark_complete(parsed_data)
 
@@ -556,9 +751,16 @@ def transcribe_audio(request):
             'message': 'No audio file provided'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    # Same limit as voice messages, checked before the upload is read
+    if audio_file.size > settings.AI_AUDIO_MAX_BYTES:
+        return Response({
+            'success': False,
+            'message': 'Could not process audio: voice note is too long'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        ai_service = AIService()
-        text = ai_service.transcribe(audio_file)
+        ai_service = AIService.get_instance()
+        text = ai_service.transcribe(*prepare_upload(audio_file))
 
         return Response({
             'success': True,
@@ -574,6 +776,284 @@ def transcribe_audio(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Helpers shared by send_message and stream_message
+
+def _ingest_user_input(conversation, text_message, audio_file, ai_service):
+    """
+    Transcribe the audio upload, if any. It is stored once the user message
+    exists (see _queue_audio_save).
+
+    Returns (text, audio_upload, error_response). audio_upload is
+    (filename, bytes) or None; error_response is set when there is nothing
+    usable to reply to.
+    """
+    audio_upload = None
+    transcription_error = None
+
+    # If audio provided, try to transcribe it
+    if audio_file:
+        try:
+            # Read once; the same bytes are transcribed and later stored
+            audio_bytes, filename, content_type = prepare_upload(audio_file)
+            if len(audio_bytes) > settings.AI_AUDIO_MAX_BYTES:
+                raise ValueError("voice note is too long")
+            extension = os.path.splitext(filename)[1]
+            audio_filename = f"audio/conversations/{conversation.id}/{Message.objects.filter(conversation=conversation).count()}_user{extension}"
+            audio_upload = (audio_filename, audio_bytes)
+
+            if ai_service:
+                text_message = ai_service.transcribe(audio_bytes, filename, content_type)
+            else:
+                transcription_error = "Voice service temporarily unavailable. Please type your message."
+        except Exception as e:
+            transcription_error = f"Could not process audio: {str(e)}"
+
+    if not text_message and not transcription_error:
+        return None, None, Response({
+            'success': False,
+            'message': 'No message content provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # If transcription failed, return error but allow retry with text
+    if transcription_error and not text_message:
+        return None, None, Response({
+            'success': False,
+            'message': transcription_error,
+            'use_text_mode': True
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return text_message, audio_upload, None
+
+
+def _queue_audio_save(message, audio_upload):
+    """
+    Store the uploaded audio straight from memory and queue linking it to
+    its message. The bytes are written once, to storage, never to the job table.
+    """
+    if not audio_upload:
+        return
+    filename, audio_bytes = audio_upload
+    try:
+        audio_path = default_storage.save(filename, ContentFile(audio_bytes))
+    except Exception as e:
+        # The message is still answered; only its recording is lost
+        logger.warning(f"Could not store audio for message {message.id}: {e}")
+        return
+    jobs.enqueue(
+        'save_audio', {'message_id': str(message.id), 'audio_path': audio_path},
+        dedup_key=f"audio:{message.id}",
+    )
+
+
+def _reply_cache_scope(user, conversation, context, text_message, screened, ai_service):
+    """(whether the ResponseCache may answer this message, stage bucket, names to swap out)"""
+    bucket = stage_bucket(context.get('stage_type'), context.get('week'))
+    names = {
+        'mother_name': user.first_name,
+        'child_name': conversation.child.name if conversation.child else None,
+    }
+    pregnancy_week = context.get('week') if context.get('stage_type') == 'pregnancy' else None
+    use = (
+        bool(ai_service)
+        and (not screened or screened['urgency_level'] == 'normal')
+        and ResponseCache.cacheable(conversation.conversation_type, text_message, pregnancy_week)
+    )
+    return use, bucket, names
+
+
+def _finish_extraction(conversation, user_message, response_text, model_extraction, ai_service):
+    """
+    After a reply in an extraction flow, queue the model extraction for the
+    turn, or run it inline when the reply wraps up. The flow is complete once
+    the reply wraps up and everything required is known.
+    Returns (is_complete, parsed_data, missing_fields).
+    """
+    conversation_type = conversation.conversation_type
+    wrapping_up = any(signal in response_text.lower() for signal in COMPLETION_SIGNALS)
+    if wrapping_up and ai_service and (
+        model_extraction or not extraction.is_ready(conversation_type, conversation.parsed_data)
+    ):
+        # Completion is decided now, so this turn (and any turn still queued) is extracted inline
+        _extract_from_context(conversation, ai_service, (model_extraction or {}).get('confirm'))
+    elif model_extraction:
+        jobs.enqueue(
+            'extract_turn', model_extraction,
+            priority=jobs.PRIORITY_HIGH, dedup_key=f"extract:{conversation.id}:{user_message.id}",
+        )
+    missing_fields = extraction.missing_fields(conversation_type, conversation.parsed_data)
+    if wrapping_up and extraction.is_ready(conversation_type, conversation.parsed_data):
+        return True, conversation.parsed_data, missing_fields
+    return False, {}, missing_fields
+
+
+def _reply_prompt(conversation, context, history, text_message, screened, shared):
+    """
+    (system prompt, messages) for a reply. A shared reply is going into the
+    ResponseCache, so it is built from the question and stage alone, without
+    this mother's history or names.
+    """
+    if shared:
+        return (get_system_prompt(conversation.conversation_type, shared_context(context)),
+                [{'role': 'user', 'content': text_message}])
+    system_prompt = get_system_prompt(conversation.conversation_type, context)
+    if screened:
+        system_prompt += prompt_note(screened)
+    return system_prompt, history
+
+
+def _build_message_context(user, conversation):
+    """Prompt context for a reply in an existing conversation."""
+    context = {
+        'mother_name': user.first_name or 'there',
+    }
+
+    if conversation.child:
+        child = conversation.child
+        stage = child.get_current_stage()
+        context.update({
+            'child_name': child.name or child.nickname or 'Baby',
+            'stage_description': f"Week {stage.get('week', 1)}" if stage['type'] == 'pregnancy' else f"{stage.get('age_months', 0)} months old",
+            'expected_symptoms': '',
+            'recent_notes': '',
+            'week': stage.get('week', 1) if stage['type'] == 'pregnancy' else stage.get('age_months', 0),
+            'stage_type': stage['type'],
+        })
+
+    return context
+
+
+def _extract_turn(conversation, text_message, history, ai_service):
+    """
+    Merge fields read locally from the new user message into the
+    conversation's parsed_data. Returns the payload for an 'extract_turn'
+    job when a model call could fill more, or None.
+    """
+    conversation_type = conversation.conversation_type
+    if conversation_type not in extraction.EXTRACTION_TYPES:
+        return None
+
+    missing = extraction.missing_fields(conversation_type, conversation.parsed_data)
+    local = extraction.extract_locally(conversation_type, text_message, missing)
+    if local:
+        extraction.merge_into_conversation(conversation, local)
+        missing = extraction.missing_fields(conversation_type, conversation.parsed_data)
+
+    if not ai_service or not extraction.needs_model(text_message, missing, local):
+        return None
+
+    # The question being answered gives the reply its meaning ("Tolu" -> name)
+    question = next((m['content'] for m in reversed(history[:-1]) if m['role'] == 'assistant'), '')
+    confirm = {field: value for field, value in local.items() if field in extraction.CONFIRM_FIELDS}
+    return {'conversation_id': str(conversation.id), 'text': text_message, 'question': question, 'confirm': confirm}
+
+
+def _extract_from_context(conversation, ai_service, confirm=None):
+    """
+    Model extraction of every still-missing field from the recent
+    conversation, also checking locally read fields not confirmed yet.
+    """
+    conversation_type = conversation.conversation_type
+    # Turns still waiting in the queue are covered by this call
+    queued = BackgroundJob.objects.filter(
+        task='extract_turn', status='QUEUED', dedup_key__startswith=f"extract:{conversation.id}:"
+    )
+    confirm = dict(confirm or {})
+    for payload in queued.values_list('payload', flat=True):
+        confirm.update(payload.get('confirm') or {})
+    queued.update(status='DONE', finished_at=timezone.now(), last_error='Superseded by extraction at wrap-up')
+
+    missing = extraction.missing_fields(conversation_type, conversation.parsed_data or {})
+    fields = missing + [field for field in confirm if field not in missing]
+    if not fields:
+        return
+    text = context_text(build_context(conversation, settings.AI_EXTRACTION_TOKEN_BUDGET))
+    future = AI_CALL_POOL.submit(extraction.extract_with_model, ai_service, conversation_type, text, fields)
+    extracted = _future_result(future, settings.AI_EXTRACTION_TIMEOUT_SECONDS, 'Data extraction')
+    extraction.merge_into_conversation(conversation, extracted, confirm)
+
+
+def _queue_summary(conversation):
+    """Queue folding older messages into the rolling summary once enough have built up."""
+    if pending_summary(conversation):
+        jobs.enqueue(
+            'summarize', {'conversation_id': str(conversation.id)},
+            priority=jobs.PRIORITY_LOW, dedup_key=f"summary:{conversation.id}",
+        )
+
+
+def _pre_screen(user, conversation, text_message):
+    """
+    Rule-based triage of a new message before the model is called. Critical
+    cases are queued for the doctor dashboard at the front of the job queue.
+    Returns (triage result or None, whether a report was queued).
+    """
+    if conversation.conversation_type not in TRIAGE_TYPES or not conversation.child:
+        return None, False
+
+    try:
+        screened = triage_child(conversation.child, text_message)
+        if screened['urgency_level'] != 'critical':
+            return screened, False
+        jobs.enqueue('triage_report', {
+            'child_id': str(conversation.child_id),
+            'result': screened,
+            'conversation_type': conversation.conversation_type,
+            'transcript': f"USER: {text_message}",
+        }, priority=jobs.PRIORITY_CRITICAL)
+        return screened, True
+    except Exception as e:
+        logger.error(f"Triage failed: {e}")
+        return None, False
+
+
+def _queue_health_report(conversation, assistant_message):
+    """
+    Queue a HealthReport when the reply flags a health concern or lists symptoms.
+    Applies to chat and health-related conversations; critical reports go to
+    the front of the queue. Returns True if one was queued.
+    """
+    if conversation.conversation_type not in TRIAGE_TYPES or not conversation.child:
+        return False
+
+    try:
+        # Check if AI response contains health analysis JSON
+        analysis = extract_ai_analysis(assistant_message.content)
+        urgency = analysis.get('urgency_level') or 'normal'
+
+        # Normal chat without symptoms doesn't need a report
+        if urgency == 'normal' and not analysis.get('symptoms'):
+            return False
+
+        jobs.enqueue(
+            'health_report',
+            {'conversation_id': str(conversation.id), 'response_text': assistant_message.content},
+            priority=jobs.URGENCY_PRIORITY.get(urgency, jobs.PRIORITY_DEFAULT),
+            dedup_key=f"health_report:{assistant_message.id}",
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue health report: {e}")
+        return False
+
+
+def _future_result(future, timeout, label):
+    """Result of a background AI call, or None if it failed or ran past its timeout."""
+    if future is None:
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning(f"{label} timed out after {timeout}s")
+    except Exception as e:
+        logger.warning(f"{label} failed: {e}")
+    return None
+
+
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 # Helper functions for fallback responses when AI is not available
 
 def _get_fallback_response(conversation_type, user_message, context):
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import UserWallet, TokenTransaction, Donation, WithdrawalRequest
+from .models import (
+    UserWallet, TokenTransaction, Donation, WithdrawalRequest, ChainIntent, SignerState,
+    ChainEvent, WalletBalance, IndexerState,
+)
 
 
 @admin.register(UserWallet)
@@ -63,3 +66,35 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'approved_at', 'completed_at')
         }),
     )
+
+
+@admin.register(ChainIntent)
+class ChainIntentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'function_name', 'status', 'nonce', 'tx_hash', 'attempts', 'created_at')
+    list_filter = ('function_name', 'status', 'created_at')
+    search_fields = ('tx_hash',)
+    readonly_fields = ('nonce', 'tx_hash', 'raw_tx', 'fees', 'replaced_hashes', 'block_number', 'gas_used',
+                       'created_at', 'submitted_at', 'confirmed_at')
+
+
+@admin.register(SignerState)
+class SignerStateAdmin(admin.ModelAdmin):
+    list_display = ('address', 'next_nonce', 'updated_at')
+
+
+@admin.register(ChainEvent)
+class ChainEventAdmin(admin.ModelAdmin):
+    list_display = ('event_name', 'block_number', 'tx_hash', 'log_index', 'created_at')
+    list_filter = ('event_name',)
+    search_fields = ('tx_hash',)
+
+
+@admin.register(WalletBalance)
+class WalletBalanceAdmin(admin.ModelAdmin):
+    list_display = ('wallet_address', 'balance', 'updated_block', 'updated_at')
+    search_fields = ('wallet_address',)
+
+
+@admin.register(IndexerState)
+class IndexerStateAdmin(admin.ModelAdmin):
+    list_display = ('contract_address', 'last_block', 'total_supply', 'updated_at')
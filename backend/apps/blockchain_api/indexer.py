@@ -0,0 +1,135 @@
+"""
+Incremental indexer for BloomToken events
+Mirrors contract logs into ChainEvent and keeps WalletBalance / total supply
+up to date, so balance endpoints don't need a live RPC call.
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+import blockchain
+
+from .models import ChainEvent, WalletBalance, IndexerState, UserWallet
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = '0x' + '0' * 40
+
+
+class ChainIndexer:
+    """
+    Walks the chain in chunks from the persisted cursor up to
+    head - confirmations. Blocks that shallow can't be reorged out in
+    practice, so everything written is final and nothing is ever rolled back.
+    """
+
+    def __init__(self, confirmations=None, chunk_size=2000, start_block=None):
+        self.confirmations = settings.CHAIN_CONFIRMATIONS if confirmations is None else confirmations
+        self.chunk_size = chunk_size
+        self.start_block = settings.CHAIN_INDEX_START_BLOCK if start_block is None else start_block
+
+    def run_once(self):
+        """Index every confirmed block not yet seen. Returns (events indexed, last indexed block)."""
+        if not blockchain.contract:
+            logger.warning("Chain indexer idle: contract not initialized")
+            return 0, None
+
+        state, _ = IndexerState.objects.get_or_create(
+            contract_address=blockchain.contract.address.lower(),
+            defaults={'last_block': self.start_block - 1},
+        )
+        safe_head = blockchain.get_block_number() - self.confirmations
+
+        indexed = 0
+        while state.last_block < safe_head:
+            from_block = state.last_block + 1
+            to_block = min(from_block + self.chunk_size - 1, safe_head)
+            events = blockchain.get_contract_events(from_block, to_block)
+
+            with db_transaction.atomic():
+                state = IndexerState.objects.select_for_update().get(pk=state.pk)
+                if state.last_block >= from_block:
+                    # Another indexer got here first
+                    continue
+                self._apply(state, events, to_block)
+                state.last_block = to_block
+                state.save()
+
+            indexed += len(events)
+
+        return indexed, state.last_block
+
+    def _apply(self, state, events, to_block):
+        ChainEvent.objects.bulk_create([
+            ChainEvent(
+                event_name=e['event'],
+                tx_hash=e['tx_hash'],
+                log_index=e['log_index'],
+                block_number=e['block_number'],
+                args=e['args'],
+            )
+            for e in events
+        ])
+
+        # Balances and supply come from Transfer alone; mints and burns emit one too
+        deltas = {}
+        for e in events:
+            if e['event'] != 'Transfer':
+                continue
+            sender = e['args']['from'].lower()
+            recipient = e['args']['to'].lower()
+            value = Decimal(e['args']['value'])
+            if sender == ZERO_ADDRESS:
+                state.total_supply += value
+            else:
+                deltas[sender] = deltas.get(sender, 0) - value
+            if recipient == ZERO_ADDRESS:
+                state.total_supply -= value
+            else:
+                deltas[recipient] = deltas.get(recipient, 0) + value
+
+        if not deltas:
+            return
+
+        existing = {
+            b.wallet_address: b
+            for b in WalletBalance.objects.select_for_update().filter(wallet_address__in=deltas.keys())
+        }
+        new_rows = []
+        for address, delta in deltas.items():
+            row = existing.get(address)
+            if row is None:
+                new_rows.append(WalletBalance(wallet_address=address, balance=delta, updated_block=to_block))
+            else:
+                row.balance += delta
+                row.updated_block = to_block
+        WalletBalance.objects.bulk_create(new_rows)
+        WalletBalance.objects.bulk_update(existing.values(), ['balance', 'updated_block'])
+
+
+def reconcile_with_ledger():
+    """
+    Compare indexed on-chain balances with the off-chain apps.tokens ledger.
+    Returns (user, wallet_address, on_chain, off_chain) for every wallet that differs.
+    """
+    from apps.tokens.models import TokenBalance
+
+    wallets = list(UserWallet.objects.select_related('user'))
+    on_chain = {
+        b.wallet_address: int(b.balance)
+        for b in WalletBalance.objects.filter(wallet_address__in=[w.wallet_address.lower() for w in wallets])
+    }
+    off_chain = {
+        b.user_id: int(b.balance)
+        for b in TokenBalance.objects.filter(user_id__in=[w.user_id for w in wallets])
+    }
+
+    drift = []
+    for wallet in wallets:
+        chain_balance = on_chain.get(wallet.wallet_address.lower(), 0)
+        ledger_balance = off_chain.get(wallet.user_id, 0)
+        if chain_balance != ledger_balance:
+            drift.append((wallet.user, wallet.wallet_address, chain_balance, ledger_balance))
+    return drift
@@ -0,0 +1,65 @@
+"""
+Mirror BloomToken events into the database
+Usage: python manage.py index_chain_events [--once] [--reconcile]
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.blockchain_api.indexer import ChainIndexer, reconcile_with_ledger
+
+
+class Command(BaseCommand):
+    help = 'Index TokensMinted, TokensBurned, Transfer, DonationRecorded and WithdrawalCompleted events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Catch up to the confirmed head and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help='Seconds to sleep between polls (default: 10)',
+        )
+        parser.add_argument(
+            '--confirmations',
+            type=int,
+            default=None,
+            help='Blocks behind head to stay (default: CHAIN_CONFIRMATIONS)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Blocks per eth_getLogs request (default: 2000)',
+        )
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Catch up once, then report wallets whose on-chain balance differs from the token ledger',
+        )
+
+    def handle(self, *args, **options):
+        indexer = ChainIndexer(confirmations=options['confirmations'], chunk_size=options['chunk_size'])
+
+        while True:
+            try:
+                indexed, last_block = indexer.run_once()
+                if indexed:
+                    self.stdout.write(f'Indexed {indexed} events up to block {last_block}')
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Indexing failed: {e}'))
+
+            if options['once'] or options['reconcile']:
+                break
+            time.sleep(options['interval'])
+
+        if options['reconcile']:
+            drift = reconcile_with_ledger()
+            for user, address, on_chain, off_chain in drift:
+                self.stdout.write(f'  {user} ({address}): on-chain {on_chain}, ledger {off_chain}')
+            if drift:
+                self.stdout.write(self.style.WARNING(f'{len(drift)} wallet(s) differ from the ledger'))
+            else:
+                self.stdout.write(self.style.SUCCESS('On-chain balances match the ledger'))
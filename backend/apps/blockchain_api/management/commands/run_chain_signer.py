@@ -0,0 +1,68 @@
+"""
+Submit queued contract writes and track their receipts
+Usage: python manage.py run_chain_signer [--once]
+Run exactly one of these per admin account.
+"""
+import time
+from django.core.management.base import BaseCommand
+import blockchain
+from apps.blockchain_api.outbox import ChainSigner
+
+
+class Command(BaseCommand):
+    help = 'Run the blockchain outbox signer: assigns nonces, broadcasts queued intents and records receipts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process one round and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between idle rounds (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum intents submitted per round (default: 50)',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Submission attempts before an intent is marked failed (default: 5)',
+        )
+        parser.add_argument(
+            '--mint-window',
+            type=int,
+            default=None,
+            help='Seconds to gather mints per wallet before submitting (default: CHAIN_MINT_BATCH_SECONDS)',
+        )
+
+    def handle(self, *args, **options):
+        signer = ChainSigner(
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            mint_window=options['mint_window'],
+        )
+
+        while True:
+            try:
+                submitted, settled = signer.run_once()
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Signer round failed: {e}'))
+                submitted = settled = 0
+
+            if submitted or settled:
+                self.stdout.write(f'Submitted {submitted}, settled {settled}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Fee oracle: {blockchain.get_fee_metrics()}')
+
+            if options['once']:
+                break
+            if not submitted:
+                time.sleep(options['interval'])
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42, unique=True)),
+                ('next_nonce', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='tokentransaction',
+            name='tx_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Blockchain transaction hash (empty until the outbox submits it)', max_length=66, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='ChainIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('function_name', models.CharField(choices=[('recordDonation', 'Record Donation'), ('mintTokens', 'Mint Tokens'), ('burnTokens', 'Burn Tokens'), ('recordWithdrawal', 'Record Withdrawal')], max_length=30)),
+                ('args', models.JSONField(default=list, help_text='Positional contract call arguments')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('SUBMITTED', 'Submitted'), ('CONFIRMED', 'Confirmed'), ('FAILED', 'Failed')], db_index=True, default='QUEUED', max_length=20)),
+                ('nonce', models.IntegerField(blank=True, null=True)),
+                ('tx_hash', models.CharField(blank=True, db_index=True, max_length=66, null=True)),
+                ('block_number', models.IntegerField(blank=True, null=True)),
+                ('gas_used', models.IntegerField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('depends_on', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dependents', to='blockchain_api.chainintent')),
+                ('donation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intents', to='blockchain_api.donation')),
+                ('token_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intents', to='blockchain_api.tokentransaction')),
+                ('withdrawal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intents', to='blockchain_api.withdrawalrequest')),
+            ],
+            options={
+                'verbose_name': 'Chain Intent',
+                'verbose_name_plural': 'Chain Intents',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='blockchain__status_dff502_idx')],
+            },
+        ),
+    ]
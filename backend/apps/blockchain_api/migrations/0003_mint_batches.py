@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_api', '0002_chain_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chainintent',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='blockchain_api.chainintent'),
+        ),
+        migrations.AddField(
+            model_name='chainintent',
+            name='is_batch',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tokentransaction',
+            name='batch_transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batched_transactions', to='blockchain_api.tokentransaction'),
+        ),
+        migrations.AlterField(
+            model_name='chainintent',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SUBMITTED', 'Submitted'), ('CONFIRMED', 'Confirmed'), ('FAILED', 'Failed'), ('BATCHED', 'Merged into a batch')], db_index=True, default='QUEUED', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='tokentransaction',
+            name='action_type',
+            field=models.CharField(choices=[('checkup', 'Health Checkup'), ('education', 'Educational Module'), ('donation', 'Platform Donation'), ('withdrawal', 'Token Withdrawal'), ('batch', 'Batched Rewards')], max_length=20),
+        ),
+    ]
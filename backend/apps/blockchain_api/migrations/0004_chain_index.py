@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_api', '0003_mint_batches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract_address', models.CharField(max_length=42, unique=True)),
+                ('last_block', models.IntegerField(default=0, help_text='Last block fully indexed')),
+                ('total_supply', models.DecimalField(decimal_places=0, default=0, max_digits=78)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WalletBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet_address', models.CharField(db_index=True, max_length=42, unique=True)),
+                ('balance', models.DecimalField(decimal_places=0, default=0, max_digits=78)),
+                ('updated_block', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Wallet Balance',
+                'verbose_name_plural': 'Wallet Balances',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChainEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_name', models.CharField(db_index=True, max_length=50)),
+                ('tx_hash', models.CharField(db_index=True, max_length=66)),
+                ('log_index', models.IntegerField()),
+                ('block_number', models.IntegerField(db_index=True)),
+                ('args', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Chain Event',
+                'verbose_name_plural': 'Chain Events',
+                'ordering': ['block_number', 'log_index'],
+                'unique_together': {('tx_hash', 'log_index')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_api', '0004_chain_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chainintent',
+            name='gas_limit',
+            field=models.IntegerField(blank=True, help_text='Gas limit the transaction was sent with', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_api', '0005_intent_gas_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chainintent',
+            name='fees',
+            field=models.JSONField(blank=True, default=dict, help_text='maxFeePerGas / maxPriorityFeePerGas it was signed with'),
+        ),
+        migrations.AddField(
+            model_name='chainintent',
+            name='raw_tx',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='chainintent',
+            name='replaced_hashes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='chainintent',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SIGNED', 'Signed, not yet broadcast'), ('SUBMITTED', 'Submitted'), ('CONFIRMED', 'Confirmed'), ('FAILED', 'Failed'), ('BATCHED', 'Merged into a batch')], db_index=True, default='QUEUED', max_length=20),
+        ),
+    ]
@@ -42,6 +42,7 @@ class TokenTransaction(models.Model):
         ('education', 'Educational Module'),
         ('donation', 'Platform Donation'),
         ('withdrawal', 'Token Withdrawal'),
+        ('batch', 'Batched Rewards'),
     ]
 
     user_wallet = models.ForeignKey(UserWallet, on_delete=models.CASCADE, related_name='transactions')
@@ -54,10 +55,13 @@ class TokenTransaction(models.Model):
     naira_equivalent = models.DecimalField(max_digits=10, decimal_places=2, help_text="Naira value (1 BLOOM = ₦2)")
 
     # Blockchain data
-    tx_hash = models.CharField(max_length=66, unique=True, db_index=True, help_text="Blockchain transaction hash")
+    tx_hash = models.CharField(max_length=66, unique=True, db_index=True, null=True, blank=True, help_text="Blockchain transaction hash (empty until the outbox submits it)")
     block_number = models.IntegerField(null=True, blank=True)
     gas_used = models.IntegerField(null=True, blank=True)
 
+    # Set on rewards minted as part of a batch; the batch row holds the tx hash and gas
+    batch_transaction = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='batched_transactions')
+
     # Metadata
     status = models.CharField(max_length=20, default='PENDING', choices=[
         ('PENDING', 'Pending'),
@@ -77,7 +81,7 @@ class TokenTransaction(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.transaction_type} - {self.token_amount} BLOOM - {self.tx_hash[:10]}..."
+        return f"{self.transaction_type} - {self.token_amount} BLOOM - {(self.tx_hash or 'pending')[:10]}..."
 
     def save(self, *args, **kwargs):
         # Auto-calculate naira equivalent (1 BLOOM = ₦2)
@@ -192,3 +196,143 @@ class WithdrawalRequest(models.Model):
         if self.token_amount and not self.naira_amount:
             self.naira_amount = self.token_amount * 2
         super().save(*args, **kwargs)
+
+
+class ChainIntent(models.Model):
+    """
+    Outbox of contract writes waiting to go on-chain.
+    Views enqueue intents and return immediately; the run_chain_signer worker
+    assigns nonces, broadcasts them back to back and tracks receipts.
+    """
+    FUNCTION_CHOICES = [
+        ('recordDonation', 'Record Donation'),
+        ('mintTokens', 'Mint Tokens'),
+        ('burnTokens', 'Burn Tokens'),
+        ('recordWithdrawal', 'Record Withdrawal'),
+    ]
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('SIGNED', 'Signed, not yet broadcast'),
+        ('SUBMITTED', 'Submitted'),
+        ('CONFIRMED', 'Confirmed'),
+        ('FAILED', 'Failed'),
+        ('BATCHED', 'Merged into a batch'),
+    ]
+
+    function_name = models.CharField(max_length=30, choices=FUNCTION_CHOICES)
+    args = models.JSONField(default=list, help_text="Positional contract call arguments")
+    status = models.CharField(max_length=20, default='QUEUED', choices=STATUS_CHOICES, db_index=True)
+
+    # Only submitted once this intent is confirmed (e.g. record withdrawal after burn)
+    depends_on = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='dependents')
+
+    # Per-wallet mint coalescing: members point at the batch intent that carries them
+    is_batch = models.BooleanField(default=False)
+    batch = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='members')
+
+    # Records to update with the result
+    token_transaction = models.ForeignKey(TokenTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='intents')
+    donation = models.ForeignKey(Donation, on_delete=models.SET_NULL, null=True, blank=True, related_name='intents')
+    withdrawal = models.ForeignKey(WithdrawalRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='intents')
+
+    # Chain data
+    nonce = models.IntegerField(null=True, blank=True)
+    tx_hash = models.CharField(max_length=66, null=True, blank=True, db_index=True)
+    # Signed transaction saved before broadcasting; rebroadcast as-is after a crash
+    raw_tx = models.TextField(blank=True)
+    fees = models.JSONField(default=dict, blank=True, help_text="maxFeePerGas / maxPriorityFeePerGas it was signed with")
+    # Earlier hashes for the same nonce, replaced with higher fees; any of them may be mined
+    replaced_hashes = models.JSONField(default=list, blank=True)
+    block_number = models.IntegerField(null=True, blank=True)
+    gas_limit = models.IntegerField(null=True, blank=True, help_text="Gas limit the transaction was sent with")
+    gas_used = models.IntegerField(null=True, blank=True)
+
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Chain Intent"
+        verbose_name_plural = "Chain Intents"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.function_name} #{self.id} - {self.status}"
+
+
+class SignerState(models.Model):
+    """
+    Single row holding the admin account's next nonce.
+    The signer locks it for each round so only one worker signs at a time.
+    """
+    address = models.CharField(max_length=42, unique=True)
+    next_nonce = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.address} - next nonce {self.next_nonce}"
+
+
+class ChainEvent(models.Model):
+    """
+    BloomToken log mirrored by the index_chain_events command
+    Only blocks past the confirmation depth are indexed, so rows are final
+    """
+    event_name = models.CharField(max_length=50, db_index=True)
+    tx_hash = models.CharField(max_length=66, db_index=True)
+    log_index = models.IntegerField()
+    block_number = models.IntegerField(db_index=True)
+    args = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Chain Event"
+        verbose_name_plural = "Chain Events"
+        ordering = ['block_number', 'log_index']
+        unique_together = ['tx_hash', 'log_index']
+
+    def __str__(self):
+        return f"{self.event_name} @ {self.block_number} - {self.tx_hash[:10]}..."
+
+
+class WalletBalance(models.Model):
+    """On-chain BLOOM balance per address, maintained from indexed Transfer events"""
+    wallet_address = models.CharField(max_length=42, unique=True, db_index=True)
+    balance = models.DecimalField(max_digits=78, decimal_places=0, default=0)
+    updated_block = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Wallet Balance"
+        verbose_name_plural = "Wallet Balances"
+
+    @classmethod
+    def balance_of(cls, wallet_address):
+        """Indexed balance for an address (stored lowercased), 0 if it has never received tokens"""
+        row = cls.objects.filter(wallet_address=wallet_address.lower()).only('balance').first()
+        return int(row.balance) if row else 0
+
+    def __str__(self):
+        return f"{self.wallet_address[:10]}... - {self.balance} BLOOM"
+
+
+class IndexerState(models.Model):
+    """Single row holding the event indexer's block cursor and the indexed total supply"""
+    contract_address = models.CharField(max_length=42, unique=True)
+    last_block = models.IntegerField(default=0, help_text="Last block fully indexed")
+    total_supply = models.DecimalField(max_digits=78, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.order_by('-updated_at').first()
+
+    def __str__(self):
+        return f"{self.contract_address} - block {self.last_block}"
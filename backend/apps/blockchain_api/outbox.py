@@ -0,0 +1,420 @@
+"""
+Persistent outbox for BloomToken contract writes
+Views enqueue intents inside their own DB transaction and return right away;
+the run_chain_signer worker assigns nonces, broadcasts and tracks receipts.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+from web3 import Web3
+
+import blockchain
+
+from .models import ChainIntent, SignerState, TokenTransaction
+
+logger = logging.getLogger(__name__)
+
+# Node errors meaning our local nonce is out of step with the chain
+NONCE_ERRORS = ('nonce too low', 'already known', 'replacement transaction underpriced')
+
+
+def enqueue_mint(token_tx, wallet_address, amount, action_type, action_id):
+    """Queue a mintTokens call whose result is written back to token_tx"""
+    return ChainIntent.objects.create(
+        function_name='mintTokens',
+        args=[wallet_address, int(amount), action_type, action_id],
+        token_transaction=token_tx,
+    )
+
+
+def enqueue_donation(donation, amount_naira, reference, donor_email):
+    """Queue a recordDonation call whose result is written back to donation"""
+    return ChainIntent.objects.create(
+        function_name='recordDonation',
+        args=[int(float(amount_naira)), reference, donor_email],
+        donation=donation,
+    )
+
+
+def enqueue_withdrawal(withdrawal, burn_tx, payment_reference='PENDING_MANUAL_PAYMENT'):
+    """
+    Queue the burn for an approved withdrawal, then the withdrawal record.
+    The record is only submitted once the burn is confirmed.
+    """
+    withdrawal_id = f"WD_{withdrawal.id}"
+    wallet_address = withdrawal.user_wallet.wallet_address
+    burn = ChainIntent.objects.create(
+        function_name='burnTokens',
+        args=[wallet_address, int(withdrawal.token_amount), withdrawal_id],
+        token_transaction=burn_tx,
+        withdrawal=withdrawal,
+    )
+    record = ChainIntent.objects.create(
+        function_name='recordWithdrawal',
+        args=[wallet_address, int(withdrawal.token_amount), int(withdrawal.naira_amount),
+              withdrawal_id, payment_reference],
+        withdrawal=withdrawal,
+        depends_on=burn,
+    )
+    return burn, record
+
+
+def merkle_root(action_ids):
+    """
+    Keccak Merkle root over the sorted action ids of a mint batch.
+    Submitted as the batch's on-chain actionId so each reward can be audited.
+    """
+    level = [Web3.keccak(text=str(action_id)) for action_id in sorted(action_ids)]
+    if not level:
+        return None
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            Web3.keccak(min(left, right) + max(left, right))
+            for left, right in zip(level[0::2], level[1::2])
+        ]
+    return Web3.to_hex(level[0])
+
+
+def _bumped_fees(old, current):
+    """Fees for a replacement transaction: current fees, but at least 12.5% over the old ones"""
+    return {key: max(int(current[key]), int(old.get(key, 0)) * 9 // 8 + 1) for key in current}
+
+
+class ChainSigner:
+    """
+    Single signer for the admin account. Each round it locks SignerState,
+    signs ready intents with locally assigned nonces and commits them (status
+    SIGNED) before anything is broadcast. Signed transactions are then
+    broadcast back to back, and receipts are polled for everything in flight
+    without blocking on any of them. A crash after signing only ever leads to
+    the same stored transaction being broadcast again, never a second one.
+    Transactions left unmined for rebroadcast_after seconds are rebroadcast,
+    replaced with higher fees, or requeued if their nonce was used elsewhere.
+    """
+
+    def __init__(self, batch_size=50, max_attempts=5, mint_window=None, rebroadcast_after=None):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.mint_window = settings.CHAIN_MINT_BATCH_SECONDS if mint_window is None else mint_window
+        self.rebroadcast_after = (
+            settings.CHAIN_REBROADCAST_SECONDS if rebroadcast_after is None else rebroadcast_after
+        )
+
+    def run_once(self):
+        submitted = self.submit_queued()
+        settled = self.check_receipts()
+        return submitted, settled
+
+    def submit_queued(self):
+        if not blockchain.admin_account or not blockchain.contract:
+            logger.warning("Chain signer idle: admin account or contract not initialized")
+            return 0
+
+        self.sign_queued()
+        return self.broadcast_signed()
+
+    def sign_queued(self):
+        """Assign nonces to ready intents and store their signed transactions. Nothing is broadcast."""
+        signed = 0
+        with db_transaction.atomic():
+            state, _ = SignerState.objects.select_for_update().get_or_create(
+                address=blockchain.admin_account.address
+            )
+            self._sync_nonce(state)
+
+            cutoff = timezone.now() - timedelta(seconds=self.mint_window)
+            self._coalesce_mints(cutoff)
+
+            ready = Q(depends_on__isnull=True) | Q(depends_on__status__in=['CONFIRMED', 'FAILED'])
+            # Mints still inside their batching window wait for more rewards to the same wallet
+            gathering = Q(function_name='mintTokens', is_batch=False, created_at__gt=cutoff)
+            intents = list(
+                ChainIntent.objects.select_for_update(of=('self',))
+                .select_related('depends_on')
+                .filter(ready, status='QUEUED')
+                .exclude(gathering)[:self.batch_size]
+            )
+            if not intents:
+                state.save()
+                return 0
+
+            # One cached fee quote for the whole round
+            fees = blockchain.get_fees()
+
+            for intent in intents:
+                dependency = intent.depends_on
+                if dependency and dependency.status == 'FAILED':
+                    self._fail(intent, f"Dependency #{dependency.id} failed")
+                    continue
+
+                try:
+                    tx = blockchain.sign_contract_transaction(
+                        intent.function_name, intent.args, state.next_nonce, fees=fees
+                    )
+                except Exception as e:
+                    # e.g. gas estimation reverted; the nonce was not used
+                    message = str(e)
+                    intent.attempts += 1
+                    intent.last_error = message
+                    if intent.attempts >= self.max_attempts:
+                        self._fail(intent, message)
+                    else:
+                        intent.save(update_fields=['attempts', 'last_error'])
+                    continue
+
+                intent.nonce = state.next_nonce
+                self._store_signed(intent, tx)
+                intent.save(update_fields=['nonce', 'tx_hash', 'raw_tx', 'gas_limit', 'fees', 'status'])
+
+                state.next_nonce += 1
+                signed += 1
+
+            state.save()
+
+        return signed
+
+    def broadcast_signed(self):
+        """Broadcast stored transactions in nonce order; failures stay SIGNED and are retried as-is."""
+        submitted = 0
+        for intent in ChainIntent.objects.filter(status='SIGNED').order_by('nonce')[:self.batch_size]:
+            try:
+                blockchain.broadcast_raw_transaction(intent.raw_tx)
+            except Exception as e:
+                message = str(e)
+                if not any(err in message.lower() for err in NONCE_ERRORS):
+                    intent.attempts += 1
+                    intent.last_error = message
+                    intent.save(update_fields=['attempts', 'last_error'])
+                    logger.warning(f"Broadcast of {intent} failed, will retry the same transaction: {message}")
+                    continue
+                # Already in the mempool or its nonce is used (maybe by this very transaction,
+                # broadcast before a crash); the receipt check settles it
+                logger.info(f"Broadcast of {intent}: {message}")
+
+            with db_transaction.atomic():
+                intent.status = 'SUBMITTED'
+                intent.submitted_at = timezone.now()
+                intent.attempts += 1
+                intent.save(update_fields=['status', 'submitted_at', 'attempts'])
+                self._apply_submitted(intent)
+            submitted += 1
+        return submitted
+
+    def check_receipts(self):
+        settled = 0
+        in_flight = list(ChainIntent.objects.filter(status='SUBMITTED').order_by('nonce')[:self.batch_size * 4])
+        stale_before = timezone.now() - timedelta(seconds=self.rebroadcast_after)
+
+        # Read before the receipts, so a transaction mined in between is seen as mined, not as lost
+        mined_nonce = None
+        if any(intent.submitted_at and intent.submitted_at < stale_before for intent in in_flight):
+            try:
+                mined_nonce = blockchain.get_mined_nonce()
+            except Exception as e:
+                logger.warning(f"Nonce lookup failed: {e}")
+
+        for intent in in_flight:
+            try:
+                tx_hash, receipt = self._find_receipt(intent)
+            except Exception as e:
+                logger.warning(f"Receipt lookup failed for {intent.tx_hash}: {e}")
+                continue
+            if receipt is None:
+                if mined_nonce is not None and intent.submitted_at and intent.submitted_at < stale_before:
+                    self._handle_stale(intent, mined_nonce)
+                continue
+            if intent.gas_limit:
+                blockchain.record_gas_used(intent.function_name, intent.gas_limit, receipt['gas_used'])
+
+            with db_transaction.atomic():
+                if tx_hash != intent.tx_hash:
+                    # An earlier transaction for this nonce was mined, not its replacement
+                    intent.tx_hash = tx_hash
+                    intent.save(update_fields=['tx_hash'])
+                    self._apply_submitted(intent)
+                intent.block_number = receipt['block_number']
+                intent.gas_used = receipt['gas_used']
+                if receipt['status'] == 1:
+                    intent.status = 'CONFIRMED'
+                    intent.confirmed_at = timezone.now()
+                    intent.save(update_fields=['status', 'block_number', 'gas_used', 'confirmed_at'])
+                    self._apply_confirmed(intent)
+                else:
+                    intent.save(update_fields=['block_number', 'gas_used'])
+                    self._fail(intent, 'Transaction reverted')
+            settled += 1
+        return settled
+
+    def _find_receipt(self, intent):
+        """(tx_hash, receipt) for whichever transaction sent for this intent was mined, else (None, None)"""
+        for tx_hash in [intent.tx_hash, *intent.replaced_hashes]:
+            receipt = blockchain.get_receipt(tx_hash)
+            if receipt is not None:
+                return tx_hash, receipt
+        return None, None
+
+    def _handle_stale(self, intent, mined_nonce):
+        """
+        A submitted transaction still unmined after rebroadcast_after seconds.
+        Its nonce used without any of its transactions mined: someone else took
+        the nonce, so the intent is requeued for a new one. Still pending: it is
+        replaced with higher fees. Dropped from the mempool: the stored
+        transaction is broadcast again.
+        """
+        if intent.nonce < mined_nonce:
+            logger.warning(f"Nonce {intent.nonce} of {intent} was used by another transaction, requeueing")
+            intent.status = 'QUEUED'
+            intent.nonce = None
+            intent.tx_hash = None
+            intent.raw_tx = ''
+            intent.fees = {}
+            intent.replaced_hashes = []
+            intent.save(update_fields=['status', 'nonce', 'tx_hash', 'raw_tx', 'fees', 'replaced_hashes'])
+            return
+
+        try:
+            pending = blockchain.is_transaction_pending(intent.tx_hash)
+            if pending:
+                tx = blockchain.sign_contract_transaction(
+                    intent.function_name, intent.args, intent.nonce,
+                    fees=_bumped_fees(intent.fees, blockchain.get_fees()),
+                )
+        except Exception as e:
+            logger.warning(f"Could not rebroadcast {intent}: {e}")
+            return
+
+        if pending:
+            logger.info(f"Replacing {intent} ({intent.tx_hash}) with higher fees")
+            intent.replaced_hashes = [*intent.replaced_hashes, intent.tx_hash]
+            self._store_signed(intent, tx)
+            intent.save(update_fields=['tx_hash', 'raw_tx', 'gas_limit', 'fees', 'replaced_hashes', 'status'])
+        else:
+            logger.info(f"{intent} ({intent.tx_hash}) dropped from the mempool, rebroadcasting")
+            intent.status = 'SIGNED'
+            intent.save(update_fields=['status'])
+
+    def _store_signed(self, intent, tx):
+        intent.tx_hash = tx['tx_hash']
+        intent.raw_tx = tx['raw_tx']
+        intent.gas_limit = tx['gas']
+        intent.fees = tx['fees']
+        intent.status = 'SIGNED'
+
+    def _coalesce_mints(self, cutoff):
+        """
+        Merge queued mints for the same wallet into one mintTokens call once the
+        oldest of them has waited mint_window seconds. The batch mints the summed
+        amount with actionType 'batch' and the Merkle root of the member action ids.
+        """
+        pending = (
+            ChainIntent.objects.select_for_update(of=('self',))
+            .select_related('token_transaction')
+            .filter(status='QUEUED', function_name='mintTokens', is_batch=False)
+            .order_by('id')
+        )
+
+        by_wallet = {}
+        for intent in pending:
+            by_wallet.setdefault(intent.args[0].lower(), []).append(intent)
+
+        for members in by_wallet.values():
+            if len(members) < 2 or members[0].created_at > cutoff:
+                continue
+
+            wallet_address = members[0].args[0]
+            total = sum(int(member.args[1]) for member in members)
+            root = merkle_root([member.args[3] for member in members])
+
+            batch_tx = None
+            member_tx = next((m.token_transaction for m in members if m.token_transaction_id), None)
+            if member_tx:
+                batch_tx = TokenTransaction.objects.create(
+                    user_wallet=member_tx.user_wallet,
+                    transaction_type='MINT',
+                    action_type='batch',
+                    action_id=root,
+                    token_amount=total,
+                    status='PENDING',
+                )
+                TokenTransaction.objects.filter(
+                    id__in=[m.token_transaction_id for m in members if m.token_transaction_id]
+                ).update(batch_transaction=batch_tx)
+
+            batch = ChainIntent.objects.create(
+                function_name='mintTokens',
+                args=[wallet_address, total, 'batch', root],
+                token_transaction=batch_tx,
+                is_batch=True,
+            )
+            ChainIntent.objects.filter(id__in=[m.id for m in members]).update(status='BATCHED', batch=batch)
+            logger.info(f"Batched {len(members)} mints ({total} BLOOM) for {wallet_address} into intent #{batch.id}")
+
+    def _sync_nonce(self, state):
+        # Never step backwards: a lagging RPC node may not have seen our latest submissions yet
+        state.next_nonce = max(state.next_nonce, blockchain.get_pending_nonce())
+
+    def _fail(self, intent, message):
+        intent.status = 'FAILED'
+        intent.last_error = message
+        intent.save(update_fields=['status', 'last_error', 'attempts'])
+        logger.error(f"Chain intent {intent} failed: {message}")
+
+        if intent.token_transaction_id:
+            intent.token_transaction.status = 'FAILED'
+            intent.token_transaction.save(update_fields=['status'])
+        if intent.is_batch:
+            intent.members.update(status='FAILED', last_error=message)
+            TokenTransaction.objects.filter(batch_transaction_id=intent.token_transaction_id).update(status='FAILED')
+        if intent.withdrawal_id:
+            withdrawal = intent.withdrawal
+            withdrawal.status = 'FAILED'
+            withdrawal.admin_notes = f"{withdrawal.admin_notes}\n{intent.function_name} failed: {message}".strip()
+            withdrawal.save(update_fields=['status', 'admin_notes'])
+
+    def _apply_submitted(self, intent):
+        if intent.token_transaction_id:
+            intent.token_transaction.tx_hash = intent.tx_hash
+            intent.token_transaction.save(update_fields=['tx_hash'])
+        if intent.donation_id:
+            intent.donation.blockchain_tx_hash = intent.tx_hash
+            intent.donation.save(update_fields=['blockchain_tx_hash'])
+        if intent.withdrawal_id:
+            if intent.function_name == 'burnTokens':
+                intent.withdrawal.burn_tx_hash = intent.tx_hash
+                intent.withdrawal.save(update_fields=['burn_tx_hash'])
+            else:
+                intent.withdrawal.withdrawal_tx_hash = intent.tx_hash
+                intent.withdrawal.save(update_fields=['withdrawal_tx_hash'])
+
+    def _apply_confirmed(self, intent):
+        now = timezone.now()
+        if intent.token_transaction_id:
+            token_tx = intent.token_transaction
+            token_tx.status = 'CONFIRMED'
+            token_tx.block_number = intent.block_number
+            token_tx.gas_used = intent.gas_used
+            token_tx.confirmed_at = now
+            token_tx.save(update_fields=['status', 'block_number', 'gas_used', 'confirmed_at'])
+        if intent.is_batch:
+            # Gas is recorded once, on the batch row
+            intent.members.update(status='CONFIRMED', block_number=intent.block_number, confirmed_at=now)
+            TokenTransaction.objects.filter(batch_transaction_id=intent.token_transaction_id).update(
+                status='CONFIRMED', block_number=intent.block_number, confirmed_at=now
+            )
+        if intent.donation_id:
+            intent.donation.blockchain_recorded = True
+            intent.donation.recorded_at = now
+            intent.donation.save(update_fields=['blockchain_recorded', 'recorded_at'])
+        if intent.withdrawal_id:
+            if intent.function_name == 'burnTokens':
+                intent.withdrawal.burn_confirmed = True
+                intent.withdrawal.save(update_fields=['burn_confirmed'])
+            else:
+                intent.withdrawal.withdrawal_recorded = True
+                intent.withdrawal.save(update_fields=['withdrawal_recorded'])
@@ -30,18 +30,19 @@ class TokenTransactionSerializer(serializers.ModelSerializer):
             'id', 'user_wallet', 'wallet_address', 'username',
             'transaction_type', 'action_type', 'action_id',
             'token_amount', 'naira_equivalent',
-            'tx_hash', 'block_number', 'gas_used',
+            'tx_hash', 'block_number', 'gas_used', 'batch_transaction',
             'status', 'created_at', 'confirmed_at', 'explorer_url'
         ]
         read_only_fields = [
-            'id', 'tx_hash', 'block_number', 'gas_used',
+            'id', 'tx_hash', 'block_number', 'gas_used', 'batch_transaction',
             'status', 'created_at', 'confirmed_at'
         ]
 
     def get_explorer_url(self, obj):
-        """Generate Basescan explorer URL for transaction"""
-        if obj.tx_hash:
-            return f"https://sepolia.basescan.org/tx/{obj.tx_hash}"
+        """Generate Basescan explorer URL for transaction (the batch's, for batched rewards)"""
+        tx_hash = obj.tx_hash or (obj.batch_transaction.tx_hash if obj.batch_transaction_id else None)
+        if tx_hash:
+            return f"https://sepolia.basescan.org/tx/{tx_hash}"
         return None
 
 
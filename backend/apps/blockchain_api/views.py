@@ -15,8 +15,11 @@ from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db import transaction as db_transaction
+from django.db.models import Avg, Count
 
-from .models import UserWallet, TokenTransaction, Donation, WithdrawalRequest
+from .models import (
+    UserWallet, TokenTransaction, Donation, WithdrawalRequest, WalletBalance, IndexerState, ChainIntent
+)
 from .serializers import (
     UserWalletSerializer, TokenTransactionSerializer,
     DonationSerializer, WithdrawalRequestSerializer,
@@ -27,6 +30,7 @@ from .serializers import (
 
 # Import our blockchain integration module
 import blockchain
+from . import outbox
 
 
 class UserWalletViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,22 +38,24 @@ class UserWalletViewSet(viewsets.ReadOnlyModelViewSet):
     API endpoint for viewing user wallets
     GET /api/wallets/ - List all wallets
     GET /api/wallets/{id}/ - Get specific wallet
-    GET /api/wallets/{id}/balance/ - Get wallet balance from blockchain
+    GET /api/wallets/{id}/balance/ - Get wallet balance from the chain event index
     """
     queryset = UserWallet.objects.all()
     serializer_class = UserWalletSerializer
 
     @action(detail=True, methods=['get'])
     def balance(self, request, pk=None):
-        """Get real-time balance from blockchain"""
+        """Get balance from the indexed chain events (see index_chain_events)"""
         wallet = self.get_object()
         try:
-            balance = blockchain.get_balance(wallet.wallet_address)
+            balance = WalletBalance.balance_of(wallet.wallet_address)
+            state = IndexerState.current()
             return Response({
                 'wallet_address': wallet.wallet_address,
                 'balance': balance,
                 'naira_equivalent': balance * 2,  # 1 BLOOM = ₦2
-                'token_symbol': 'BLOOM'
+                'token_symbol': 'BLOOM',
+                'indexed_block': state.last_block if state else None,
             })
         except Exception as e:
             return Response(
@@ -167,46 +173,32 @@ def mint_tokens(request):
     try:
         user_wallet = UserWallet.objects.get(id=serializer.validated_data['user_wallet_id'])
 
-        # Mint tokens on blockchain
-        result = blockchain.mint_tokens(
-            user_wallet=user_wallet.wallet_address,
-            amount=serializer.validated_data['amount'],
-            action_type=serializer.validated_data['action_type'],
-            action_id=serializer.validated_data['action_id']
-        )
-
-        if result['success']:
-            # Record transaction in database
+        with db_transaction.atomic():
+            # Record the pending transaction and queue the mint for the signer worker
             token_tx = TokenTransaction.objects.create(
                 user_wallet=user_wallet,
                 transaction_type='MINT',
                 action_type=serializer.validated_data['action_type'],
                 action_id=serializer.validated_data['action_id'],
                 token_amount=serializer.validated_data['amount'],
-                tx_hash=result['signature'],
-                block_number=result.get('block_number'),
-                gas_used=result.get('gas_used'),
-                status='CONFIRMED',
-                confirmed_at=timezone.now()
+                status='PENDING',
             )
-
-            return Response({
-                'success': True,
-                'transaction': TokenTransactionSerializer(token_tx).data,
-                'blockchain': {
-                    'tx_hash': result['signature'],
-                    'explorer_url': result['explorer_url'],
-                    'block_number': result.get('block_number'),
-                    'gas_used': result.get('gas_used')
-                },
-                'message': f"{serializer.validated_data['amount']} BLOOM tokens minted successfully"
-            }, status=status.HTTP_201_CREATED)
-        else:
-            return Response(
-                {'error': f"Blockchain transaction failed: {result['error']}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            intent = outbox.enqueue_mint(
+                token_tx,
+                wallet_address=user_wallet.wallet_address,
+                amount=serializer.validated_data['amount'],
+                action_type=serializer.validated_data['action_type'],
+                action_id=serializer.validated_data['action_id'],
             )
 
+        return Response({
+            'success': True,
+            'status': 'PENDING',
+            'intent_id': intent.id,
+            'transaction': TokenTransactionSerializer(token_tx).data,
+            'message': f"Minting {serializer.validated_data['amount']} BLOOM tokens. Poll the transaction for confirmation."
+        }, status=status.HTTP_202_ACCEPTED)
+
     except UserWallet.DoesNotExist:
         return Response(
             {'error': 'Wallet not found'},
@@ -262,33 +254,20 @@ def paystack_webhook(request):
                 paid_at=timezone.now()
             )
 
-            # Record on blockchain
-            blockchain_result = blockchain.record_deposit(
-                amount_naira=int(amount_naira),
+            # Queue the on-chain record; the signer worker fills in the tx hash
+            intent = outbox.enqueue_donation(
+                donation,
+                amount_naira=amount_naira,
                 reference=reference,
                 donor_email=donor_email
             )
 
-            if blockchain_result['success']:
-                donation.blockchain_tx_hash = blockchain_result['signature']
-                donation.blockchain_recorded = True
-                donation.recorded_at = timezone.now()
-                donation.save()
-
-                return Response({
-                    'success': True,
-                    'donation_id': donation.id,
-                    'blockchain_tx': blockchain_result['signature'],
-                    'explorer_url': blockchain_result['explorer_url']
-                }, status=status.HTTP_201_CREATED)
-            else:
-                # Payment succeeded but blockchain recording failed
-                # Keep donation record but mark as not recorded
-                return Response({
-                    'warning': 'Payment recorded but blockchain recording failed',
-                    'donation_id': donation.id,
-                    'error': blockchain_result['error']
-                }, status=status.HTTP_202_ACCEPTED)
+        return Response({
+            'success': True,
+            'status': 'PENDING',
+            'donation_id': donation.id,
+            'intent_id': intent.id,
+        }, status=status.HTTP_202_ACCEPTED)
 
     except Exception as e:
         return Response(
@@ -318,8 +297,8 @@ def create_withdrawal_request(request):
     try:
         user_wallet = UserWallet.objects.get(id=serializer.validated_data['user_wallet_id'])
 
-        # Check if user has enough balance
-        current_balance = blockchain.get_balance(user_wallet.wallet_address)
+        # Check if user has enough balance (indexed on-chain balance)
+        current_balance = WalletBalance.balance_of(user_wallet.wallet_address)
         requested_amount = serializer.validated_data['token_amount']
 
         if current_balance < requested_amount:
@@ -401,78 +380,43 @@ def approve_withdrawal(request):
 
         elif action == 'approve':
             with db_transaction.atomic():
-                # Step 1: Burn tokens from user's wallet
-                burn_result = blockchain.burn_tokens(
-                    user_wallet=withdrawal.user_wallet.wallet_address,
-                    amount=withdrawal.token_amount,
-                    withdrawal_id=f"WD_{withdrawal.id}"
-                )
-
-                if not burn_result['success']:
-                    return Response(
-                        {'error': f"Failed to burn tokens: {burn_result['error']}"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-
-                # Step 2: Record withdrawal on blockchain
-                # Note: Admin must process actual payment separately
-                withdrawal_result = blockchain.record_withdrawal(
-                    user_wallet=withdrawal.user_wallet.wallet_address,
-                    token_amount=withdrawal.token_amount,
-                    naira_amount=int(withdrawal.naira_amount),
-                    withdrawal_id=f"WD_{withdrawal.id}",
-                    payment_reference="PENDING_MANUAL_PAYMENT"  # Admin updates this after payment
-                )
-
-                if not withdrawal_result['success']:
-                    return Response(
-                        {'error': f"Tokens burned but withdrawal recording failed: {withdrawal_result['error']}"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-
-                # Update withdrawal record
-                withdrawal.burn_tx_hash = burn_result['signature']
-                withdrawal.burn_confirmed = True
-                withdrawal.withdrawal_tx_hash = withdrawal_result['signature']
-                withdrawal.withdrawal_recorded = True
                 withdrawal.status = 'APPROVED'
                 withdrawal.admin_notes = admin_notes
                 withdrawal.approved_by = request.user if request.user.is_authenticated else None
                 withdrawal.approved_at = timezone.now()
                 withdrawal.save()
 
-                # Create transaction record for burn
-                TokenTransaction.objects.create(
+                # Pending burn record; tx hash and receipt are filled in by the signer worker
+                burn_tx = TokenTransaction.objects.create(
                     user_wallet=withdrawal.user_wallet,
                     transaction_type='BURN',
                     action_type='withdrawal',
                     action_id=f"WD_{withdrawal.id}",
                     token_amount=withdrawal.token_amount,
-                    tx_hash=burn_result['signature'],
-                    block_number=burn_result.get('block_number'),
-                    gas_used=burn_result.get('gas_used'),
-                    status='CONFIRMED',
-                    confirmed_at=timezone.now()
+                    status='PENDING',
                 )
 
-                return Response({
-                    'success': True,
-                    'message': f'Withdrawal approved. Tokens burned. Please process ₦{withdrawal.naira_amount} payment to {withdrawal.account_name}.',
-                    'withdrawal': WithdrawalRequestSerializer(withdrawal).data,
-                    'blockchain': {
-                        'burn_tx': burn_result['signature'],
-                        'burn_explorer': burn_result['explorer_url'],
-                        'withdrawal_tx': withdrawal_result['signature'],
-                        'withdrawal_explorer': withdrawal_result['explorer_url']
-                    },
-                    'payment_details': {
-                        'bank_name': withdrawal.bank_name,
-                        'account_number': withdrawal.account_number,
-                        'account_name': withdrawal.account_name,
-                        'amount': float(withdrawal.naira_amount),
-                        'provider': withdrawal.payment_provider
-                    }
-                }, status=status.HTTP_200_OK)
+                # Burn, then record the withdrawal once the burn confirms
+                # Note: Admin must process actual payment separately
+                burn_intent, record_intent = outbox.enqueue_withdrawal(withdrawal, burn_tx)
+
+            return Response({
+                'success': True,
+                'message': f'Withdrawal approved. Token burn queued. Please process ₦{withdrawal.naira_amount} payment to {withdrawal.account_name}.',
+                'withdrawal': WithdrawalRequestSerializer(withdrawal).data,
+                'blockchain': {
+                    'status': 'PENDING',
+                    'burn_intent_id': burn_intent.id,
+                    'withdrawal_intent_id': record_intent.id,
+                },
+                'payment_details': {
+                    'bank_name': withdrawal.bank_name,
+                    'account_number': withdrawal.account_number,
+                    'account_name': withdrawal.account_name,
+                    'amount': float(withdrawal.naira_amount),
+                    'provider': withdrawal.payment_provider
+                }
+            }, status=status.HTTP_202_ACCEPTED)
 
     except WithdrawalRequest.DoesNotExist:
         return Response(
@@ -503,11 +447,11 @@ def record_donation(request):
     }
 
     Response includes:
-    - Transaction hash
-    - Etherscan link (view transaction on blockchain)
     - Donation ID
+    - Outbox intent ID (status PENDING)
 
-    Transaction appears on Etherscan automatically!
+    The signer worker records it on-chain; GET /api/donations/{id}/ shows
+    the tx hash and explorer link once submitted.
     """
     try:
         # Validate input
@@ -543,45 +487,26 @@ def record_donation(request):
                 paid_at=timezone.now()
             )
 
-            # Record on blockchain automatically!
-            blockchain_result = blockchain.record_deposit(
-                amount_naira=int(amount_naira),
+            # Queue the on-chain record; the signer worker fills in the tx hash
+            intent = outbox.enqueue_donation(
+                donation,
+                amount_naira=amount_naira,
                 reference=reference,
                 donor_email=donor_email
             )
 
-            if blockchain_result['success']:
-                # Update donation with blockchain info
-                donation.blockchain_tx_hash = blockchain_result['signature']
-                donation.blockchain_recorded = True
-                donation.recorded_at = timezone.now()
-                donation.save()
-
-                return Response({
-                    'success': True,
-                    'donation_id': donation.id,
-                    'blockchain': {
-                        'tx_hash': blockchain_result['signature'],
-                        'explorer_url': blockchain_result['explorer_url'],
-                        'block_number': blockchain_result.get('block_number'),
-                        'view_on_etherscan': f"https://sepolia.etherscan.io/tx/{blockchain_result['signature']}"
-                    },
-                    'donation': {
-                        'donor_email': donor_email,
-                        'amount_naira': amount_naira,
-                        'reference': reference,
-                        'recorded_at': donation.recorded_at
-                    },
-                    'message': f'₦{amount_naira} donation recorded on blockchain successfully! 🎉'
-                }, status=status.HTTP_201_CREATED)
-            else:
-                # Donation saved but blockchain failed
-                donation.delete()  # Rollback
-                return Response({
-                    'success': False,
-                    'error': f"Blockchain recording failed: {blockchain_result.get('error', 'Unknown error')}",
-                    'message': 'Please try again or contact support'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({
+            'success': True,
+            'status': 'PENDING',
+            'donation_id': donation.id,
+            'intent_id': intent.id,
+            'donation': {
+                'donor_email': donor_email,
+                'amount_naira': amount_naira,
+                'reference': reference,
+            },
+            'message': f'₦{amount_naira} donation saved. Blockchain recording is queued.'
+        }, status=status.HTTP_202_ACCEPTED)
 
     except Exception as e:
         return Response({
@@ -599,7 +524,20 @@ def blockchain_status(request):
     try:
         is_connected = blockchain.w3.is_connected()
         latest_block = blockchain.w3.eth.block_number if is_connected else None
-        total_supply = blockchain.get_total_supply() if is_connected else None
+        state = IndexerState.current()
+
+        # Estimated (limit sent) versus used gas over everything the outbox has confirmed
+        gas = {
+            row['function_name']: {
+                'count': row['count'],
+                'avg_limit': int(row['avg_limit']),
+                'avg_used': int(row['avg_used']),
+                'overestimate': round(row['avg_limit'] / row['avg_used'] - 1, 3) if row['avg_used'] else None,
+            }
+            for row in ChainIntent.objects.filter(status='CONFIRMED', gas_limit__isnull=False, gas_used__isnull=False)
+            .values('function_name')
+            .annotate(count=Count('id'), avg_limit=Avg('gas_limit'), avg_used=Avg('gas_used'))
+        }
 
         return Response({
             'connected': is_connected,
@@ -607,7 +545,10 @@ def blockchain_status(request):
             'rpc_url': os.getenv('BASE_RPC_URL', 'Not configured'),
             'contract_address': os.getenv('CONTRACT_ADDRESS', 'Not deployed'),
             'latest_block': latest_block,
-            'total_supply': total_supply,
+            'total_supply': int(state.total_supply) if state else None,
+            'indexed_block': state.last_block if state else None,
+            'gas': gas,
+            'fee_oracle': blockchain.get_fee_metrics(),
             'token_symbol': 'BLOOM',
             'conversion_rate': '1 BLOOM = ₦2'
         })
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class DailyProgramConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.daily_program"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .content_map import invalidate_content_map
+        from .models import DailyContent
+
+        post_save.connect(invalidate_content_map, sender=DailyContent, dispatch_uid='daily_content_map_save')
+        post_delete.connect(invalidate_content_map, sender=DailyContent, dispatch_uid='daily_content_map_delete')
@@ -0,0 +1,161 @@
+"""
+In-memory resolution of daily content.
+
+DailyContent only changes when the seed commands run or an admin edits it,
+yet get_today_program used to run up to five queries to find a day's content.
+ContentMap loads every DailyContent row once per process and precomputes
+(stage_type, stage_week, day) -> content id with the same fallbacks:
+exact day, then any day of that week, then the same day in the closest
+lower week, then any day of the closest lower week, then the stage's first
+day. Lookups cost no queries.
+
+Saving or deleting DailyContent (and the seed commands) bump a version in
+the Django cache; every process compares it before a lookup. When the cache
+is not shared between processes, each process also re-checks the table
+every DAILY_CONTENT_MAP_RECHECK_SECONDS with one aggregate query.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import DailyContent
+
+VERSION_KEY = 'daily_program:content_version'
+DAYS = range(1, 8)
+
+
+def _resolve(rows_by_week, stage_week, day):
+    """Content for a week and day from one stage's rows ({week: {day: content}})."""
+    week_rows = rows_by_week.get(stage_week)
+    if week_rows:
+        return week_rows.get(day) or week_rows[min(week_rows)]
+
+    lower = [week for week in rows_by_week if week <= stage_week]
+    for week in sorted(lower, reverse=True):
+        if day in rows_by_week[week]:
+            return rows_by_week[week][day]
+    if lower:
+        closest = rows_by_week[max(lower)]
+        return closest[max(closest)]
+
+    first = rows_by_week[min(rows_by_week)]
+    return first[min(first)]
+
+
+class ContentMap:
+    """Process-wide, versioned (stage_type, stage_week, day) -> DailyContent table."""
+
+    _lock = threading.Lock()
+    _version = None
+    _checked_at = 0.0
+    _fingerprint = None
+    _contents = {}      # id -> DailyContent
+    _table = {}         # (stage_type, stage_week, day) -> id
+    _week_range = {}    # stage_type -> (lowest, highest) week in the table
+    _weeks = {}         # (stage_type, stage_week) -> contents ordered by day
+    _stage_sizes = {}   # stage_type -> number of contents
+
+    @classmethod
+    def invalidate(cls):
+        """Make every process rebuild its table before the next lookup."""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+        with cls._lock:
+            cls._version = None
+
+    @staticmethod
+    def _current_fingerprint():
+        return tuple(DailyContent.objects.aggregate(count=Count('id'), updated=Max('updated_at')).values())
+
+    @classmethod
+    def _ensure(cls):
+        version = cache.get(VERSION_KEY, 0)
+        recheck = time.monotonic() - cls._checked_at > settings.DAILY_CONTENT_MAP_RECHECK_SECONDS
+        if version == cls._version and not recheck:
+            return
+        with cls._lock:
+            if version == cls._version and time.monotonic() - cls._checked_at <= settings.DAILY_CONTENT_MAP_RECHECK_SECONDS:
+                return
+            if version == cls._version and cls._current_fingerprint() == cls._fingerprint:
+                cls._checked_at = time.monotonic()
+                return
+            cls._build(version)
+
+    @classmethod
+    def _build(cls, version):
+        fingerprint = cls._current_fingerprint()
+        stages = {}
+        contents = {}
+        for content in DailyContent.objects.all():
+            contents[content.id] = content
+            stages.setdefault(content.stage_type, {}).setdefault(content.stage_week, {})[content.day] = content
+
+        table = {}
+        week_range = {}
+        for stage_type, rows_by_week in stages.items():
+            # One week below and above the content covers every week: all
+            # lower weeks resolve like the first, all higher like the last
+            low, high = min(rows_by_week) - 1, max(rows_by_week) + 1
+            week_range[stage_type] = (low, high)
+            for stage_week in range(low, high + 1):
+                for day in DAYS:
+                    table[(stage_type, stage_week, day)] = _resolve(rows_by_week, stage_week, day).id
+
+        weeks = {
+            (stage_type, stage_week): [rows[day] for day in sorted(rows)]
+            for stage_type, rows_by_week in stages.items()
+            for stage_week, rows in rows_by_week.items()
+        }
+        stage_sizes = {
+            stage_type: sum(len(rows) for rows in rows_by_week.values())
+            for stage_type, rows_by_week in stages.items()
+        }
+
+        cls._contents, cls._table, cls._week_range = contents, table, week_range
+        cls._weeks, cls._stage_sizes = weeks, stage_sizes
+        cls._version, cls._fingerprint, cls._checked_at = version, fingerprint, time.monotonic()
+
+    @classmethod
+    def resolve_id(cls, stage_type, stage_week, day):
+        """Id of the content shown for this stage, week and day (with fallbacks), or None."""
+        cls._ensure()
+        week_range = cls._week_range.get(stage_type)
+        if not week_range:
+            return None
+        stage_week = min(max(stage_week, week_range[0]), week_range[1])
+        return cls._table.get((stage_type, stage_week, min(max(day, 1), 7)))
+
+    @classmethod
+    def resolve(cls, stage_type, stage_week, day):
+        """The DailyContent shown for this stage, week and day, or None."""
+        content_id = cls.resolve_id(stage_type, stage_week, day)
+        return cls._contents.get(content_id) if content_id else None
+
+    @classmethod
+    def week(cls, stage_type, stage_week):
+        """The contents of one week, ordered by day (no fallbacks)."""
+        cls._ensure()
+        return cls._weeks.get((stage_type, stage_week), [])
+
+    @classmethod
+    def stage_size(cls, stage_type):
+        """Number of contents for a stage."""
+        cls._ensure()
+        return cls._stage_sizes.get(stage_type, 0)
+
+    @classmethod
+    def get(cls, content_id):
+        """A DailyContent by id from the table, or None."""
+        cls._ensure()
+        return cls._contents.get(content_id)
+
+
+def invalidate_content_map(sender=None, **kwargs):
+    # After commit, so other processes cannot rebuild from the old rows
+    transaction.on_commit(ContentMap.invalidate)
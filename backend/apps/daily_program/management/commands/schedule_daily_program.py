@@ -0,0 +1,75 @@
+"""
+Pre-create each active child's progress row for the day, record missed days,
+reset the streaks they broke and prune old completion idempotency keys
+Usage: python manage.py schedule_daily_program [--loop]
+Days are Africa/Lagos (TIME_ZONE) days. Run just after midnight, or with --loop
+to run now and again after every midnight. Safe to re-run: missed days are
+recorded for the last CATCH_UP_DAYS days, so a failed or skipped night is
+made up by the next run, and --loop retries a failed run with backoff.
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.daily_program.services import DailyProgramService
+from apps.daily_program.streaks import reset_missed_streaks
+
+# Earlier days re-checked for missed days on every run (recording is idempotent)
+CATCH_UP_DAYS = 7
+RETRY_SECONDS = 60
+MAX_RETRY_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Create today's UserDayProgress for all active children, record yesterday's missed days and reset broken streaks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, once after every midnight',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Children per bulk insert (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        retry = RETRY_SECONDS
+        while True:
+            try:
+                self.run_day(timezone.localdate(), options['chunk_size'])
+                failed = False
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Scheduling failed: {e}'))
+                failed = True
+
+            if not options['loop']:
+                break
+            # A minute past midnight, so the new day is settled
+            now = timezone.localtime()
+            next_run = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+            wait = (next_run - now).total_seconds() + 60
+            if failed:
+                # Try again today rather than leave the day unscheduled
+                wait, retry = min(wait, retry), min(retry * 2, MAX_RETRY_SECONDS)
+            else:
+                retry = RETRY_SECONDS
+            time.sleep(wait)
+
+    def run_day(self, day, chunk_size):
+        missed = sum(
+            DailyProgramService.record_missed_days(day - timedelta(days=back), chunk_size)
+            for back in range(CATCH_UP_DAYS, 0, -1)
+        )
+        reset = reset_missed_streaks(day)
+        scheduled = DailyProgramService.schedule_day(day, chunk_size)
+        pruned = DailyProgramService.prune_completion_keys()
+        self.stdout.write(self.style.SUCCESS(
+            f'{day}: scheduled {scheduled} children, recorded {missed} missed days since '
+            f'{day - timedelta(days=CATCH_UP_DAYS)}, reset {reset} streaks, pruned {pruned} idempotency keys'
+        ))
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from apps.daily_program.content_map import ContentMap
 from apps.daily_program.models import DailyContent, QuizQuestion
 
 
@@ -315,6 +316,7 @@ Take the quiz to test your knowledge!''',
             if is_quiz:
                 self.create_quiz_questions(content)
 
+        ContentMap.invalidate()
         self.stdout.write(self.style.SUCCESS('Successfully seeded daily content!'))
 
     def create_quiz_questions(self, content):
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0001_initial'),
+        ('daily_program', '0004_youtubelesson_videoprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdayprogress',
+            name='scheduled_for',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='MissedDay',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='missed_days', to='children.child')),
+                ('daily_content', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='daily_program.dailycontent')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('child', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0001_initial'),
+        ('daily_program', '0005_missedday_scheduled_for'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChildProgress',
+            fields=[
+                ('child', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='program_progress', serialize=False, to='children.child')),
+                ('days_completed', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('checkins_completed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'child progress',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:46
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0001_initial'),
+        ('daily_program', '0006_childprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletionKey',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=64)),
+                ('step', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completion_keys', to='children.child')),
+                ('day_progress', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completion_keys', to='daily_program.userdayprogress')),
+            ],
+            options={
+                'unique_together': {('child', 'key')},
+            },
+        ),
+    ]
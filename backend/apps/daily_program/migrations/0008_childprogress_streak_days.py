@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daily_program', '0007_completionkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='childprogress',
+            name='completed_days',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='childprogress',
+            name='last_completed_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import migrations, models
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# apps.daily_program.streaks.WINDOW at the time of writing
+WINDOW = 63
+
+
+def backfill_progress(apps, schema_editor):
+    """ChildProgress.rebuild() for every child with a completed day, so the nightly streak reset sees their dates."""
+    Child = apps.get_model('children', 'Child')
+    ChildProgress = apps.get_model('daily_program', 'ChildProgress')
+    UserDayProgress = apps.get_model('daily_program', 'UserDayProgress')
+
+    today = timezone.localdate()
+    completions = (
+        UserDayProgress.objects.filter(completed_at__isnull=False, child__isnull=False)
+        .order_by('child_id')
+        .values_list('child_id', 'completed_at')
+    )
+    for child_id, rows in groupby(completions.iterator(), key=lambda row: row[0]):
+        days = sorted({timezone.localdate(completed_at) for _, completed_at in rows})
+        last = days[-1]
+
+        bits = 0
+        for day in days:
+            if (last - day).days < WINDOW:
+                bits |= 1 << (last - day).days
+        longest = run = 0
+        for previous, day in zip([None] + days, days):
+            run = run + 1 if previous and day - previous == timedelta(days=1) else 1
+            longest = max(longest, run)
+        current = run if (today - last).days <= 1 else 0
+
+        totals = UserDayProgress.objects.filter(child_id=child_id).aggregate(
+            days_completed=models.Count('pk', filter=models.Q(is_completed=True)),
+            tasks_completed=models.Count('pk', filter=models.Q(task_completed=True)),
+            checkins_completed=models.Count('pk', filter=models.Q(checkin_completed=True)),
+        )
+        ChildProgress.objects.update_or_create(
+            child_id=child_id, defaults={**totals, 'last_completed_on': last, 'completed_days': bits}
+        )
+        Child.objects.filter(pk=child_id).update(
+            current_streak=current, longest_streak=Greatest('longest_streak', longest)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('daily_program', '0008_childprogress_streak_days'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
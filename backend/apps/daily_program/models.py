@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -88,6 +89,9 @@ class UserDayProgress(models.Model):
 
     tokens_earned = models.IntegerField(default=0)
 
+    # Day (Africa/Lagos) this was the child's current content, set by schedule_daily_program
+    scheduled_for = models.DateField(null=True, blank=True, db_index=True)
+
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
@@ -108,6 +112,98 @@ class UserDayProgress(models.Model):
         return self.is_completed
 
 
+class ChildProgress(models.Model):
+    """
+    Per-child completion totals, kept up to date as days, tasks and check-ins
+    are completed so the progress screen does not count UserDayProgress rows.
+    """
+    child = models.OneToOneField('children.Child', on_delete=models.CASCADE, primary_key=True, related_name='program_progress')
+    days_completed = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    checkins_completed = models.IntegerField(default=0)
+
+    # Streak state (see streaks.py): the last day (Africa/Lagos) a day was completed,
+    # and a bitmap of completed days ending there (bit n = n days before it)
+    last_completed_on = models.DateField(null=True, blank=True)
+    completed_days = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'child progress'
+
+    def __str__(self):
+        return f"{self.child_id}: {self.days_completed} days completed"
+
+    @classmethod
+    def rebuild(cls, child_id):
+        """Recount the totals from UserDayProgress and re-derive the streak."""
+        totals = UserDayProgress.objects.filter(child_id=child_id).aggregate(
+            days_completed=models.Count('pk', filter=models.Q(is_completed=True)),
+            tasks_completed=models.Count('pk', filter=models.Q(task_completed=True)),
+            checkins_completed=models.Count('pk', filter=models.Q(checkin_completed=True)),
+        )
+        progress, _ = cls.objects.update_or_create(child_id=child_id, defaults=totals)
+
+        from .streaks import rebuild_streak
+        rebuild_streak(progress)
+        return progress
+
+    @classmethod
+    def get_for_child(cls, child_id):
+        try:
+            return cls.objects.get(child_id=child_id)
+        except cls.DoesNotExist:
+            return cls.rebuild(child_id)
+
+    @classmethod
+    def record(cls, child_id, **increments):
+        """Add to the totals, e.g. record(child.id, days_completed=1), after the progress row is saved."""
+        updated = cls.objects.filter(child_id=child_id).update(
+            updated_at=timezone.now(),
+            **{field: models.F(field) + amount for field, amount in increments.items()}
+        )
+        if not updated:
+            # First completion since the totals were added: count everything, this one included
+            cls.rebuild(child_id)
+
+
+class CompletionKey(models.Model):
+    """
+    Idempotency key sent by the app with a completion (lesson, check-in, task,
+    quiz). A retried request with the same key gets the saved progress back
+    instead of being applied again. Kept for a week.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    child = models.ForeignKey('children.Child', on_delete=models.CASCADE, related_name='completion_keys')
+    key = models.CharField(max_length=64)
+    day_progress = models.ForeignKey(UserDayProgress, on_delete=models.CASCADE, related_name='completion_keys')
+    step = models.CharField(max_length=10)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ['child', 'key']
+
+    def __str__(self):
+        return f"{self.child_id} {self.step}: {self.key}"
+
+
+class MissedDay(models.Model):
+    """A day (Africa/Lagos) on which a child did not complete their scheduled content."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    child = models.ForeignKey('children.Child', on_delete=models.CASCADE, related_name='missed_days')
+    date = models.DateField()
+    daily_content = models.ForeignKey(DailyContent, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['child', 'date']
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.child_id} missed {self.date}"
+
+
 class YouTubeLesson(models.Model):
     """YouTube video lessons for the daily program."""
     STAGE_CHOICES = [
@@ -1,62 +1,47 @@
+from datetime import datetime, time, timedelta
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from .models import DailyContent, UserDayProgress
+from .content_map import ContentMap
+from .models import ChildProgress, CompletionKey, MissedDay, UserDayProgress
+from .streaks import record_completion
 from apps.tokens.services import TokenService
 
+STEP_SOURCES = {
+    'lesson': 'daily_lesson',
+    'checkin': 'daily_checkin',
+    'task': 'daily_task',
+    'quiz': 'weekly_quiz',
+}
+
+# Days an idempotency key is remembered
+COMPLETION_KEY_DAYS = 7
+
 
 class DailyProgramService:
 
     @staticmethod
-    def get_today_program(child):
-        """Get the current day's program for a child based on their stage."""
+    def resolve_content(child):
+        """(stage, content) for the child's current program day; content is None if none applies."""
         stage = child.get_current_stage()
-        if not stage:
-            return None
+        if not stage or 'week' not in stage:
+            return stage, None
 
-        stage_type = stage['type']
-        stage_week = stage['week']
         day = child.current_day % 7 or 7  # Day 1-7 in week
+        # Exact day, else the closest earlier content (see content_map); no queries
+        return stage, ContentMap.resolve(stage['type'], stage['week'], day)
 
-        content = None
-
-        # Try exact match first
-        try:
-            content = DailyContent.objects.get(
-                stage_type=stage_type,
-                stage_week=stage_week,
-                day=day
-            )
-        except DailyContent.DoesNotExist:
-            # Fallback 1: try any day from this week
-            content = DailyContent.objects.filter(
-                stage_type=stage_type,
-                stage_week=stage_week
-            ).first()
-
-        # Fallback 2: get the closest available week's content
-        if not content:
-            # Try to find the highest week that has content (for users past available content)
-            content = DailyContent.objects.filter(
-                stage_type=stage_type,
-                stage_week__lte=stage_week,
-                day=day
-            ).order_by('-stage_week').first()
-
-        # Fallback 3: get any content from the closest lower week
-        if not content:
-            content = DailyContent.objects.filter(
-                stage_type=stage_type,
-                stage_week__lte=stage_week
-            ).order_by('-stage_week', '-day').first()
-
-        # Fallback 4: get the very first content available for this stage
-        if not content:
-            content = DailyContent.objects.filter(
-                stage_type=stage_type
-            ).order_by('stage_week', 'day').first()
-
-        # Final fallback: no content exists at all
+    @staticmethod
+    def get_today_program(child):
+        """Get the current day's program for a child based on their stage."""
+        stage, content = DailyProgramService.resolve_content(child)
         if not content:
             return None
+        stage_week = stage['week']
 
         progress, _ = UserDayProgress.objects.get_or_create(
             child=child,
@@ -89,199 +74,218 @@ class DailyProgramService:
         return missed
 
     @staticmethod
-    def complete_lesson(child, day_progress, is_catchup=False):
-        """Mark lesson as complete and award tokens."""
-        user = child.user
-
-        if day_progress.lesson_completed:
-            return day_progress
-
-        day_progress.lesson_completed = True
-
-        tokens = day_progress.daily_content.lesson_tokens
-        if is_catchup:
-            tokens = min(tokens, day_progress.daily_content.catchup_tokens // 2)
-
-        TokenService.award_tokens(
-            user=user,
-            amount=tokens,
-            source='daily_lesson',
-            reference_id=day_progress.id,
-            reference_type='day_progress',
-            description=f"Completed: {day_progress.daily_content.title}"
-        )
-
-        day_progress.tokens_earned += tokens
-        day_progress.check_completion()
-        day_progress.save()
-
-        if day_progress.is_completed:
-            DailyProgramService._on_day_completed(child, day_progress)
+    def schedule_day(day, chunk_size=500):
+        """
+        Create today's UserDayProgress for every active child ahead of their
+        first request, chunk by chunk. Rows that already exist (content not
+        finished on an earlier day) are only marked scheduled for `day`.
+        Returns the number of children scheduled.
+        """
+        from apps.children.models import Child
+
+        children = Child.objects.filter(is_active=True).exclude(status='archived').only(
+            'id', 'status', 'due_date', 'weeks_at_registration', 'birth_date', 'current_day'
+        ).order_by('pk').iterator(chunk_size=chunk_size)
+
+        scheduled = 0
+        while chunk := list(islice(children, chunk_size)):
+            pairs = []
+            for child in chunk:
+                _, content = DailyProgramService.resolve_content(child)
+                if content:
+                    pairs.append((child.id, content.id))
+            if not pairs:
+                continue
+
+            UserDayProgress.objects.bulk_create(
+                [UserDayProgress(child_id=child_id, daily_content_id=content_id, scheduled_for=day)
+                 for child_id, content_id in pairs],
+                ignore_conflicts=True,
+            )
+            UserDayProgress.objects.filter(
+                reduce(or_, (Q(child_id=child_id, daily_content_id=content_id) for child_id, content_id in pairs)),
+                is_completed=False,
+            ).exclude(scheduled_for=day).update(scheduled_for=day)
+            scheduled += len(pairs)
 
-        return day_progress
+        return scheduled
 
     @staticmethod
-    def complete_checkin(child, day_progress, health_data, is_catchup=False):
-        """Complete health check-in for the day."""
-        from apps.health.models import DailyHealthLog
-        user = child.user
-
-        if day_progress.checkin_completed:
-            return day_progress
+    def record_missed_days(day, chunk_size=500):
+        """
+        Record a MissedDay for each child whose content scheduled for `day`
+        was not completed before that day ended. Returns the number recorded.
+        """
+        day_end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        scheduled = UserDayProgress.objects.filter(
+            scheduled_for=day, child__isnull=False
+        ).values_list('child_id', 'daily_content_id', 'completed_at')
+
+        missed = {}
+        completed = set()
+        for child_id, content_id, completed_at in scheduled.iterator(chunk_size=chunk_size):
+            if completed_at and completed_at < day_end:
+                completed.add(child_id)
+            else:
+                missed.setdefault(child_id, content_id)
+
+        rows = [
+            MissedDay(child_id=child_id, date=day, daily_content_id=content_id)
+            for child_id, content_id in missed.items() if child_id not in completed
+        ]
+        MissedDay.objects.bulk_create(rows, batch_size=chunk_size, ignore_conflicts=True)
+        return len(rows)
 
-        DailyHealthLog.objects.update_or_create(
-            child=child,
-            date=timezone.now().date(),
-            defaults={
-                'mood': health_data.get('mood'),
-                'weight_kg': health_data.get('weight'),
-                'blood_pressure_systolic': health_data.get('bp_systolic'),
-                'blood_pressure_diastolic': health_data.get('bp_diastolic'),
-                'symptoms': health_data.get('symptoms', []),
-                'baby_movement': health_data.get('baby_movement', ''),
-                'notes': health_data.get('notes', ''),
-            }
+    @staticmethod
+    def complete_lesson(child, day_progress, is_catchup=False, idempotency_key=None):
+        """Complete the day's lesson."""
+        return DailyProgramService._complete_step(
+            child, day_progress, 'lesson', idempotency_key=idempotency_key, is_catchup=is_catchup
         )
 
-        day_progress.checkin_completed = True
-
-        tokens = day_progress.daily_content.checkin_tokens
-        if is_catchup:
-            tokens = min(tokens, day_progress.daily_content.catchup_tokens // 2)
-
-        TokenService.award_tokens(
-            user=user,
-            amount=tokens,
-            source='daily_checkin',
-            reference_id=day_progress.id,
-            reference_type='day_progress',
-            description="Daily health check-in"
+    @staticmethod
+    def complete_checkin(child, day_progress, health_data, is_catchup=False, idempotency_key=None):
+        """Complete health check-in for the day."""
+        return DailyProgramService._complete_step(
+            child, day_progress, 'checkin', idempotency_key=idempotency_key, is_catchup=is_catchup,
+            health_data=health_data
         )
 
-        day_progress.tokens_earned += tokens
-        day_progress.check_completion()
-        day_progress.save()
-
-        if day_progress.is_completed:
-            DailyProgramService._on_day_completed(child, day_progress)
-
-        return day_progress
-
     @staticmethod
-    def complete_task(child, day_progress):
-        """Mark daily task as complete."""
-        user = child.user
-
-        if day_progress.task_completed:
-            return day_progress
-
-        day_progress.task_completed = True
-
-        tokens = day_progress.daily_content.task_tokens
-        TokenService.award_tokens(
-            user=user,
-            amount=tokens,
-            source='daily_task',
-            reference_id=day_progress.id,
-            reference_type='day_progress',
-            description=f"Task: {day_progress.daily_content.task_title}"
+    def complete_task(child, day_progress, idempotency_key=None, award=True):
+        """Mark daily task as complete. award=False when the tokens were earned elsewhere (videos)."""
+        return DailyProgramService._complete_step(
+            child, day_progress, 'task', idempotency_key=idempotency_key, award=award
         )
 
-        day_progress.tokens_earned += tokens
-        day_progress.check_completion()
-        day_progress.save()
-
-        if day_progress.is_completed:
-            DailyProgramService._on_day_completed(child, day_progress)
-
-        return day_progress
-
     @staticmethod
-    def submit_quiz(child, day_progress, answers):
+    def submit_quiz(child, day_progress, answers, idempotency_key=None):
         """Submit weekly quiz answers."""
-        user = child.user
-
-        if not day_progress.daily_content.is_quiz_day:
-            raise ValueError("This day does not have a quiz")
-
-        if day_progress.quiz_completed:
-            return day_progress
-
-        questions = day_progress.daily_content.quiz_questions.all()
-        correct = 0
-        total = questions.count()
-
-        for q in questions:
-            if answers.get(str(q.id)) == q.correct_answer:
-                correct += 1
-
-        day_progress.quiz_completed = True
-        day_progress.quiz_score = correct
-        day_progress.quiz_total = total
-
-        bonus_tokens = day_progress.daily_content.quiz_bonus_tokens
-        earned_bonus = int((correct / total) * bonus_tokens) if total > 0 else 0
-
-        TokenService.award_tokens(
-            user=user,
-            amount=earned_bonus,
-            source='weekly_quiz',
-            reference_id=day_progress.id,
-            reference_type='day_progress',
-            description=f"Weekly quiz: {correct}/{total} correct"
+        return DailyProgramService._complete_step(
+            child, day_progress, 'quiz', idempotency_key=idempotency_key, answers=answers
         )
 
-        day_progress.tokens_earned += earned_bonus
-        day_progress.check_completion()
-        day_progress.save()
-
-        if day_progress.is_completed:
-            DailyProgramService._on_day_completed(child, day_progress)
-
-        return day_progress
-
     @staticmethod
-    def _on_day_completed(child, day_progress):
-        """Called when a day is fully completed."""
-        day_progress.completed_at = timezone.now()
-        day_progress.save()
+    def _complete_step(child, day_progress, step, idempotency_key=None, is_catchup=False,
+                       health_data=None, answers=None, award=True):
+        """
+        The one completion pipeline. The UserDayProgress row is locked while
+        the flag, the token award, the progress totals and the day/streak
+        advance are applied in a single transaction, so double taps and
+        retries are applied once. A step already done, or an idempotency key
+        already seen, returns the saved progress unchanged.
+        """
+        from apps.health.models import DailyHealthLog
+        content = day_progress.daily_content
+
+        if step == 'quiz':
+            if not content.is_quiz_day:
+                raise ValueError("This day does not have a quiz")
+            # Scored before taking the lock
+            questions = list(content.quiz_questions.all())
+            correct = sum(1 for q in questions if (answers or {}).get(str(q.id)) == q.correct_answer)
+            total = len(questions)
+
+        flag = f'{step}_completed'
+        with transaction.atomic():
+            progress = UserDayProgress.objects.select_for_update().get(pk=day_progress.pk)
+            progress.daily_content = content
+
+            if idempotency_key:
+                _, created = CompletionKey.objects.get_or_create(
+                    child=child, key=idempotency_key, defaults={'day_progress': progress, 'step': step}
+                )
+                if not created:
+                    return progress
+            if getattr(progress, flag):
+                return progress
+
+            if step == 'lesson':
+                tokens = content.lesson_tokens
+                description = f"Completed: {content.title}"
+            elif step == 'checkin':
+                tokens = content.checkin_tokens
+                description = "Daily health check-in"
+            elif step == 'task':
+                tokens = content.task_tokens if award else 0
+                description = f"Task: {content.task_title}"
+            else:
+                tokens = int((correct / total) * content.quiz_bonus_tokens) if total > 0 else 0
+                description = f"Weekly quiz: {correct}/{total} correct"
+            if is_catchup:
+                tokens = min(tokens, content.catchup_tokens // 2)
+
+            changes = {flag: True, 'tokens_earned': F('tokens_earned') + tokens}
+            was_completed = progress.is_completed
+            setattr(progress, flag, True)
+            if step == 'quiz':
+                changes.update(quiz_score=correct, quiz_total=total)
+                progress.quiz_score, progress.quiz_total = correct, total
+            # A late step on a day already complete (task after the quiz) completes nothing
+            day_completed = not was_completed and progress.check_completion()
+            if day_completed:
+                progress.completed_at = timezone.now()
+                changes.update(is_completed=True, completed_at=progress.completed_at)
+            # select_for_update is a no-op on SQLite; only the request that flips the flag goes on
+            if not UserDayProgress.objects.filter(pk=progress.pk, **{flag: False}).update(**changes):
+                progress.refresh_from_db()
+                return progress
+            progress.tokens_earned += tokens
+
+            if step == 'checkin':
+                DailyHealthLog.objects.update_or_create(
+                    child=child,
+                    date=timezone.now().date(),
+                    defaults={
+                        'mood': health_data.get('mood'),
+                        'weight_kg': health_data.get('weight'),
+                        'blood_pressure_systolic': health_data.get('bp_systolic'),
+                        'blood_pressure_diastolic': health_data.get('bp_diastolic'),
+                        'symptoms': health_data.get('symptoms', []),
+                        'baby_movement': health_data.get('baby_movement', ''),
+                        'notes': health_data.get('notes', ''),
+                    }
+                )
 
-        # Update child's streak
-        child.current_streak += 1
-        if child.current_streak > child.longest_streak:
-            child.longest_streak = child.current_streak
+            if award:
+                TokenService.award_tokens(
+                    user=child.user,
+                    amount=tokens,
+                    source=STEP_SOURCES[step],
+                    reference_id=progress.id,
+                    reference_type='day_progress',
+                    description=description
+                )
 
-        DailyProgramService._check_streak_bonus(child)
+            totals = {'checkins_completed': 1} if step == 'checkin' else {'tasks_completed': 1} if step == 'task' else {}
+            if day_completed:
+                DailyProgramService._on_day_completed(child, progress, **totals)
+            elif totals:
+                ChildProgress.record(child.id, **totals)
 
-        # Advance to next day
-        child.current_day += 1
-        child.save()
+        return progress
 
     @staticmethod
-    def _check_streak_bonus(child):
-        """Check and award streak bonuses."""
-        from apps.tokens.models import StreakBonus
-        user = child.user
-
-        streak_rewards = {
-            7: 20,
-            14: 50,
-            30: 100,
-            60: 200,
-        }
+    def _on_day_completed(child, day_progress, **completed):
+        """
+        Called inside the completion transaction when a day is fully completed;
+        `completed` adds other ChildProgress totals.
+        """
+        from apps.children.models import Child
+        child.refresh_from_db(fields=['current_streak'])
+        streak_before = child.current_streak
+        ChildProgress.record(child.id, days_completed=1, **completed)
 
-        for streak_days, tokens in streak_rewards.items():
-            if child.current_streak >= streak_days:
-                bonus, created = StreakBonus.objects.get_or_create(
-                    user=user,
-                    streak_days=streak_days,
-                    defaults={'tokens_awarded': tokens}
-                )
+        # Advance to next day
+        Child.objects.filter(pk=child.pk).update(current_day=F('current_day') + 1)
+        child.refresh_from_db(fields=['current_day'])
+
+        record_completion(child, timezone.localdate(day_progress.completed_at), streak_before)
 
-                if created:
-                    TokenService.award_tokens(
-                        user=user,
-                        amount=tokens,
-                        source='streak_bonus',
-                        description=f"{streak_days}-day streak bonus!"
-                    )
+    @staticmethod
+    def prune_completion_keys():
+        """Delete idempotency keys older than COMPLETION_KEY_DAYS. Returns the number deleted."""
+        deleted, _ = CompletionKey.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=COMPLETION_KEY_DAYS)
+        ).delete()
+        return deleted
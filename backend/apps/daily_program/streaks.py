@@ -0,0 +1,144 @@
+"""
+Streaks derived from completion dates.
+
+A child's streak is the number of consecutive days (Africa/Lagos, TIME_ZONE)
+on which they completed at least one program day, ending today or yesterday.
+Completing several days on one date counts once.
+
+ChildProgress keeps the last such date and a bitmap of the WINDOW days
+ending there. A completion shifts the bitmap in and extends or restarts
+Child.current_streak without reading history. schedule_daily_program resets
+the streak of every child with no completion yesterday. A bonus is only
+checked for the thresholds the streak has just reached.
+"""
+from datetime import timedelta
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.tokens.services import TokenService
+from .models import ChildProgress, UserDayProgress
+
+# Streak length: bonus tokens, each awarded once per user
+STREAK_REWARDS = {
+    7: 20,
+    14: 50,
+    30: 100,
+    60: 200,
+}
+
+# Days kept in the bitmap; fits a signed 64-bit column
+WINDOW = 63
+MASK = (1 << WINDOW) - 1
+
+
+def _shift_in(bits, last_day, day):
+    """The bitmap ending at `day` (on or after last_day) once `day` is completed."""
+    if last_day is None or (day - last_day).days >= WINDOW:
+        return 1
+    return ((bits << (day - last_day).days) | 1) & MASK
+
+
+def _runs(days):
+    """(streak ending at the last day, longest streak) for sorted, distinct dates."""
+    longest = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous and (day - previous).days == 1 else 1
+        longest = max(longest, run)
+        previous = day
+    return run, longest
+
+
+def rebuild_streak(progress):
+    """Re-derive the bitmap and the child's streaks from completed_at dates (one query)."""
+    days = sorted({
+        timezone.localdate(completed_at)
+        for completed_at in UserDayProgress.objects.filter(
+            child_id=progress.child_id, completed_at__isnull=False
+        ).values_list('completed_at', flat=True)
+    })
+
+    last = days[-1] if days else None
+    bits = 0
+    for day in days:
+        if (last - day).days < WINDOW:
+            bits |= 1 << (last - day).days
+    current, longest = _runs(days)
+    if not last or (timezone.localdate() - last).days > 1:
+        current = 0
+
+    progress.last_completed_on, progress.completed_days = last, bits
+    ChildProgress.objects.filter(pk=progress.pk).update(last_completed_on=last, completed_days=bits)
+    # The longest streak is never lowered; it may predate completion dates being tracked
+    from apps.children.models import Child
+    Child.objects.filter(pk=progress.child_id).update(
+        current_streak=current, longest_streak=Greatest('longest_streak', longest)
+    )
+
+
+def record_completion(child, day, streak_before):
+    """
+    Count a day completed on `day` (a local date) towards the child's streak,
+    inside the completion transaction and after ChildProgress.record().
+    `streak_before` is child.current_streak before this completion; bonuses
+    are awarded for thresholds between it and the new streak.
+    """
+    from apps.children.models import Child
+    progress = ChildProgress.objects.select_for_update().get(child_id=child.id)
+
+    if progress.last_completed_on is None or day > progress.last_completed_on:
+        if progress.last_completed_on and (day - progress.last_completed_on).days == 1:
+            streak = F('current_streak') + 1
+        else:
+            streak = 1
+        ChildProgress.objects.filter(pk=progress.pk).update(
+            last_completed_on=day,
+            completed_days=_shift_in(progress.completed_days, progress.last_completed_on, day),
+        )
+        Child.objects.filter(pk=child.id).update(
+            current_streak=streak, longest_streak=Greatest('longest_streak', streak)
+        )
+    # Otherwise already counted for `day` (or by a rebuild)
+
+    child.refresh_from_db(fields=['current_streak', 'longest_streak'])
+    _award_new_thresholds(child, streak_before, child.current_streak)
+
+
+def _award_new_thresholds(child, before, after):
+    from apps.tokens.models import StreakBonus
+
+    awards = []
+    for streak_days, tokens in STREAK_REWARDS.items():
+        if not before < streak_days <= after:
+            continue
+        _, created = StreakBonus.objects.get_or_create(
+            user=child.user,
+            streak_days=streak_days,
+            defaults={'tokens_awarded': tokens}
+        )
+        if created:
+            awards.append({
+                'user': child.user,
+                'amount': tokens,
+                'source': 'streak_bonus',
+                'description': f"{streak_days}-day streak bonus!",
+            })
+
+    if awards:
+        TokenService.award_tokens_bulk(awards)
+
+
+def reset_missed_streaks(day):
+    """
+    Zero the streak of every child with no completed day on the day before
+    `day`. Children whose progress row has no completion date yet are left
+    alone; their streak is re-derived with the row. Returns the count.
+    """
+    from apps.children.models import Child
+    return Child.objects.filter(
+        current_streak__gt=0, program_progress__last_completed_on__isnull=False
+    ).exclude(
+        program_progress__last_completed_on__gte=day - timedelta(days=1)
+    ).update(current_streak=0)
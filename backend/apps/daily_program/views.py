@@ -4,15 +4,23 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from django.db.models import Count, Q
 from django.utils import timezone
 from apps.children.models import Child
 from apps.tokens.services import TokenService
 from apps.passport.models import PassportEvent
-from .models import DailyContent, UserDayProgress, YouTubeLesson, VideoProgress
+from .content_map import ContentMap
+from .models import ChildProgress, DailyContent, UserDayProgress, YouTubeLesson, VideoProgress
 from .serializers import DailyContentSerializer, UserDayProgressSerializer, YouTubeLessonSerializer, VideoProgressSerializer
 from .services import DailyProgramService
 
 
+def _idempotency_key(request):
+    """Client key that makes a retried completion a no-op (Idempotency-Key header or body field)."""
+    key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    return str(key)[:64] if key else None
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_today(request, child_id):
@@ -158,7 +166,7 @@ def complete_lesson(request, child_id, progress_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
     is_catchup = request.data.get('is_catchup', False)
-    progress = DailyProgramService.complete_lesson(child, progress, is_catchup)
+    progress = DailyProgramService.complete_lesson(child, progress, is_catchup, _idempotency_key(request))
 
     return Response({
         'success': True,
@@ -198,7 +206,7 @@ def complete_checkin(request, child_id, progress_id):
     }
 
     progress = DailyProgramService.complete_checkin(
-        child, progress, health_data, is_catchup
+        child, progress, health_data, is_catchup, _idempotency_key(request)
     )
 
     return Response({
@@ -235,7 +243,7 @@ def complete_task(request, child_id, progress_id):
         from apps.tokens.models import DonationPool
         DonationPool.get_pool()
 
-        progress = DailyProgramService.complete_task(child, progress)
+        progress = DailyProgramService.complete_task(child, progress, _idempotency_key(request))
 
         # Refresh user from database to get updated balance
         request.user.refresh_from_db()
@@ -285,26 +293,26 @@ def get_progress(request, child_id):
     user = request.user
     stage = child.get_current_stage()
 
-    total_completed = UserDayProgress.objects.filter(
-        child=child,
-        is_completed=True
-    ).count()
+    totals = ChildProgress.get_for_child(child.id)
+    total_completed = totals.days_completed
 
     # Calculate total available days for this stage type
     stage_type = stage['type'] if stage else 'pregnancy'
-    total_days = DailyContent.objects.filter(stage_type=stage_type).count()
+    total_days = ContentMap.stage_size(stage_type)
     overall_pct = int((total_completed / total_days) * 100) if total_days > 0 else 0
 
     # Week progress
     current_week = stage['week'] if stage else 1
-    week_days = UserDayProgress.objects.filter(
+    week = UserDayProgress.objects.filter(
         child=child,
         daily_content__stage_type=stage_type,
         daily_content__stage_week=current_week
+    ).aggregate(
+        completed=Count('pk', filter=Q(is_completed=True)),
     )
-    week_completed = week_days.filter(is_completed=True).count()
-    week_total = week_days.count() or 7
-    week_pct = int((week_completed / week_total) * 100)
+    # The week's content, not its progress rows: rows only exist for days scheduled or started
+    week_total = len(ContentMap.week(stage_type, current_week)) or 7
+    week_pct = int((week['completed'] / week_total) * 100)
 
     return Response({
         'success': True,
@@ -317,8 +325,8 @@ def get_progress(request, child_id):
             'longest_streak': child.longest_streak,
             'days_completed': total_completed,
             'lessons_completed': total_completed,
-            'tasks_completed': UserDayProgress.objects.filter(child=child, task_completed=True).count(),
-            'checkins_completed': UserDayProgress.objects.filter(child=child, checkin_completed=True).count(),
+            'tasks_completed': totals.tasks_completed,
+            'checkins_completed': totals.checkins_completed,
             'total_tokens_earned': user.total_tokens_earned,
             'tokens_earned': user.total_tokens_earned,
             'token_balance': user.token_balance,
@@ -334,22 +342,24 @@ def get_progress(request, child_id):
 def get_week_progress(request, child_id, stage_type, stage_week):
     """Get progress for specific week."""
     child = get_object_or_404(Child, id=child_id, user=request.user)
-    days = DailyContent.objects.filter(
-        stage_type=stage_type,
-        stage_week=stage_week
-    ).order_by('day')
+    days = ContentMap.week(stage_type, stage_week)
+    progress_by_content = {
+        p['daily_content_id']: p
+        for p in UserDayProgress.objects.filter(
+            child=child,
+            daily_content_id__in=[day_content.id for day_content in days]
+        ).values('daily_content_id', 'is_completed', 'tokens_earned')
+    }
 
+    # Days not started yet have no progress row (the nightly scheduler creates today's)
     progress_list = []
     for day_content in days:
-        progress, _ = UserDayProgress.objects.get_or_create(
-            child=child,
-            daily_content=day_content
-        )
+        progress = progress_by_content.get(day_content.id, {})
         progress_list.append({
             'day': day_content.day,
             'title': day_content.title,
-            'is_completed': progress.is_completed,
-            'tokens_earned': progress.tokens_earned,
+            'is_completed': progress.get('is_completed', False),
+            'tokens_earned': progress.get('tokens_earned', 0),
         })
 
     return Response({
@@ -388,7 +398,7 @@ def submit_quiz(request, child_id, stage_type, stage_week):
     )
 
     answers = request.data.get('answers', {})
-    progress = DailyProgramService.submit_quiz(child, progress, answers)
+    progress = DailyProgramService.submit_quiz(child, progress, answers, _idempotency_key(request))
 
     return Response({
         'success': True,
@@ -513,13 +523,8 @@ def complete_video(request, video_id):
         if result:
             day_progress = result['progress']
             if not day_progress.task_completed:
-                day_progress.task_completed = True
-                day_progress.check_completion()
-                day_progress.save()
-
-                if day_progress.is_completed:
-                    DailyProgramService._on_day_completed(child, day_progress)
-
+                # The video's tokens stand in for the task's
+                day_progress = DailyProgramService.complete_task(child, day_progress, award=False)
                 task_completed = True
                 day_progress_data = UserDayProgressSerializer(day_progress).data
 
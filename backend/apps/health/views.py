@@ -1,3 +1,4 @@
+import logging
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -6,12 +7,16 @@ from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Count, Case, When, IntegerField
 from apps.children.models import Child
+from apps.ai import jobs
+from apps.ai.triage import triage_child
 from .models import DailyHealthLog, KickCount, Appointment, HealthReport
 from .serializers import (
     DailyHealthLogSerializer, KickCountSerializer, AppointmentSerializer,
     HealthReportListSerializer, HealthReportDetailSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 class IsDoctorPermission(BasePermission):
     """Only allow verified doctors"""
@@ -68,10 +73,21 @@ def health_logs(request, child_id=None):
             serializer = DailyHealthLogSerializer(data=data)
 
         if serializer.is_valid():
-            serializer.save(child=child)
+            log = serializer.save(child=child)
+            # The check-in is stored; a triage failure must not turn it into an error
+            try:
+                screened = _triage_checkin(request.user, child, log)
+            except Exception as e:
+                logger.error(f"Triage failed for check-in {log.id}: {e}")
+                screened = None
             return Response({
                 'success': True,
-                'data': serializer.data
+                'data': serializer.data,
+                'triage': {
+                    'urgency_level': screened['urgency_level'],
+                    'reasons': screened['reasons'],
+                    'recommendation': screened['ai_recommendation'],
+                } if screened else None,
             }, status=status.HTTP_201_CREATED)
         return Response({
             'success': False,
@@ -79,6 +95,29 @@ def health_logs(request, child_id=None):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _triage_checkin(user, child, log):
+    """
+    Score a saved check-in with the rule-based triage engine. Urgent and
+    critical results are queued for the doctor dashboard, one report per day.
+    """
+    text = ' '.join([*(str(s) for s in log.symptoms or []), log.notes or ''])
+    screened = triage_child(child, text)
+    if screened['urgency_level'] in ('critical', 'urgent'):
+        jobs.enqueue(
+            'triage_report',
+            {
+                'child_id': str(child.id),
+                'result': screened,
+                'conversation_type': 'health_checkin',
+                'transcript': text,
+                'once_per_day': True,
+            },
+            priority=jobs.URGENCY_PRIORITY[screened['urgency_level']],
+            dedup_key=f"checkin_report:{child.id}:{timezone.localdate()}",
+        )
+    return screened
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def health_log_detail(request, log_id):
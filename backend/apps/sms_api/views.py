@@ -11,6 +11,7 @@ from django.contrib.auth import get_user_model
 import logging
 
 from .africastalking_client import send_sms, get_random_health_tip, SMS_ENABLED
+from apps.ai.response_cache import ResponseCache, stage_bucket
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -124,48 +125,49 @@ Reply HELP for commands"""
 
 def handle_ai_question(user, phone_number, question):
     """
-    Handle AI chat via SMS using OpenAI
+    Handle AI chat via SMS with the LLM backend routed for 'sms'
+    (see AI_LLM_ROUTES)
 
     Keeps responses short for SMS (under 160 chars)
     """
     try:
-        # Try to use OpenAI if available
+        # Try to use the AI service if available
         try:
-            from openai import OpenAI
-            import os
-
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key:
-                raise ImportError("No OpenAI key")
-
-            client = OpenAI(api_key=openai_key)
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are Bloom, a maternal health assistant for Nigerian mothers. Keep responses VERY SHORT (under 150 characters for SMS). Be warm, supportive, and culturally sensitive. Focus on safety and evidence-based advice."
-                    },
-                    {
-                        "role": "user",
-                        "content": question
-                    }
-                ],
-                max_tokens=80,
-                temperature=0.7
-            )
-
-            answer = response.choices[0].message.content.strip()
-
-            # Truncate if needed (SMS limit)
-            if len(answer) > 150:
-                answer = answer[:147] + "..."
+            from apps.ai.services import AIService
+
+            # Mothers at the same week ask the same things; reuse those answers
+            pregnancy = user.children.filter(status='pregnant', is_active=True).first()
+            week = pregnancy.get_pregnancy_week() if pregnancy else None
+            bucket = stage_bucket('pregnancy', week)
+            use_reply_cache = ResponseCache.cacheable('sms', question, week)
+            answer = ResponseCache.get('sms', bucket, question) if use_reply_cache else None
+            if not answer:
+                ai_service = AIService.get_instance(routes=('sms',))
+
+                answer = ai_service.generate_response(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": question
+                        }
+                    ],
+                    system_prompt="You are Bloom, a maternal health assistant for Nigerian mothers. Keep responses VERY SHORT (under 150 characters for SMS). Be warm, supportive, and culturally sensitive. Focus on safety and evidence-based advice.",
+                    max_tokens=80,
+                    temperature=0.7,
+                    route='sms'
+                ).strip()
+
+                # Truncate if needed (SMS limit)
+                if len(answer) > 150:
+                    answer = answer[:147] + "..."
+
+                if use_reply_cache:
+                    ResponseCache.set('sms', bucket, question, answer)
 
             message = f"🌸 {answer}\n\nReply Q [question] for more help"
 
-        except ImportError:
-            # OpenAI not available - provide generic response
+        except (ImportError, ValueError):
+            # AI service not configured - provide generic response
             message = "🌸 Download our app for AI chat! Or call your doctor for urgent concerns."
 
         send_sms(phone_number, message)
@@ -0,0 +1,80 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from apps.tokens.models import TokenTransaction
+from apps.tokens.services import TokenService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Award tokens to many users from a CSV file (columns: user_id or email, amount, optional description/source)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file')
+        parser.add_argument(
+            '--source',
+            default='admin',
+            help='Transaction source when the CSV has no source column (default: admin)',
+        )
+        parser.add_argument(
+            '--description',
+            default='',
+            help='Description when the CSV has no description column',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without awarding anything',
+        )
+
+    def handle(self, *args, **options):
+        valid_sources = {choice for choice, _ in TokenTransaction.SOURCE_CHOICES}
+
+        try:
+            with open(options['csv_file'], newline='') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            raise CommandError(f'Could not read {options["csv_file"]}: {e}')
+
+        # Resolve any email-addressed rows in one query
+        emails = {row['email'].strip().lower() for row in rows if row.get('email') and not row.get('user_id')}
+        ids_by_email = {
+            email.lower(): str(pk)
+            for pk, email in User.objects.filter(email__in=emails).values_list('id', 'email')
+        } if emails else {}
+
+        entries = []
+        for line, row in enumerate(rows, start=2):
+            user_id = (row.get('user_id') or '').strip()
+            if not user_id:
+                email = (row.get('email') or '').strip().lower()
+                user_id = ids_by_email.get(email)
+                if not user_id:
+                    raise CommandError(f'Line {line}: unknown user {email or "(blank)"}')
+
+            source = (row.get('source') or options['source']).strip()
+            if source not in valid_sources:
+                raise CommandError(f'Line {line}: invalid source {source}')
+
+            entries.append({
+                'user_id': user_id,
+                'amount': (row.get('amount') or '').strip(),
+                'source': source,
+                'description': (row.get('description') or options['description']).strip(),
+            })
+
+        self.stdout.write(f'Rows: {len(entries)}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN - no tokens awarded'))
+            return
+
+        try:
+            transactions = TokenService.award_tokens_bulk(entries)
+        except (ValueError, ArithmeticError) as e:
+            raise CommandError(str(e))
+
+        total = sum(t.amount for t in transactions)
+        users = len({t.user_id for t in transactions})
+        self.stdout.write(self.style.SUCCESS(f'Awarded {total:,.2f} tokens to {users} users'))
@@ -0,0 +1,64 @@
+"""
+Fold pending DonationPoolShard deltas into the DonationPool
+Usage: python manage.py fold_pool_shards [--loop] [--interval 60]
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.tokens.models import DonationPool, DonationPoolShard
+from apps.tokens.services import TokenService
+
+
+class Command(BaseCommand):
+    help = 'Fold pending DonationPoolShard deltas into the DonationPool (run periodically, e.g. every minute, or with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, folding every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between folds with --loop (default: 60)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                folded, pool = self.fold()
+                # Quiet when looping over nothing
+                if folded or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(f'Folded {folded} shard(s) into the pool: {pool}'))
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Folding failed: {e}'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def fold(self):
+        with transaction.atomic():
+            pool = DonationPool.objects.select_for_update().get(pk=DonationPool.get_pool().pk)
+            shards = list(DonationPoolShard.objects.select_for_update().order_by('shard'))
+
+            folded = 0
+            for shard in shards:
+                if not (shard.pool_balance_delta or shard.tokens_issued_delta or shard.tokens_withdrawn_delta):
+                    continue
+                pool.pool_balance += shard.pool_balance_delta
+                pool.total_tokens_issued += shard.tokens_issued_delta
+                pool.total_tokens_withdrawn += shard.tokens_withdrawn_delta
+                shard.pool_balance_delta = 0
+                shard.tokens_issued_delta = 0
+                shard.tokens_withdrawn_delta = 0
+                shard.save()
+                folded += 1
+
+            if folded:
+                pool.save()
+
+        TokenService.invalidate_pool_cache()
+        return folded, pool
@@ -0,0 +1,81 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from apps.tokens.models import TokenTransaction, TokenBalance
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recompute running token balances from the TokenTransaction ledger and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing corrected balances',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk write (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+
+        # One grouped query over the ledger instead of a SUM per user
+        ledger = {
+            row['user_id']: Decimal(row['total'] or 0)
+            for row in TokenTransaction.objects.values('user_id').annotate(total=Sum('amount'))
+        }
+        balances = {b.user_id: b for b in TokenBalance.objects.all()}
+
+        missing = []
+        drifted = []
+        for user_id, total in ledger.items():
+            row = balances.get(user_id)
+            if row is None:
+                missing.append(TokenBalance(user_id=user_id, balance=total))
+            elif row.balance != total:
+                self.stdout.write(f'  Drift for user {user_id}: stored {row.balance}, ledger {total}')
+                row.balance = total
+                drifted.append(row)
+
+        # Balance rows for users whose ledger is empty should be zero
+        for user_id, row in balances.items():
+            if user_id not in ledger and row.balance != 0:
+                self.stdout.write(f'  Drift for user {user_id}: stored {row.balance}, ledger 0')
+                row.balance = Decimal('0')
+                drifted.append(row)
+
+        # Keep the cached integer balance on User in step as well
+        stale_users = []
+        for user in User.objects.filter(id__in=ledger.keys()).only('id', 'token_balance').iterator():
+            expected = int(ledger[user.id])
+            if user.token_balance != expected:
+                user.token_balance = expected
+                stale_users.append(user)
+
+        self.stdout.write(f'Users in ledger: {len(ledger)}')
+        self.stdout.write(f'Missing balance rows: {len(missing)}')
+        self.stdout.write(f'Drifted balance rows: {len(drifted)}')
+        self.stdout.write(f'Stale cached user balances: {len(stale_users)}')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN - no changes written'))
+            return
+
+        with transaction.atomic():
+            TokenBalance.objects.bulk_create(missing, batch_size=batch_size)
+            TokenBalance.objects.bulk_update(drifted, ['balance'], batch_size=batch_size)
+            User.objects.bulk_update(stale_users, ['token_balance'], batch_size=batch_size)
+
+        if missing or drifted or stale_users:
+            self.stdout.write(self.style.SUCCESS('Balances reconciled with the ledger'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
@@ -19,7 +19,7 @@ class Command(BaseCommand):
         amount = options['amount']
 
         # Get or create the pool
-        pool = DonationPool.get_pool()
+        pool = DonationPool.get_current()
         self.stdout.write(f'Current pool balance: ₦{pool.pool_balance:,.2f}')
         self.stdout.write(f'Tokens in circulation: {pool.tokens_in_circulation:,.2f}')
         self.stdout.write(f'Token value: ₦{pool.token_value_naira:.4f}')
@@ -43,7 +43,7 @@ class Command(BaseCommand):
         DonationService.confirm_donation(donation.id)
 
         # Refresh pool data
-        pool.refresh_from_db()
+        pool = DonationPool.get_current()
 
         self.stdout.write(self.style.SUCCESS(f'\nSeed donation of ₦{amount:,} confirmed!'))
         self.stdout.write(self.style.SUCCESS(f'New pool balance: ₦{pool.pool_balance:,.2f}'))
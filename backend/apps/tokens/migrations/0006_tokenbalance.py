@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:51
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    TokenTransaction = apps.get_model('tokens', 'TokenTransaction')
+    TokenBalance = apps.get_model('tokens', 'TokenBalance')
+    totals = TokenTransaction.objects.values('user_id').annotate(total=Sum('amount'))
+    TokenBalance.objects.bulk_create(
+        [TokenBalance(user_id=row['user_id'], balance=row['total'] or 0) for row in totals],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tokens', '0005_add_blockchain_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='token_ledger_balance', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+
+def create_shards(apps, schema_editor):
+    DonationPoolShard = apps.get_model('tokens', 'DonationPoolShard')
+    DonationPoolShard.objects.bulk_create(
+        [DonationPoolShard(shard=i) for i in range(16)],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tokens', '0006_tokenbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationPoolShard',
+            fields=[
+                ('shard', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('pool_balance_delta', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('tokens_issued_delta', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('tokens_withdrawn_delta', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_shards, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import uuid
+import zlib
 from django.db import models
+from django.db.models import F, Sum
 from django.utils import timezone
 from decimal import Decimal
 
@@ -27,10 +29,63 @@ class DonationPool(models.Model):
         pool, _ = cls.objects.get_or_create(pk='00000000-0000-0000-0000-000000000001')
         return pool
 
+    @classmethod
+    def get_current(cls):
+        """
+        Pool totals including deltas not yet folded in from DonationPoolShard.
+        The returned instance is for reading only - never save() it.
+        """
+        pool = cls.get_pool()
+        deltas = DonationPoolShard.objects.aggregate(
+            pool_balance=Sum('pool_balance_delta'),
+            tokens_issued=Sum('tokens_issued_delta'),
+            tokens_withdrawn=Sum('tokens_withdrawn_delta'),
+        )
+        pool.pool_balance += deltas['pool_balance'] or 0
+        pool.total_tokens_issued += deltas['tokens_issued'] or 0
+        pool.total_tokens_withdrawn += deltas['tokens_withdrawn'] or 0
+        return pool
+
     def __str__(self):
         return f"Pool: ₦{self.pool_balance:,.2f} | {self.tokens_in_circulation:,.0f} tokens"
 
 
+class DonationPoolShard(models.Model):
+    """
+    Pending changes to the DonationPool, spread over SHARD_COUNT rows so that
+    concurrent token awards don't all queue on the single pool row. Reads sum
+    the shards on top of the pool; fold_pool_shards moves them into the pool.
+    """
+    SHARD_COUNT = 16
+
+    shard = models.PositiveSmallIntegerField(primary_key=True)
+    pool_balance_delta = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    tokens_issued_delta = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    tokens_withdrawn_delta = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def shard_for(cls, key):
+        return zlib.crc32(str(key).encode()) % cls.SHARD_COUNT
+
+    @classmethod
+    def record(cls, key, pool_balance=0, tokens_issued=0, tokens_withdrawn=0):
+        """Atomically add deltas to the shard picked by key (usually a user id)."""
+        shard = cls.shard_for(key)
+        changes = {
+            'pool_balance_delta': F('pool_balance_delta') + pool_balance,
+            'tokens_issued_delta': F('tokens_issued_delta') + tokens_issued,
+            'tokens_withdrawn_delta': F('tokens_withdrawn_delta') + tokens_withdrawn,
+            'updated_at': timezone.now(),
+        }
+        if not cls.objects.filter(shard=shard).update(**changes):
+            cls.objects.get_or_create(shard=shard)
+            cls.objects.filter(shard=shard).update(**changes)
+
+    def __str__(self):
+        return f"Pool shard {self.shard}"
+
+
 class Donation(models.Model):
     """Track all donations into the pool"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -102,6 +157,17 @@ class TokenTransaction(models.Model):
         ordering = ['-created_at']
 
 
+class TokenBalance(models.Model):
+    """Running token balance per user, updated with every TokenTransaction insert"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField('users.User', on_delete=models.CASCADE, related_name='token_ledger_balance')
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user} - {self.balance:,.2f} tokens"
+
+
 class WithdrawalRequest(models.Model):
     """User withdrawal requests"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -1,44 +1,90 @@
+import uuid
 from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Sum
-from .models import DonationPool, Donation, TokenTransaction, WithdrawalRequest
+from django.db.models import F, Sum
+from .models import DonationPool, DonationPoolShard, Donation, TokenTransaction, TokenBalance, WithdrawalRequest
 import logging
 
 logger = logging.getLogger(__name__)
 
+POOL_SNAPSHOT_CACHE_KEY = 'tokens:pool_snapshot'
+
 
 class TokenService:
     MINIMUM_WITHDRAWAL = 200
 
+    @staticmethod
+    def _get_pool_snapshot():
+        """Pool totals (shards included), cached for POOL_INFO_CACHE_SECONDS."""
+        snapshot = cache.get(POOL_SNAPSHOT_CACHE_KEY)
+        if snapshot is None:
+            pool = DonationPool.get_current()
+            snapshot = {
+                'pool_balance': pool.pool_balance,
+                'total_tokens_issued': pool.total_tokens_issued,
+                'total_tokens_withdrawn': pool.total_tokens_withdrawn,
+                'tokens_in_circulation': pool.tokens_in_circulation,
+                'token_value_naira': pool.token_value_naira,
+            }
+            cache.set(POOL_SNAPSHOT_CACHE_KEY, snapshot, settings.POOL_INFO_CACHE_SECONDS)
+        return snapshot
+
+    @staticmethod
+    def invalidate_pool_cache():
+        cache.delete(POOL_SNAPSHOT_CACHE_KEY)
+
     @staticmethod
     def get_pool_info():
-        pool = DonationPool.get_pool()
+        snapshot = TokenService._get_pool_snapshot()
         return {
-            'pool_balance_naira': float(pool.pool_balance),
-            'total_tokens_issued': float(pool.total_tokens_issued),
-            'total_tokens_withdrawn': float(pool.total_tokens_withdrawn),
-            'tokens_in_circulation': float(pool.tokens_in_circulation),
-            'token_value_naira': float(pool.token_value_naira),
+            'pool_balance_naira': float(snapshot['pool_balance']),
+            'total_tokens_issued': float(snapshot['total_tokens_issued']),
+            'total_tokens_withdrawn': float(snapshot['total_tokens_withdrawn']),
+            'tokens_in_circulation': float(snapshot['tokens_in_circulation']),
+            'token_value_naira': float(snapshot['token_value_naira']),
         }
 
+    @staticmethod
+    def get_token_value_naira():
+        return TokenService._get_pool_snapshot()['token_value_naira']
+
     @staticmethod
     def get_user_balance(user):
-        result = TokenTransaction.objects.filter(user=user).aggregate(total=Sum('amount'))
-        return Decimal(result['total'] or 0)
+        return TokenService._get_balance_row(user).balance
+
+    @staticmethod
+    def _get_balance_row(user, lock=False):
+        """
+        Return the user's running balance row, seeding it from the ledger the
+        first time it is needed. With lock=True the row is held FOR UPDATE until
+        the surrounding transaction commits.
+        """
+        queryset = TokenBalance.objects.select_for_update() if lock else TokenBalance.objects
+        try:
+            return queryset.get(user=user)
+        except TokenBalance.DoesNotExist:
+            result = TokenTransaction.objects.filter(user=user).aggregate(total=Sum('amount'))
+            row, _ = queryset.get_or_create(
+                user=user,
+                defaults={'balance': Decimal(result['total'] or 0)},
+            )
+            return row
 
     @staticmethod
     def get_user_balance_naira(user):
         balance = TokenService.get_user_balance(user)
-        pool = DonationPool.get_pool()
-        return balance * pool.token_value_naira
+        return balance * TokenService.get_token_value_naira()
 
     @staticmethod
     @transaction.atomic
     def award_tokens(user, amount, source, description='', reference_id=None, reference_type=''):
         amount = Decimal(str(amount))
-        current_balance = TokenService.get_user_balance(user)
-        new_balance = current_balance + amount
+        balance_row = TokenService._get_balance_row(user, lock=True)
+        new_balance = balance_row.balance + amount
 
         txn = TokenTransaction.objects.create(
             user=user,
@@ -51,9 +97,10 @@ class TokenService:
             reference_type=reference_type,
         )
 
-        pool = DonationPool.get_pool()
-        pool.total_tokens_issued += amount
-        pool.save()
+        balance_row.balance = new_balance
+        balance_row.save(update_fields=['balance', 'updated_at'])
+
+        DonationPoolShard.record(user.pk, tokens_issued=amount)
 
         # Update user's cached balance
         user.token_balance = int(new_balance)
@@ -62,16 +109,102 @@ class TokenService:
 
         return txn
 
+    @staticmethod
+    @transaction.atomic
+    def award_tokens_bulk(entries, batch_size=1000):
+        """
+        Award tokens to many users at once.
+
+        entries: iterable of dicts with 'user' (or 'user_id'), 'amount', 'source'
+        and optionally 'description', 'reference_id', 'reference_type'. A user
+        may appear more than once; balance_after is chained in entry order.
+        Returns the created TokenTransactions.
+        """
+        User = get_user_model()
+
+        awards = []
+        for entry in entries:
+            user_id = entry['user'].pk if entry.get('user') is not None else entry.get('user_id')
+            if not user_id:
+                raise ValueError("Each entry needs a user or user_id")
+            user_id = str(uuid.UUID(str(user_id)))
+            amount = Decimal(str(entry['amount']))
+            if amount <= 0:
+                raise ValueError(f"Award amount must be positive (user {user_id})")
+            awards.append((str(user_id), amount, entry))
+
+        if not awards:
+            return []
+
+        user_ids = {user_id for user_id, _, _ in awards}
+        users = {str(u.pk): u for u in User.objects.filter(pk__in=user_ids).only('id')}
+        unknown = user_ids - users.keys()
+        if unknown:
+            raise ValueError(f"Unknown users: {', '.join(sorted(unknown)[:10])}")
+
+        # Lock every affected balance row up front; seed missing rows from the ledger in one grouped query
+        balances = {
+            str(b.user_id): b
+            for b in TokenBalance.objects.select_for_update().filter(user_id__in=user_ids)
+        }
+        missing = user_ids - balances.keys()
+        if missing:
+            totals = {
+                str(row['user_id']): row['total']
+                for row in TokenTransaction.objects.filter(user_id__in=missing)
+                .values('user_id').annotate(total=Sum('amount'))
+            }
+            TokenBalance.objects.bulk_create(
+                [TokenBalance(user_id=user_id, balance=totals.get(user_id) or 0) for user_id in missing],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            balances.update({
+                str(b.user_id): b
+                for b in TokenBalance.objects.select_for_update().filter(user_id__in=missing)
+            })
+
+        transactions = []
+        earned = {}
+        for user_id, amount, entry in awards:
+            row = balances[user_id]
+            row.balance += amount
+            earned[user_id] = earned.get(user_id, 0) + amount
+            transactions.append(TokenTransaction(
+                user_id=user_id,
+                transaction_type=entry.get('transaction_type', 'earn'),
+                amount=amount,
+                balance_after=row.balance,
+                source=entry['source'],
+                description=entry.get('description', ''),
+                reference_id=entry.get('reference_id'),
+                reference_type=entry.get('reference_type', ''),
+            ))
+
+        TokenTransaction.objects.bulk_create(transactions, batch_size=batch_size)
+        TokenBalance.objects.bulk_update(balances.values(), ['balance'], batch_size=batch_size)
+
+        # One combined pool delta for the whole batch
+        DonationPoolShard.record('bulk_award', tokens_issued=sum(earned.values()))
+
+        # Update users' cached balances
+        for user_id, user in users.items():
+            user.token_balance = int(balances[user_id].balance)
+            user.total_tokens_earned = F('total_tokens_earned') + int(earned[user_id])
+        User.objects.bulk_update(users.values(), ['token_balance', 'total_tokens_earned'], batch_size=batch_size)
+
+        return transactions
+
     @staticmethod
     @transaction.atomic
     def deduct_tokens(user, amount, source, description='', reference_id=None):
         amount = Decimal(str(amount))
-        current_balance = TokenService.get_user_balance(user)
+        balance_row = TokenService._get_balance_row(user, lock=True)
 
-        if current_balance < amount:
+        if balance_row.balance < amount:
             raise ValueError("Insufficient token balance")
 
-        new_balance = current_balance - amount
+        new_balance = balance_row.balance - amount
 
         txn = TokenTransaction.objects.create(
             user=user,
@@ -84,9 +217,10 @@ class TokenService:
             reference_type='withdrawal',
         )
 
-        pool = DonationPool.get_pool()
-        pool.total_tokens_withdrawn += amount
-        pool.save()
+        balance_row.balance = new_balance
+        balance_row.save(update_fields=['balance', 'updated_at'])
+
+        DonationPoolShard.record(user.pk, tokens_withdrawn=amount)
 
         # Update user's cached balance
         user.token_balance = int(new_balance)
@@ -126,45 +260,38 @@ class DonationService:
         donation.confirmed_at = timezone.now()
         donation.save()
 
-        pool = DonationPool.get_pool()
-        pool.pool_balance += donation.amount_naira
-        pool.save()
+        DonationPoolShard.record(donation.id, pool_balance=donation.amount_naira)
+        transaction.on_commit(TokenService.invalidate_pool_cache)
 
-        # Automatically record on blockchain
+        # Queue the on-chain record; the blockchain signer worker submits it
         try:
-            import blockchain
+            from apps.blockchain_api import outbox
             from apps.blockchain_api.models import Donation as BlockchainDonation
 
-            # Check if already recorded
-            already_recorded = BlockchainDonation.objects.filter(
-                paystack_reference=donation.payment_reference,
-                blockchain_recorded=True
-            ).exists()
-
-            if not already_recorded:
-                logger.info(f"Recording donation {donation.payment_reference} on blockchain...")
-                blockchain_result = blockchain.record_deposit(
-                    amount_naira=float(donation.amount_naira),
-                    reference=donation.payment_reference,
-                    donor_email=donation.donor_email or 'anonymous@bloom.com'
+            # A savepoint, so a database error here leaves the confirmation's transaction usable
+            with transaction.atomic():
+                reference = donation.payment_reference or f"DON_{donation.id}"
+                blockchain_donation, created = BlockchainDonation.objects.get_or_create(
+                    paystack_reference=reference,
+                    defaults={
+                        'donor_email': donation.donor_email or 'anonymous@bloom.com',
+                        'amount_naira': donation.amount_naira,
+                        'payment_status': 'SUCCESS',
+                        'paid_at': donation.confirmed_at,
+                    }
                 )
 
-                if blockchain_result.get('success'):
-                    # Save blockchain record
-                    BlockchainDonation.objects.create(
-                        donor_email=donation.donor_email or 'anonymous@bloom.com',
+                if created:
+                    outbox.enqueue_donation(
+                        blockchain_donation,
                         amount_naira=donation.amount_naira,
-                        paystack_reference=donation.payment_reference,
-                        blockchain_tx_hash=blockchain_result['signature'],
-                        blockchain_recorded=True,
-                        payment_status='SUCCESS'
+                        reference=reference,
+                        donor_email=blockchain_donation.donor_email,
                     )
-                    logger.info(f"✅ Donation recorded on blockchain: {blockchain_result['signature']}")
-                else:
-                    logger.error(f"❌ Blockchain recording failed: {blockchain_result.get('error')}")
+                    logger.info(f"Queued blockchain record for donation {reference}")
         except Exception as e:
-            # Don't fail the confirmation if blockchain recording fails
-            logger.error(f"❌ Error recording on blockchain: {e}")
+            # Don't fail the confirmation if queueing the blockchain record fails
+            logger.error(f"❌ Error queueing blockchain record: {e}")
 
         return donation, True
 
@@ -195,8 +322,8 @@ class WithdrawalService:
         if pending:
             raise ValueError("You have a pending withdrawal request")
 
-        pool = DonationPool.get_pool()
-        token_value = pool.token_value_naira
+        # Read the live value rather than the cached one since it fixes the payout
+        token_value = DonationPool.get_current().token_value_naira
         naira_amount = token_amount * token_value
 
         return WithdrawalRequest.objects.create(
@@ -231,9 +358,8 @@ class WithdrawalService:
             reference_id=withdrawal.id,
         )
 
-        pool = DonationPool.get_pool()
-        pool.pool_balance -= withdrawal.naira_amount
-        pool.save()
+        DonationPoolShard.record(withdrawal.user_id, pool_balance=-withdrawal.naira_amount)
+        transaction.on_commit(TokenService.invalidate_pool_cache)
 
         withdrawal.status = 'approved'
         withdrawal.reviewed_by = admin_user
@@ -21,6 +21,7 @@ urlpatterns = [
     path('admin/withdrawals/<uuid:withdrawal_id>/reject/', views.admin_reject_withdrawal),
     path('admin/withdrawals/<uuid:withdrawal_id>/paid/', views.admin_mark_paid),
     path('admin/stats/', views.admin_pool_stats),
+    path('admin/awards/bulk/', views.admin_bulk_award),
 
     # ===== LEGACY (backward compatibility) =====
     path('balance/', views.get_balance),
@@ -74,9 +74,9 @@ def create_donation(request):
 def my_wallet(request):
     """Get user's wallet info including token balance and naira value"""
     user = request.user
-    pool = DonationPool.get_pool()
+    token_value = TokenService.get_token_value_naira()
     balance = TokenService.get_user_balance(user)
-    balance_naira = balance * pool.token_value_naira
+    balance_naira = balance * token_value
 
     # Get pending withdrawals
     pending_withdrawal = WithdrawalRequest.objects.filter(
@@ -89,7 +89,7 @@ def my_wallet(request):
         'data': {
             'token_balance': float(balance),
             'naira_value': float(balance_naira),
-            'token_value_naira': float(pool.token_value_naira),
+            'token_value_naira': float(token_value),
             'total_earned': user.total_tokens_earned,
             'pending_withdrawal': float(pending_withdrawal),
             'minimum_withdrawal': WithdrawalService.MINIMUM_TOKENS,
@@ -300,11 +300,65 @@ def admin_mark_paid(request, withdrawal_id):
         }, status=400)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def admin_bulk_award(request):
+    """Award tokens to many users in one batch (campaigns, bonuses, corrections)"""
+    awards = request.data.get('awards', [])
+    default_source = request.data.get('source', 'admin')
+    default_description = request.data.get('description', '')
+
+    if not isinstance(awards, list) or not all(isinstance(award, dict) for award in awards):
+        return Response({
+            'success': False,
+            'message': 'awards must be a list of objects'
+        }, status=400)
+
+    valid_sources = {choice for choice, _ in TokenTransaction.SOURCE_CHOICES}
+    entries = []
+    for award in awards:
+        source = award.get('source', default_source)
+        if source not in valid_sources:
+            return Response({
+                'success': False,
+                'message': f'Invalid source: {source}'
+            }, status=400)
+        entries.append({
+            'user_id': award.get('user_id'),
+            'amount': award.get('amount'),
+            'source': source,
+            'description': award.get('description', default_description),
+        })
+
+    if not entries:
+        return Response({
+            'success': False,
+            'message': 'No awards provided'
+        }, status=400)
+
+    try:
+        transactions = TokenService.award_tokens_bulk(entries)
+    except (ValueError, KeyError, ArithmeticError) as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=400)
+
+    return Response({
+        'success': True,
+        'data': {
+            'awarded_count': len(transactions),
+            'users_count': len({t.user_id for t in transactions}),
+            'total_tokens': float(sum(t.amount for t in transactions)),
+        }
+    }, status=201)
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_pool_stats(request):
     """Get comprehensive pool statistics for admin"""
-    pool = DonationPool.get_pool()
+    pool = DonationPool.get_current()
 
     donation_total = Donation.objects.filter(status='confirmed').aggregate(
         total=Sum('amount_naira'), count=Count('id')
@@ -1,700 +1,351 @@
 """
 Blockchain integration module for MamaAlert
 Handles all interactions with BloomToken smart contract on Base
+
+Nothing here touches the network at import time. The Web3 client, admin
+account and contract are built on first use by get_client(), and the old
+module-level w3 / admin_account / contract / CONTRACT_ABI names resolve
+through it.
 """
 
 import os
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
+from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.providers.base import BaseProvider
 from eth_account import Account
 from dotenv import load_dotenv
-import json
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 BASE_RPC_URL = os.getenv('BASE_RPC_URL', 'https://sepolia.base.org')
+# Comma-separated endpoints tried in order when the active one is unreachable
+BASE_RPC_URLS = [
+    url.strip() for url in (os.getenv('BASE_RPC_URLS') or BASE_RPC_URL).split(',') if url.strip()
+]
 ADMIN_PRIVATE_KEY = os.getenv('ADMIN_PRIVATE_KEY')
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS')
+CONTRACT_ABI_PATH = os.getenv(
+    'CONTRACT_ABI_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contracts', 'BloomToken.abi.json'),
+)
+
+# HTTP transport for the RPC session
+RPC_CONNECT_TIMEOUT = float(os.getenv('RPC_CONNECT_TIMEOUT', '3'))
+RPC_READ_TIMEOUT = float(os.getenv('RPC_READ_TIMEOUT', '10'))
+RPC_MAX_RETRIES = int(os.getenv('RPC_MAX_RETRIES', '2'))
+RPC_BACKOFF_FACTOR = float(os.getenv('RPC_BACKOFF_FACTOR', '0.3'))
+RPC_POOL_SIZE = int(os.getenv('RPC_POOL_SIZE', '10'))
+
+# Fee oracle
+FEE_CACHE_SECONDS = float(os.getenv('FEE_CACHE_SECONDS', '5'))
+FEE_PRIORITY_PERCENTILE = float(os.getenv('FEE_PRIORITY_PERCENTILE', '50'))
+MIN_PRIORITY_FEE_WEI = int(os.getenv('MIN_PRIORITY_FEE_WEI', '1000000'))
+GAS_ESTIMATE_SECONDS = float(os.getenv('GAS_ESTIMATE_SECONDS', '3600'))
+GAS_ESTIMATE_MARGIN = float(os.getenv('GAS_ESTIMATE_MARGIN', '1.2'))
+
+# Errors that mean the endpoint, not the request, is the problem
+FAILOVER_ERRORS = (requests.ConnectionError, requests.Timeout, requests.HTTPError)
+
+
+@lru_cache(maxsize=None)
+def load_contract_abi(path=CONTRACT_ABI_PATH):
+    """
+    Parse the BloomToken ABI artifact once per process
 
-# Connect to Base
-w3 = Web3(Web3.HTTPProvider(BASE_RPC_URL))
-
-# Load admin account
-if ADMIN_PRIVATE_KEY:
-    admin_account = Account.from_key(ADMIN_PRIVATE_KEY)
-else:
-    admin_account = None
-    print("WARNING: ADMIN_PRIVATE_KEY not set in .env")
-
-# Contract ABI - This will be populated after contract compilation
-# For now, using the ABI from the guide
-CONTRACT_ABI = json.loads('''
-[
-  {
-    "inputs": [],
-    "stateMutability": "nonpayable",
-    "type": "constructor"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "spender",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "allowance",
-        "type": "uint256"
-      },
-      {
-        "internalType": "uint256",
-        "name": "needed",
-        "type": "uint256"
-      }
-    ],
-    "name": "ERC20InsufficientAllowance",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "sender",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "balance",
-        "type": "uint256"
-      },
-      {
-        "internalType": "uint256",
-        "name": "needed",
-        "type": "uint256"
-      }
-    ],
-    "name": "ERC20InsufficientBalance",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "approver",
-        "type": "address"
-      }
-    ],
-    "name": "ERC20InvalidApprover",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "receiver",
-        "type": "address"
-      }
-    ],
-    "name": "ERC20InvalidReceiver",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "sender",
-        "type": "address"
-      }
-    ],
-    "name": "ERC20InvalidSender",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "spender",
-        "type": "address"
-      }
-    ],
-    "name": "ERC20InvalidSpender",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "owner",
-        "type": "address"
-      }
-    ],
-    "name": "OwnableInvalidOwner",
-    "type": "error"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "account",
-        "type": "address"
-      }
-    ],
-    "name": "OwnableUnauthorizedAccount",
-    "type": "error"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "owner",
-        "type": "address"
-      },
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "spender",
-        "type": "address"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "value",
-        "type": "uint256"
-      }
-    ],
-    "name": "Approval",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "amount",
-        "type": "uint256"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "reference",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "donorEmail",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "timestamp",
-        "type": "uint256"
-      }
-    ],
-    "name": "DonationRecorded",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "previousOwner",
-        "type": "address"
-      },
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "newOwner",
-        "type": "address"
-      }
-    ],
-    "name": "OwnershipTransferred",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "from",
-        "type": "address"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "amount",
-        "type": "uint256"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "withdrawalId",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "timestamp",
-        "type": "uint256"
-      }
-    ],
-    "name": "TokensBurned",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "recipient",
-        "type": "address"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "amount",
-        "type": "uint256"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "actionType",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "actionId",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "timestamp",
-        "type": "uint256"
-      }
-    ],
-    "name": "TokensMinted",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "from",
-        "type": "address"
-      },
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "to",
-        "type": "address"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "value",
-        "type": "uint256"
-      }
-    ],
-    "name": "Transfer",
-    "type": "event"
-  },
-  {
-    "anonymous": false,
-    "inputs": [
-      {
-        "indexed": true,
-        "internalType": "address",
-        "name": "user",
-        "type": "address"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "tokenAmount",
-        "type": "uint256"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "nairaAmount",
-        "type": "uint256"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "withdrawalId",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "string",
-        "name": "paymentReference",
-        "type": "string"
-      },
-      {
-        "indexed": false,
-        "internalType": "uint256",
-        "name": "timestamp",
-        "type": "uint256"
-      }
-    ],
-    "name": "WithdrawalCompleted",
-    "type": "event"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "owner",
-        "type": "address"
-      },
-      {
-        "internalType": "address",
-        "name": "spender",
-        "type": "address"
-      }
-    ],
-    "name": "allowance",
-    "outputs": [
-      {
-        "internalType": "uint256",
-        "name": "",
-        "type": "uint256"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "spender",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "value",
-        "type": "uint256"
-      }
-    ],
-    "name": "approve",
-    "outputs": [
-      {
-        "internalType": "bool",
-        "name": "",
-        "type": "bool"
-      }
-    ],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "account",
-        "type": "address"
-      }
-    ],
-    "name": "balanceOf",
-    "outputs": [
-      {
-        "internalType": "uint256",
-        "name": "",
-        "type": "uint256"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "from",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "amount",
-        "type": "uint256"
-      },
-      {
-        "internalType": "string",
-        "name": "withdrawalId",
-        "type": "string"
-      }
-    ],
-    "name": "burnTokens",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "decimals",
-    "outputs": [
-      {
-        "internalType": "uint8",
-        "name": "",
-        "type": "uint8"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "getTotalSupply",
-    "outputs": [
-      {
-        "internalType": "uint256",
-        "name": "",
-        "type": "uint256"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "recipient",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "amount",
-        "type": "uint256"
-      },
-      {
-        "internalType": "string",
-        "name": "actionType",
-        "type": "string"
-      },
-      {
-        "internalType": "string",
-        "name": "actionId",
-        "type": "string"
-      }
-    ],
-    "name": "mintTokens",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "name",
-    "outputs": [
-      {
-        "internalType": "string",
-        "name": "",
-        "type": "string"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "owner",
-    "outputs": [
-      {
-        "internalType": "address",
-        "name": "",
-        "type": "address"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "uint256",
-        "name": "amountNaira",
-        "type": "uint256"
-      },
-      {
-        "internalType": "string",
-        "name": "reference",
-        "type": "string"
-      },
-      {
-        "internalType": "string",
-        "name": "donorEmail",
-        "type": "string"
-      }
-    ],
-    "name": "recordDonation",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "user",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "tokenAmount",
-        "type": "uint256"
-      },
-      {
-        "internalType": "uint256",
-        "name": "nairaAmount",
-        "type": "uint256"
-      },
-      {
-        "internalType": "string",
-        "name": "withdrawalId",
-        "type": "string"
-      },
-      {
-        "internalType": "string",
-        "name": "paymentReference",
-        "type": "string"
-      }
-    ],
-    "name": "recordWithdrawal",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "renounceOwnership",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "symbol",
-    "outputs": [
-      {
-        "internalType": "string",
-        "name": "",
-        "type": "string"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [],
-    "name": "totalSupply",
-    "outputs": [
-      {
-        "internalType": "uint256",
-        "name": "",
-        "type": "uint256"
-      }
-    ],
-    "stateMutability": "view",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "to",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "value",
-        "type": "uint256"
-      }
-    ],
-    "name": "transfer",
-    "outputs": [
-      {
-        "internalType": "bool",
-        "name": "",
-        "type": "bool"
-      }
-    ],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "from",
-        "type": "address"
-      },
-      {
-        "internalType": "address",
-        "name": "to",
-        "type": "address"
-      },
-      {
-        "internalType": "uint256",
-        "name": "value",
-        "type": "uint256"
-      }
-    ],
-    "name": "transferFrom",
-    "outputs": [
-      {
-        "internalType": "bool",
-        "name": "",
-        "type": "bool"
-      }
-    ],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  },
-  {
-    "inputs": [
-      {
-        "internalType": "address",
-        "name": "newOwner",
-        "type": "address"
-      }
-    ],
-    "name": "transferOwnership",
-    "outputs": [],
-    "stateMutability": "nonpayable",
-    "type": "function"
-  }
-]
-''')
+    Returns:
+        list: Contract ABI
+    """
+    with open(path) as f:
+        return json.load(f)
 
-# Initialize contract (will be None if CONTRACT_ADDRESS not set)
-if CONTRACT_ADDRESS:
-    try:
-        contract = w3.eth.contract(
-            address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-            abi=CONTRACT_ABI
-        )
-    except Exception as e:
-        print(f"WARNING: Could not initialize contract: {e}")
-        contract = None
-else:
-    contract = None
-    print("WARNING: CONTRACT_ADDRESS not set in .env")
+
+def build_rpc_session():
+    """
+    Keep-alive session shared by every RPC endpoint. The pool is bounded and
+    blocks when exhausted; connection failures and 429/5xx answers are retried
+    with exponential backoff. Read timeouts are not retried here, because a
+    write may already have reached the node.
+    """
+    retry = Retry(
+        total=RPC_MAX_RETRIES,
+        connect=RPC_MAX_RETRIES,
+        read=0,
+        status=RPC_MAX_RETRIES,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        backoff_factor=RPC_BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=len(BASE_RPC_URLS),
+        pool_maxsize=RPC_POOL_SIZE,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class FailoverHTTPProvider(BaseProvider):
+    """
+    JSON-RPC provider over several HTTP endpoints. Requests go to the last
+    endpoint that answered; on transport errors the next one is tried.
+    Broadcasts only fail over when the request could not have been delivered.
+    """
+
+    def __init__(self, endpoint_uris, session=None):
+        super().__init__()
+        self.session = session or build_rpc_session()
+        self.providers = [
+            Web3.HTTPProvider(
+                uri,
+                request_kwargs={'timeout': (RPC_CONNECT_TIMEOUT, RPC_READ_TIMEOUT)},
+                session=self.session,
+                # Retries live in the session adapter
+                exception_retry_configuration=None,
+            )
+            for uri in endpoint_uris
+        ]
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint_uri(self):
+        return self.providers[self._active].endpoint_uri
+
+    def make_request(self, method, params):
+        last_error = None
+        start = self._active
+        for offset in range(len(self.providers)):
+            index = (start + offset) % len(self.providers)
+            provider = self.providers[index]
+            try:
+                response = provider.make_request(method, params)
+            except FAILOVER_ERRORS as e:
+                if method == 'eth_sendRawTransaction' and isinstance(e, requests.ReadTimeout):
+                    raise
+                logger.warning(f"RPC {provider.endpoint_uri} failed for {method}: {e}")
+                last_error = e
+                continue
+            if index != self._active:
+                with self._lock:
+                    self._active = index
+                logger.info(f"RPC failover: now using {provider.endpoint_uri}")
+            return response
+        raise last_error
+
+    def is_connected(self, show_traceback=False):
+        return any(provider.is_connected(show_traceback) for provider in self.providers)
+
+
+class FeeOracle:
+    """
+    Shared EIP-1559 fee and gas source for contract writes.
+
+    Base and priority fees come from a single eth_feeHistory call cached for
+    FEE_CACHE_SECONDS. Gas limits are estimated once per contract function,
+    padded by GAS_ESTIMATE_MARGIN and memoized for GAS_ESTIMATE_SECONDS.
+    Counters for cache hits and estimated-versus-used gas are kept per process
+    and reported by metrics().
+    """
+
+    def __init__(self, w3, fee_ttl=None, estimate_ttl=None, margin=None):
+        self.w3 = w3
+        self.fee_ttl = FEE_CACHE_SECONDS if fee_ttl is None else fee_ttl
+        self.estimate_ttl = GAS_ESTIMATE_SECONDS if estimate_ttl is None else estimate_ttl
+        self.margin = GAS_ESTIMATE_MARGIN if margin is None else margin
+        self._fees = None
+        self._fees_at = 0
+        self._estimates = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'fee_hits': 0, 'fee_misses': 0,
+            'gas_hits': 0, 'gas_misses': 0, 'gas_fallbacks': 0,
+        }
+        self._gas_usage = {}
+
+    def get_fees(self):
+        """
+        Fee fields for a type-2 transaction
+
+        Returns:
+            dict: maxFeePerGas and maxPriorityFeePerGas in wei
+        """
+        with self._lock:
+            if self._fees and time.monotonic() - self._fees_at < self.fee_ttl:
+                self._counters['fee_hits'] += 1
+                return dict(self._fees)
+            self._counters['fee_misses'] += 1
+
+        history = self.w3.eth.fee_history(1, 'latest', [FEE_PRIORITY_PERCENTILE])
+        # The last baseFeePerGas entry is the base fee of the next block
+        base_fee = history['baseFeePerGas'][-1]
+        rewards = history.get('reward') or [[0]]
+        priority_fee = max(int(rewards[-1][0]), MIN_PRIORITY_FEE_WEI)
+        fees = {
+            # Headroom for the base fee to double before the transaction is mined
+            'maxFeePerGas': 2 * base_fee + priority_fee,
+            'maxPriorityFeePerGas': priority_fee,
+        }
+
+        with self._lock:
+            self._fees = fees
+            self._fees_at = time.monotonic()
+        return dict(fees)
+
+    def estimate_gas(self, function_name, call, sender):
+        """
+        Gas limit for a contract call, memoized per function
+
+        Args:
+            function_name (str): Contract function the estimate is cached under
+            call: Bound ContractFunction to estimate
+            sender (str): Address the transaction is sent from
+
+        Returns:
+            int: Estimated gas plus the safety margin, or the GAS_LIMITS
+                 fallback if the node could not estimate
+        """
+        with self._lock:
+            cached = self._estimates.get(function_name)
+            if cached and time.monotonic() - cached[1] < self.estimate_ttl:
+                self._counters['gas_hits'] += 1
+                return cached[0]
+            self._counters['gas_misses'] += 1
+
+        try:
+            gas = int(call.estimate_gas({'from': sender}) * self.margin)
+        except ContractLogicError:
+            # The call would revert; let the caller see why instead of paying for it
+            raise
+        except Exception as e:
+            logger.warning(f"Gas estimate for {function_name} failed, using fallback: {e}")
+            with self._lock:
+                self._counters['gas_fallbacks'] += 1
+            return GAS_LIMITS[function_name]
+
+        with self._lock:
+            self._estimates[function_name] = (gas, time.monotonic())
+        return gas
+
+    def record_gas_used(self, function_name, gas_limit, gas_used):
+        """
+        Track a mined transaction against the limit it was sent with. A
+        transaction that used nearly all of its limit drops the cached
+        estimate so the next one is estimated again.
+        """
+        with self._lock:
+            usage = self._gas_usage.setdefault(function_name, {'count': 0, 'limit': 0, 'used': 0})
+            usage['count'] += 1
+            usage['limit'] += gas_limit
+            usage['used'] += gas_used
+            if gas_used >= gas_limit * 0.95:
+                self._estimates.pop(function_name, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._fees = None
+            self._estimates.clear()
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Hit rates for the fee and gas caches, and per function the
+                  average limit sent, average gas used and overestimate ratio
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            usage = {name: dict(u) for name, u in self._gas_usage.items()}
+
+        def hit_rate(hits, misses):
+            return round(hits / (hits + misses), 3) if hits + misses else None
+
+        return {
+            **counters,
+            'fee_hit_rate': hit_rate(counters['fee_hits'], counters['fee_misses']),
+            'gas_hit_rate': hit_rate(counters['gas_hits'], counters['gas_misses']),
+            'gas': {
+                name: {
+                    'count': u['count'],
+                    'avg_limit': u['limit'] // u['count'],
+                    'avg_used': u['used'] // u['count'],
+                    'overestimate': round(u['limit'] / u['used'] - 1, 3) if u['used'] else None,
+                }
+                for name, u in usage.items()
+            },
+        }
+
+
+class BlockchainClient:
+    """
+    Web3 connection, admin account and BloomToken contract, built once per
+    process by get_client(). Construction does not hit the network.
+    """
+
+    def __init__(self, rpc_urls=None, private_key=ADMIN_PRIVATE_KEY, contract_address=CONTRACT_ADDRESS):
+        self.w3 = Web3(FailoverHTTPProvider(rpc_urls or BASE_RPC_URLS))
+        self.fees = FeeOracle(self.w3)
+        self._chain_id = None
+
+        self.admin_account = Account.from_key(private_key) if private_key else None
+        if not self.admin_account:
+            logger.warning("ADMIN_PRIVATE_KEY not set in .env")
+
+        self.contract = None
+        if contract_address:
+            try:
+                self.contract = self.w3.eth.contract(
+                    address=Web3.to_checksum_address(contract_address),
+                    abi=load_contract_abi(),
+                )
+            except Exception as e:
+                logger.warning(f"Could not initialize contract: {e}")
+        else:
+            logger.warning("CONTRACT_ADDRESS not set in .env")
+
+    @property
+    def chain_id(self):
+        # Fixed for the life of the process; saves build_transaction a call per write
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide BlockchainClient, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BlockchainClient()
+    return _client
+
+
+def __getattr__(name):
+    # Former import-time globals, now resolved lazily
+    if name in ('w3', 'admin_account', 'contract'):
+        return getattr(get_client(), name)
+    if name == 'CONTRACT_ABI':
+        return load_contract_abi()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def record_deposit(amount_naira, reference, donor_email):
@@ -709,7 +360,8 @@ def record_deposit(amount_naira, reference, donor_email):
     Returns:
         dict: Transaction details including hash and explorer URL
     """
-    if not admin_account or not contract:
+    client = get_client()
+    if not client.admin_account or not client.contract:
         return {
             'success': False,
             'error': 'Admin account or contract not initialized'
@@ -717,25 +369,20 @@ def record_deposit(amount_naira, reference, donor_email):
 
     try:
         # Build transaction
-        tx = contract.functions.recordDonation(
-            int(amount_naira),
-            reference,
-            donor_email
-        ).build_transaction({
-            'from': admin_account.address,
-            'nonce': w3.eth.get_transaction_count(admin_account.address),
-            'gas': 200000,
-            'gasPrice': w3.eth.gas_price,
-        })
+        tx = build_contract_transaction(
+            'recordDonation',
+            [int(amount_naira), reference, donor_email],
+            client.w3.eth.get_transaction_count(client.admin_account.address),
+        )
 
         # Sign transaction
-        signed_tx = admin_account.sign_transaction(tx)
+        signed_tx = client.admin_account.sign_transaction(tx)
 
         # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = client.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
         # Wait for confirmation
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = client.w3.eth.wait_for_transaction_receipt(tx_hash)
 
         tx_hash_hex = tx_hash.hex()
 
@@ -767,7 +414,8 @@ def mint_tokens(user_wallet, amount, action_type, action_id):
     Returns:
         dict: Transaction details including hash and explorer URL
     """
-    if not admin_account or not contract:
+    client = get_client()
+    if not client.admin_account or not client.contract:
         return {
             'success': False,
             'error': 'Admin account or contract not initialized'
@@ -778,26 +426,20 @@ def mint_tokens(user_wallet, amount, action_type, action_id):
         user_wallet = Web3.to_checksum_address(user_wallet)
 
         # Build transaction
-        tx = contract.functions.mintTokens(
-            user_wallet,
-            int(amount),
-            action_type,
-            action_id
-        ).build_transaction({
-            'from': admin_account.address,
-            'nonce': w3.eth.get_transaction_count(admin_account.address),
-            'gas': 200000,
-            'gasPrice': w3.eth.gas_price,
-        })
+        tx = build_contract_transaction(
+            'mintTokens',
+            [user_wallet, int(amount), action_type, action_id],
+            client.w3.eth.get_transaction_count(client.admin_account.address),
+        )
 
         # Sign transaction
-        signed_tx = admin_account.sign_transaction(tx)
+        signed_tx = client.admin_account.sign_transaction(tx)
 
         # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = client.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
         # Wait for confirmation (2-5 seconds on Base)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = client.w3.eth.wait_for_transaction_receipt(tx_hash)
 
         tx_hash_hex = tx_hash.hex()
 
@@ -828,7 +470,8 @@ def burn_tokens(user_wallet, amount, withdrawal_id):
     Returns:
         dict: Transaction details including hash and explorer URL
     """
-    if not admin_account or not contract:
+    client = get_client()
+    if not client.admin_account or not client.contract:
         return {
             'success': False,
             'error': 'Admin account or contract not initialized'
@@ -839,25 +482,20 @@ def burn_tokens(user_wallet, amount, withdrawal_id):
         user_wallet = Web3.to_checksum_address(user_wallet)
 
         # Build transaction
-        tx = contract.functions.burnTokens(
-            user_wallet,
-            int(amount),
-            withdrawal_id
-        ).build_transaction({
-            'from': admin_account.address,
-            'nonce': w3.eth.get_transaction_count(admin_account.address),
-            'gas': 200000,
-            'gasPrice': w3.eth.gas_price,
-        })
+        tx = build_contract_transaction(
+            'burnTokens',
+            [user_wallet, int(amount), withdrawal_id],
+            client.w3.eth.get_transaction_count(client.admin_account.address),
+        )
 
         # Sign transaction
-        signed_tx = admin_account.sign_transaction(tx)
+        signed_tx = client.admin_account.sign_transaction(tx)
 
         # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = client.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
         # Wait for confirmation
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = client.w3.eth.wait_for_transaction_receipt(tx_hash)
 
         tx_hash_hex = tx_hash.hex()
 
@@ -890,7 +528,8 @@ def record_withdrawal(user_wallet, token_amount, naira_amount, withdrawal_id, pa
     Returns:
         dict: Transaction details including hash and explorer URL
     """
-    if not admin_account or not contract:
+    client = get_client()
+    if not client.admin_account or not client.contract:
         return {
             'success': False,
             'error': 'Admin account or contract not initialized'
@@ -901,27 +540,20 @@ def record_withdrawal(user_wallet, token_amount, naira_amount, withdrawal_id, pa
         user_wallet = Web3.to_checksum_address(user_wallet)
 
         # Build transaction
-        tx = contract.functions.recordWithdrawal(
-            user_wallet,
-            int(token_amount),
-            int(naira_amount),
-            withdrawal_id,
-            payment_reference
-        ).build_transaction({
-            'from': admin_account.address,
-            'nonce': w3.eth.get_transaction_count(admin_account.address),
-            'gas': 250000,
-            'gasPrice': w3.eth.gas_price,
-        })
+        tx = build_contract_transaction(
+            'recordWithdrawal',
+            [user_wallet, int(token_amount), int(naira_amount), withdrawal_id, payment_reference],
+            client.w3.eth.get_transaction_count(client.admin_account.address),
+        )
 
         # Sign transaction
-        signed_tx = admin_account.sign_transaction(tx)
+        signed_tx = client.admin_account.sign_transaction(tx)
 
         # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = client.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
         # Wait for confirmation
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = client.w3.eth.wait_for_transaction_receipt(tx_hash)
 
         tx_hash_hex = tx_hash.hex()
 
@@ -940,6 +572,238 @@ def record_withdrawal(user_wallet, token_amount, naira_amount, withdrawal_id, pa
         }
 
 
+# Fallback gas limits per contract write, used when the node cannot estimate
+GAS_LIMITS = {
+    'recordDonation': 200000,
+    'mintTokens': 200000,
+    'burnTokens': 200000,
+    'recordWithdrawal': 250000,
+}
+
+# Positions of address arguments that need checksumming, per contract write
+ADDRESS_ARGS = {
+    'mintTokens': [0],
+    'burnTokens': [0],
+    'recordWithdrawal': [0],
+}
+
+
+def explorer_url(tx_hash):
+    return f'https://sepolia.basescan.org/tx/{tx_hash}'
+
+
+def get_pending_nonce():
+    """
+    Next nonce for the admin account, counting transactions still in the mempool
+
+    Returns:
+        int: Nonce to use for the next transaction
+    """
+    client = get_client()
+    return client.w3.eth.get_transaction_count(client.admin_account.address, 'pending')
+
+
+def build_contract_transaction(function_name, args, nonce, fees=None):
+    """
+    Unsigned EIP-1559 transaction for a contract write, with the gas limit
+    and fees taken from the shared FeeOracle
+
+    Args:
+        function_name (str): Contract function, one of GAS_LIMITS
+        args (list): Positional arguments for the function
+        nonce (int): Nonce for the transaction
+        fees (dict): maxFeePerGas / maxPriorityFeePerGas; read from the oracle if not given
+
+    Returns:
+        dict: Transaction ready to sign
+    """
+    client = get_client()
+    args = list(args)
+    for index in ADDRESS_ARGS.get(function_name, []):
+        args[index] = Web3.to_checksum_address(args[index])
+
+    call = getattr(client.contract.functions, function_name)(*args)
+    return call.build_transaction({
+        'type': 2,
+        'from': client.admin_account.address,
+        'nonce': nonce,
+        'chainId': client.chain_id,
+        'gas': client.fees.estimate_gas(function_name, call, client.admin_account.address),
+        **(fees or client.fees.get_fees()),
+    })
+
+
+def sign_contract_transaction(function_name, args, nonce, fees=None):
+    """
+    Build and sign a contract write without broadcasting it, so the caller can
+    store it first and rebroadcast exactly the same transaction after a crash
+
+    Args:
+        function_name (str): Contract function, one of GAS_LIMITS
+        args (list): Positional arguments for the function
+        nonce (int): Nonce assigned by the caller
+        fees (dict): EIP-1559 fee fields; read from the oracle if not given
+
+    Returns:
+        dict: raw_tx and tx_hash (0x-prefixed hex), gas limit and the fee fields used
+    """
+    client = get_client()
+    if not client.admin_account or not client.contract:
+        raise RuntimeError('Admin account or contract not initialized')
+
+    tx = build_contract_transaction(function_name, args, nonce, fees=fees)
+    signed_tx = client.admin_account.sign_transaction(tx)
+    return {
+        'raw_tx': Web3.to_hex(signed_tx.raw_transaction),
+        'tx_hash': Web3.to_hex(signed_tx.hash),
+        'gas': tx['gas'],
+        'fees': {key: tx[key] for key in ('maxFeePerGas', 'maxPriorityFeePerGas')},
+    }
+
+
+def broadcast_raw_transaction(raw_tx):
+    """
+    Broadcast a signed transaction; broadcasting the same one again is harmless
+
+    Returns:
+        str: 0x-prefixed transaction hash
+    """
+    return Web3.to_hex(get_client().w3.eth.send_raw_transaction(raw_tx))
+
+
+def send_contract_transaction(function_name, args, nonce, fees=None):
+    """
+    Sign and broadcast a contract write without waiting for it to be mined.
+
+    Returns:
+        tuple: 0x-prefixed transaction hash and the gas limit it was sent with
+    """
+    signed = sign_contract_transaction(function_name, args, nonce, fees=fees)
+    return broadcast_raw_transaction(signed['raw_tx']), signed['gas']
+
+
+def get_fees():
+    """Current EIP-1559 fee fields from the shared FeeOracle"""
+    return get_client().fees.get_fees()
+
+
+def record_gas_used(function_name, gas_limit, gas_used):
+    """Feed a mined transaction's gas back into the FeeOracle"""
+    get_client().fees.record_gas_used(function_name, gas_limit, gas_used)
+
+
+def get_fee_metrics():
+    """Fee/gas cache hit rates and estimated-versus-used gas for this process"""
+    return get_client().fees.metrics()
+
+
+def get_receipt(tx_hash):
+    """
+    Non-blocking receipt lookup
+
+    Returns:
+        dict: Receipt with status, block_number and gas_used, or None if not mined yet
+    """
+    client = get_client()
+    try:
+        receipt = client.w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+    return {
+        'status': receipt['status'],
+        'block_number': receipt['blockNumber'],
+        'gas_used': receipt['gasUsed'],
+    }
+
+
+def is_transaction_pending(tx_hash):
+    """
+    Whether the node still knows a transaction that has not been mined
+
+    Returns:
+        bool: False once it is mined or dropped from the mempool
+    """
+    client = get_client()
+    try:
+        tx = client.w3.eth.get_transaction(tx_hash)
+    except TransactionNotFound:
+        return False
+    return tx.get('blockNumber') is None
+
+
+def get_mined_nonce():
+    """
+    Nonce of the admin account counting mined transactions only
+
+    Returns:
+        int: Every nonce below this one has been used on chain
+    """
+    client = get_client()
+    return client.w3.eth.get_transaction_count(client.admin_account.address, 'latest')
+
+
+# Contract events mirrored into the database by the index_chain_events command
+INDEXED_EVENTS = ('TokensMinted', 'TokensBurned', 'Transfer', 'DonationRecorded', 'WithdrawalCompleted')
+
+
+def _event_topic(event_name):
+    event_abi = next(e for e in load_contract_abi() if e['type'] == 'event' and e['name'] == event_name)
+    signature = f"{event_name}({','.join(i['type'] for i in event_abi['inputs'])})"
+    return Web3.to_hex(Web3.keccak(text=signature))
+
+
+@lru_cache(maxsize=None)
+def get_event_topics():
+    """Topic hash -> event name for INDEXED_EVENTS"""
+    return {_event_topic(name): name for name in INDEXED_EVENTS}
+
+
+def get_block_number():
+    client = get_client()
+    return client.w3.eth.block_number
+
+
+def get_contract_events(from_block, to_block):
+    """
+    Fetch and decode the indexed BloomToken events in a block range
+
+    Args:
+        from_block (int): First block, inclusive
+        to_block (int): Last block, inclusive
+
+    Returns:
+        list: Dicts with event, args, tx_hash, log_index and block_number, in chain order
+    """
+    client = get_client()
+    if not client.contract:
+        raise RuntimeError('Contract not initialized')
+
+    event_topics = get_event_topics()
+    logs = client.w3.eth.get_logs({
+        'address': client.contract.address,
+        'fromBlock': from_block,
+        'toBlock': to_block,
+        'topics': [list(event_topics.keys())],
+    })
+
+    events = []
+    for log in logs:
+        event_name = event_topics.get(Web3.to_hex(log['topics'][0]))
+        if not event_name:
+            continue
+        decoded = getattr(client.contract.events, event_name)().process_log(log)
+        events.append({
+            'event': event_name,
+            # uint256 values can exceed JSON-safe integers, so keep them as strings
+            'args': {k: str(v) if isinstance(v, int) else v for k, v in decoded['args'].items()},
+            'tx_hash': Web3.to_hex(log['transactionHash']),
+            'log_index': log['logIndex'],
+            'block_number': log['blockNumber'],
+        })
+    events.sort(key=lambda e: (e['block_number'], e['log_index']))
+    return events
+
+
 def get_balance(user_wallet):
     """
     Get a user's BLOOM token balance from blockchain
@@ -950,13 +814,14 @@ def get_balance(user_wallet):
     Returns:
         int: Token balance
     """
-    if not contract:
+    client = get_client()
+    if not client.contract:
         print("Error: Contract not initialized")
         return 0
 
     try:
         user_wallet = Web3.to_checksum_address(user_wallet)
-        balance = contract.functions.balanceOf(user_wallet).call()
+        balance = client.contract.functions.balanceOf(user_wallet).call()
         return balance
     except Exception as e:
         print(f"Error getting balance: {e}")
@@ -970,12 +835,13 @@ def get_total_supply():
     Returns:
         int: Total supply of tokens
     """
-    if not contract:
+    client = get_client()
+    if not client.contract:
         print("Error: Contract not initialized")
         return 0
 
     try:
-        return contract.functions.getTotalSupply().call()
+        return client.contract.functions.getTotalSupply().call()
     except Exception as e:
         print(f"Error getting total supply: {e}")
         return 0
@@ -998,11 +864,12 @@ def generate_wallet():
 # Test connection on module load
 if __name__ == "__main__":
     print("Testing blockchain connection...")
-    print(f"Connected to Base Sepolia: {w3.is_connected()}")
-    if w3.is_connected():
-        print(f"Latest block: {w3.eth.block_number}")
-    if admin_account:
-        print(f"Admin address: {admin_account.address}")
+    client = get_client()
+    print(f"Connected to Base Sepolia: {client.w3.is_connected()}")
+    if client.w3.is_connected():
+        print(f"Latest block: {client.w3.eth.block_number}")
+    if client.admin_account:
+        print(f"Admin address: {client.admin_account.address}")
     if CONTRACT_ADDRESS:
         print(f"Contract address: {CONTRACT_ADDRESS}")
     else:
@@ -139,6 +139,20 @@ CORS_ALLOWED_ORIGINS = [origin.strip() for origin in CORS_ALLOWED_ORIGINS if ori
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Seconds the public pool info / token value may be served from cache
+POOL_INFO_CACHE_SECONDS = int(os.getenv('POOL_INFO_CACHE_SECONDS', '30'))
+
+# Seconds the chain signer gathers mints per wallet before submitting one batched mint
+CHAIN_MINT_BATCH_SECONDS = int(os.getenv('CHAIN_MINT_BATCH_SECONDS', '60'))
+
+# Seconds a submitted transaction may go unmined before the signer checks whether
+# it was dropped and rebroadcasts it with higher fees (or requeues it if its nonce was used)
+CHAIN_REBROADCAST_SECONDS = int(os.getenv('CHAIN_REBROADCAST_SECONDS', '180'))
+
+# Event indexer: blocks to stay behind head (reorg safety) and where to start scanning
+CHAIN_CONFIRMATIONS = int(os.getenv('CHAIN_CONFIRMATIONS', '12'))
+CHAIN_INDEX_START_BLOCK = int(os.getenv('CHAIN_INDEX_START_BLOCK', '0'))
+
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'apps.users.backends.EmailBackend',
@@ -151,6 +165,95 @@ load_dotenv(BASE_DIR.parent / '.env')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 TOGETHER_API_KEY = os.getenv('TOGETHER_API_KEY')
 
+# Upstream AI providers: HTTP timeouts, retries with jittered backoff, keep-alive
+# pool size, and the circuit breaker that fails fast while a provider is down
+AI_CONNECT_TIMEOUT = float(os.getenv('AI_CONNECT_TIMEOUT', '5'))
+AI_READ_TIMEOUT = float(os.getenv('AI_READ_TIMEOUT', '30'))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '2'))
+AI_RETRY_BASE_DELAY = float(os.getenv('AI_RETRY_BASE_DELAY', '0.5'))
+AI_RETRY_MAX_DELAY = float(os.getenv('AI_RETRY_MAX_DELAY', '4'))
+AI_POOL_SIZE = int(os.getenv('AI_POOL_SIZE', '10'))
+AI_BREAKER_THRESHOLD = int(os.getenv('AI_BREAKER_THRESHOLD', '5'))
+AI_BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', '30'))
+
+# Streaming voice replies: sentences voiced in parallel per request
+AI_STREAM_TTS_WORKERS = int(os.getenv('AI_STREAM_TTS_WORKERS', '3'))
+
+# Worker threads for TTS / extraction calls run alongside each other after a reply,
+# and how long a request waits for each before going on without it
+AI_CALL_POOL_WORKERS = int(os.getenv('AI_CALL_POOL_WORKERS', '8'))
+AI_TTS_TIMEOUT_SECONDS = float(os.getenv('AI_TTS_TIMEOUT_SECONDS', '15'))
+AI_EXTRACTION_TIMEOUT_SECONDS = float(os.getenv('AI_EXTRACTION_TIMEOUT_SECONDS', '20'))
+
+# Size cap for the shared TTS audio cache; least recently used audio is evicted first
+AI_TTS_CACHE_MAX_BYTES = int(os.getenv('AI_TTS_CACHE_MAX_BYTES', str(500 * 1024 * 1024)))
+
+# Shared LLM reply cache: "type:ttl_seconds" pairs (types not listed are never cached),
+# pregnancy weeks grouped per bucket, the shortest question worth caching, and the
+# MinHash similarity at which a differently worded question reuses a reply
+AI_RESPONSE_CACHE_TTLS = {
+    conversation_type.strip(): int(ttl)
+    for conversation_type, ttl in (
+        pair.split(':') for pair in os.getenv('AI_RESPONSE_CACHE_TTLS', 'chat:21600,sms:86400').split(',') if ':' in pair
+    )
+}
+AI_RESPONSE_CACHE_WEEK_BUCKET = int(os.getenv('AI_RESPONSE_CACHE_WEEK_BUCKET', '2'))
+AI_RESPONSE_CACHE_MIN_WORDS = int(os.getenv('AI_RESPONSE_CACHE_MIN_WORDS', '3'))
+AI_RESPONSE_CACHE_SIMILARITY = float(os.getenv('AI_RESPONSE_CACHE_SIMILARITY', '0.7'))
+
+# Prompt context: token budget for summary + recent messages, most messages looked at,
+# and the rolling summary (newest messages kept verbatim, folded this many at a time)
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv('AI_CONTEXT_TOKEN_BUDGET', '1500'))
+AI_CONTEXT_MAX_MESSAGES = int(os.getenv('AI_CONTEXT_MAX_MESSAGES', '50'))
+AI_EXTRACTION_TOKEN_BUDGET = int(os.getenv('AI_EXTRACTION_TOKEN_BUDGET', '3000'))
+AI_SUMMARY_KEEP_MESSAGES = int(os.getenv('AI_SUMMARY_KEEP_MESSAGES', '6'))
+AI_SUMMARY_EVERY_MESSAGES = int(os.getenv('AI_SUMMARY_EVERY_MESSAGES', '6'))
+AI_SUMMARY_MAX_TOKENS = int(os.getenv('AI_SUMMARY_MAX_TOKENS', '200'))
+AI_SUMMARY_TIMEOUT_SECONDS = float(os.getenv('AI_SUMMARY_TIMEOUT_SECONDS', '20'))
+
+# Background jobs (run by `manage.py run_ai_jobs`): seconds before a RUNNING job is
+# assumed lost and requeued, base retry backoff, and running jobs inline at enqueue
+# (for local development without a worker)
+AI_JOBS_STALE_SECONDS = int(os.getenv('AI_JOBS_STALE_SECONDS', '300'))
+AI_JOBS_RETRY_BACKOFF_SECONDS = int(os.getenv('AI_JOBS_RETRY_BACKOFF_SECONDS', '10'))
+AI_JOBS_EAGER = os.getenv('AI_JOBS_EAGER', 'False').lower() == 'true'
+
+# Voice uploads: largest accepted (Whisper's limit), size above which audio is
+# transcoded to Opus through ffmpeg (skipped if ffmpeg is not installed)
+AI_AUDIO_MAX_BYTES = int(os.getenv('AI_AUDIO_MAX_BYTES', str(25 * 1024 * 1024)))
+AI_AUDIO_TRANSCODE_BYTES = int(os.getenv('AI_AUDIO_TRANSCODE_BYTES', str(1024 * 1024)))
+AI_AUDIO_FFMPEG = os.getenv('AI_AUDIO_FFMPEG', 'ffmpeg')
+AI_AUDIO_OPUS_BITRATE = os.getenv('AI_AUDIO_OPUS_BITRATE', '24k')
+AI_AUDIO_TRANSCODE_TIMEOUT_SECONDS = float(os.getenv('AI_AUDIO_TRANSCODE_TIMEOUT_SECONDS', '20'))
+
+# AI backends (see apps/ai/backends.py). LLM: together, openai or local; routes send a
+# conversation type (or 'sms', 'extraction', 'summary') to another backend, e.g.
+# "sms:local,extraction:local". The fallback backend answers when the routed one fails.
+AI_LLM_BACKEND = os.getenv('AI_LLM_BACKEND', 'together')
+AI_LLM_ROUTES = dict(
+    route.strip().split(':', 1)
+    for route in os.getenv('AI_LLM_ROUTES', 'sms:openai').split(',') if ':' in route
+)
+AI_LLM_FALLBACK = os.getenv('AI_LLM_FALLBACK', '')
+AI_OPENAI_CHAT_MODEL = os.getenv('AI_OPENAI_CHAT_MODEL', 'gpt-4o-mini')
+# Local LLM: any OpenAI-compatible server (llama.cpp llama-server, Ollama, vLLM)
+AI_LOCAL_LLM_URL = os.getenv('AI_LOCAL_LLM_URL', 'http://127.0.0.1:8080/v1')
+AI_LOCAL_LLM_MODEL = os.getenv('AI_LOCAL_LLM_MODEL', 'qwen2.5-3b-instruct-q4_k_m')
+AI_LOCAL_LLM_TIMEOUT = float(os.getenv('AI_LOCAL_LLM_TIMEOUT', '60'))
+AI_LOCAL_LLM_JSON_MODE = os.getenv('AI_LOCAL_LLM_JSON_MODE', 'True').lower() == 'true'
+# Speech: openai or local (faster-whisper for speech-to-text, Piper for text-to-speech)
+AI_STT_BACKEND = os.getenv('AI_STT_BACKEND', 'openai')
+AI_TTS_BACKEND = os.getenv('AI_TTS_BACKEND', 'openai')
+AI_LOCAL_WHISPER_MODEL = os.getenv('AI_LOCAL_WHISPER_MODEL', 'base.en')
+AI_LOCAL_WHISPER_COMPUTE_TYPE = os.getenv('AI_LOCAL_WHISPER_COMPUTE_TYPE', 'int8')
+AI_LOCAL_WHISPER_THREADS = int(os.getenv('AI_LOCAL_WHISPER_THREADS', '0'))
+AI_PIPER_BINARY = os.getenv('AI_PIPER_BINARY', 'piper')
+AI_PIPER_MODEL = os.getenv('AI_PIPER_MODEL', '')
+
+# Daily program: how often each process re-checks DailyContent for changes made
+# by other processes (saves in this process and the seed commands apply at once)
+DAILY_CONTENT_MAP_RECHECK_SECONDS = int(os.getenv('DAILY_CONTENT_MAP_RECHECK_SECONDS', '300'))
+
 # ALATPay Configuration
 ALATPAY_PUBLIC_KEY = os.getenv('ALATPAY_PUBLIC_KEY')
 ALATPAY_SECRET_KEY = os.getenv('ALATPAY_SECRET_KEY')
@@ -19,5 +19,13 @@ python manage.py seed_all
 # Collect static files
 python manage.py collectstatic --noinput
 
+# Start background workers
+python manage.py run_chain_signer &
+python manage.py index_chain_events &
+python manage.py run_ai_jobs &
+python manage.py schedule_daily_program --loop &
+python manage.py fold_pool_shards --loop &
+
 # Start gunicorn
-gunicorn mamalert.wsgi:application --bind 0.0.0.0:8000 --workers 2
+# Threaded workers: a streamed reply (/api/ai/conversation/message/stream/) holds a thread, not a whole worker
+gunicorn mamalert.wsgi:application --bind 0.0.0.0:8000 --workers 2 --worker-class gthread --threads 8